@@ -0,0 +1,317 @@
+"""Sıcak yol karşılaştırması: saniyelik geri sayım tiki, sayfa ayrıştırma ve JSON dosyaları
+
+Tk penceresi yerine çağrıları sayan sanal bir ekran, Diyanet sitesi yerine benchmarks/pages
+sayfalarını sunan yerel bir sunucu kullanılır; ağ, ekran veya X sunucusu gerekmez.
+Sonuçlar --output ile JSON olarak saklanır, başka bir commit'in sonucuyla --compare ile karşılaştırılır.
+
+Kullanım: python benchmarks/bench_hotpath.py [--repeat 7] [--json] [--output sonuc.json]
+          python benchmarks/bench_hotpath.py --compare onceki.json [--threshold 0.25]
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import timeit
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import main  # noqa: E402
+from main import ClockWidget, DiyanetApi, Tools  # noqa: E402
+
+PAGES = Path(__file__).parent / "pages"
+SCREEN = (1920, 1080)
+TK_CALLS = Counter()  # Sanal ekrana yapılan Tk çağrıları
+
+
+class VirtualWidget:
+    """Toplevel, Label ve Menu yerine geçer; yalnızca çağrıları sayar"""
+    OPTIONS = {"borderwidth": 0, "highlightthickness": 0, "padx": 1, "pady": 1}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):  # geometry, config, attributes, bind, pack...
+        def call(*args, **kwargs):
+            TK_CALLS[name] += 1
+        return call
+
+    def cget(self, key):
+        return self.OPTIONS[key]
+
+    def winfo_screenwidth(self):
+        return SCREEN[0]
+
+    def winfo_screenheight(self):
+        return SCREEN[1]
+
+
+class VirtualFont:
+    """Sabit genişlikli yazı tipi ölçüsü (tkinter.font.Font yerine)"""
+
+    def __init__(self, root=None, family=None, size=14, weight="normal"):
+        self.size = size
+
+    def measure(self, text):
+        TK_CALLS["font.measure"] += 1
+        return len(text) * self.size * 3 // 4
+
+    def metrics(self, option):
+        TK_CALLS["font.metrics"] += 1
+        return self.size * 4 // 3
+
+
+class VirtualRoot:
+    """root.after arayüzü; zamanlayıcılar kurulur ama hiç çalıştırılmaz"""
+
+    def __init__(self):
+        self._counter = 0
+
+    def after(self, delay_ms, callback, *args):
+        TK_CALLS["after"] += 1
+        self._counter += 1
+        return f"after#{self._counter}"
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, job):
+        TK_CALLS["after_cancel"] += 1
+
+
+class StubDiyanet(BaseHTTPRequestHandler):
+    """Kayıtlı sayfaları /<ilçe id> yolundan, ilçe listesini /home/GetRegList yolundan sunar"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    pages = {}  # {ilçe id: (ad, sayfa baytları)}
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/home/GetRegList"):
+            body = json.dumps({"StateRegionList": [{"IlceAdi": name, "IlceID": district_id}
+                                                   for district_id, (name, _) in self.pages.items()]}).encode()
+            content_type = "application/json"
+        elif page := self.pages.get(path.rsplit("/", 1)[-1]):
+            body = page[1]
+            content_type = "text/html; charset=utf-8"
+        else:
+            return self.send_error(404)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """Sunucuyu boş bir portta başlat ve DiyanetApi'yi ona yönlendir"""
+    for page in sorted(PAGES.glob("*.html")):
+        name, district_id = page.stem.rsplit("-", 1)
+        StubDiyanet.pages[district_id] = (name, page.read_bytes())
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubDiyanet)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    DiyanetApi.BASE_URL = f"http://127.0.0.1:{server.server_port}/tr-TR/"
+    return server
+
+
+def make_times(start, days):
+    """start gününden itibaren days günlük, mevsimle kayan sentetik vakitler"""
+    times = {}
+    for d in range(days):
+        day = start + timedelta(days=d)
+        shift = abs(day.timetuple().tm_yday - 172) // 3  # gün dönümünden uzaklaştıkça kayar
+        minutes = (200 + shift, 290 + shift // 2, 790, 1000 - shift, 1230 - shift, 1320 - shift)
+        times[day.isoformat()] = [Tools.to_clock(m) for m in minutes]
+    return times
+
+
+def make_data(directory):
+    """Ayarlar ve vakitler dosyalarını oluştur, Tools'u bu dizine yönlendir"""
+    Tools.set_base_dir(directory)
+    Tools.save_json(Tools.SETTINGS, Tools._default_settings)
+    Tools.save_json(Tools.PRAYER_TIMES, make_times(date.today() - timedelta(days=7), 30))
+    multi_year = Tools.BASE_DIR / "vakitler-5-yil.json"
+    Tools.save_json(multi_year, make_times(date.today() - timedelta(days=365), 5 * 365))
+    return multi_year
+
+
+def make_clock():
+    """Sanal ekranda gerçek bir ClockWidget kur"""
+    main.tk = SimpleNamespace(Toplevel=VirtualWidget, Label=VirtualWidget, Menu=VirtualWidget, BOTH="both")
+    main.tkfont = SimpleNamespace(Font=VirtualFont)
+    return ClockWidget(VirtualRoot())
+
+
+def measure(func, repeat):
+    """Bir tur ~0.2 sn sürecek kadar çağrıyı repeat tur ölç; çağrı başına µs"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    timings = [total / number for total in timer.repeat(repeat, number)]
+    return {"number": number, "best_us": min(timings) * 1e6, "median_us": statistics.median(timings) * 1e6}
+
+
+def tk_calls_per(func, count=1000):
+    """func'ın çağrı başına sanal ekrana yaptığı Tk çağrıları"""
+    TK_CALLS.clear()
+    for _ in range(count):
+        func()
+    return {name: calls / count for name, calls in sorted(TK_CALLS.items())}
+
+
+def clock_benchmarks(clock):
+    prayer_times = Tools.get_prayer_times()
+    copied = dict(prayer_times)  # Hazır indeks kullanılamaz, her çağrıda yeniden derlenir
+    target = clock._next_prayer_time
+    target_datetime = datetime.fromtimestamp(target)
+    states = itertools.cycle(["critical", "warning", "standard"])
+    group = clock.group
+
+    def tick():
+        group._due[clock] = 0  # "clock" zamanlayıcısı tetiklenmiş gibi
+        group._tick()
+
+    def transition_tick():
+        clock._next_change = 0  # Zaman çizelgesi de yeniden konumlanır (vakit/renk geçişi)
+        tick()
+
+    benchmarks = {
+        "tools.find_next_prayer_time": lambda: Tools.find_next_prayer_time(prayer_times),
+        "tools.find_next_prayer_time[yeni sözlük]": lambda: Tools.find_next_prayer_time(copied),
+        "tools.remaining_time[epoch]": lambda: Tools.remaining_time(target),
+        "tools.remaining_time[datetime]": lambda: Tools.remaining_time(target_datetime),
+        "clock.format_time": lambda: clock.format_time(1, 23, 45),
+        "clock.format_time[0 saat]": lambda: clock.format_time(0, 23, 45),
+        "clock.apply_color_state[aynı durum]": lambda: clock.apply_color_state(clock._color_state),
+        "clock.apply_color_state[değişen durum]": lambda: clock.apply_color_state(next(states)),
+        "clock.set_window_geometry": clock.set_window_geometry,
+        "clock.tick": tick,
+        "scheduler._run[boş iş]": lambda: clock.scheduler._run("bench", int, 0.0),  # tanılama ölçüm maliyeti
+        "clock.tick[geçiş]": transition_tick,
+    }
+    tk_calls = {"clock.tick": tk_calls_per(tick), "clock.tick[geçiş]": tk_calls_per(transition_tick)}
+    return benchmarks, tk_calls
+
+
+def parse_benchmarks():
+    api = DiyanetApi()
+    backends = ["stream"]
+    try:
+        import lxml  # noqa: F401
+        backends.append("lxml")
+    except ImportError:
+        pass
+    benchmarks = {}
+    for page in sorted(PAGES.glob("*.html")):
+        html_content = page.read_text(encoding="utf-8")
+        for backend in backends:
+            benchmarks[f"api.parse_times[{page.stem},{backend}]"] = \
+                lambda html_content=html_content, backend=backend: api.parse_times(html_content, backend)
+    for district_id in StubDiyanet.pages:
+        benchmarks[f"api.fetch_prayer_times[{district_id}]"] = \
+            lambda district_id=district_id: api.fetch_prayer_times(district_id)
+    benchmarks["api.get_districts"] = lambda: api.get_districts("539")
+    return benchmarks
+
+
+def json_benchmarks(multi_year):
+    settings = Tools.load_json(Tools.SETTINGS)
+    times = Tools.load_json(multi_year)
+    return {
+        "tools.load_json[ayarlar]": lambda: Tools.load_json(Tools.SETTINGS),
+        "tools.load_json[5 yıl vakit]": lambda: Tools.load_json(multi_year),
+        "tools.save_json[ayarlar]": lambda: Tools.save_json(Tools.SETTINGS, settings),
+        "tools.save_json[5 yıl vakit]": lambda: Tools.save_json(multi_year, times),
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """Ortak ölçümleri en iyi süreye göre karşılaştır; eşiği aşan yavaşlamaların adlarını döndür"""
+    print(f"\nKarşılaştırma: {baseline['meta'].get('commit')} -> {report['meta'].get('commit')}")
+    regressions = []
+    for name, result in report["results"].items():
+        if (before := baseline["results"].get(name)) is None:
+            continue
+        change = result["best_us"] / before["best_us"] - 1
+        mark = ""
+        if change > threshold:
+            mark = "  YAVAŞLADI"
+            regressions.append(name)
+        print(f"  {name:<48} {before['best_us']:>10.2f} {result['best_us']:>10.2f} {change:>+8.1%}{mark}")
+    return regressions
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--filter", default="", help="yalnızca adı bu metni içeren ölçümler")
+    parser.add_argument("--json", action="store_true", help="sonuçları JSON olarak yaz")
+    parser.add_argument("--output", type=Path, help="sonuçları bu dosyaya kaydet")
+    parser.add_argument("--compare", type=Path, help="önceki bir --output dosyasıyla karşılaştır")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="bu orandan fazla yavaşlamada çıkış kodu 1 (varsayılan 0.25)")
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    with tempfile.TemporaryDirectory() as directory:
+        multi_year = make_data(Path(directory))
+        clock = make_clock()
+        benchmarks, tk_calls = clock_benchmarks(clock)
+        benchmarks.update(parse_benchmarks())
+        benchmarks.update(json_benchmarks(multi_year))
+
+        results = {}
+        for name, func in benchmarks.items():
+            if args.filter in name:
+                results[name] = measure(func, args.repeat)
+                if not args.json:
+                    result = results[name]
+                    print(f"{name:<48} {result['best_us']:>10.2f} µs  (medyan {result['median_us']:.2f}, "
+                          f"{result['number']} çağrı x {args.repeat})")
+        Tools.get_writer().flush()  # Geçici dizin silinmeden önce
+    server.shutdown()
+    DiyanetApi.release_client()
+
+    report = {
+        "meta": {"commit": commit(), "python": platform.python_version(), "platform": platform.platform(),
+                 "date": datetime.now().isoformat(timespec="seconds"), "repeat": args.repeat},
+        "results": results,
+        "tk_calls_per_tick": tk_calls,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print("\nTik başına Tk çağrıları:")
+        for name, calls in tk_calls.items():
+            print(f"  {name:<20} {', '.join(f'{call}={count:g}' for call, count in calls.items()) or '-'}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if regressions := compare(report, baseline, args.threshold):
+            print(f"\n{len(regressions)} ölçüm %{args.threshold * 100:.0f} eşiğinden fazla yavaşladı")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,81 @@
+"""Vakit sayfası ayrıştırma karşılaştırması: eski BeautifulSoup yolu ve yeni ayrıştırıcılar
+
+pages/*.html sentetiktir: gerçek ilçe sayfasının tablo düzenini taklit eder (bkz. dosya başındaki not).
+
+Kullanım: python benchmarks/bench_parse.py [--repeat 20]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from main import DiyanetApi  # noqa: E402
+
+PAGES = Path(__file__).parent / "pages"
+
+
+def parse_bs4(html_content):
+    """Önceki sürümdeki DiyanetApi.parse_times gövdesi (karşılaştırma için)"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    table = soup.select_one("#tab-1 .vakit-table tbody")
+    data = {}
+    for row in table.find_all("tr"):
+        cells = [td.text.strip() for td in row.find_all("td")]
+        tarih = cells[0].split()[:3]
+        data[f"{tarih[2]}-{DiyanetApi.month_to_number(tarih[1])}-{tarih[0]}"] = cells[2:]
+    return data
+
+
+def available_parsers():
+    api = DiyanetApi()
+    parsers = {"stream": lambda html: api.parse_times(html, "stream")}
+    try:
+        import lxml  # noqa: F401
+        parsers["lxml"] = lambda html: api.parse_times(html, "lxml")
+    except ImportError:
+        pass
+    try:
+        import bs4  # noqa: F401
+        parsers["bs4 (eski)"] = parse_bs4
+    except ImportError:
+        pass
+    return parsers
+
+
+def measure(func, html_content, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(html_content)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    result = func(html_content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), sorted(timings)[len(timings) // 2], peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    parsers = available_parsers()
+    print(f"{'sayfa':<22} {'ayrıştırıcı':<12} {'en iyi ms':>10} {'medyan ms':>10} {'tepe KB':>10}")
+    for page in sorted(PAGES.glob("*.html")):
+        html_content = page.read_text(encoding="utf-8")
+        reference = None
+        for name, func in parsers.items():
+            best, median, peak, result = measure(func, html_content, args.repeat)
+            reference = reference or result
+            mark = "" if result == reference else "  (FARKLI SONUÇ)"
+            print(f"{page.stem:<22} {name:<12} {best * 1000:>10.2f} {median * 1000:>10.2f} "
+                  f"{peak / 1024:>10.0f}{mark}")
+
+
+if __name__ == "__main__":
+    main()
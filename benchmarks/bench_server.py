@@ -0,0 +1,146 @@
+"""Yerel HTTP servisi yük testi: kalıcı bağlantılı istemci süreçleriyle istek/sn ve gecikme
+
+Sunucu ayrı bir süreçte (seher.py serve) sentetik bir depo ile başlatılır; istemciler de ayrı
+süreçlerdir, böylece ölçüm sunucuyla aynı GIL'i paylaşmaz.
+
+Kullanım: python benchmarks/bench_server.py [--clients 4] [--duration 5] [--districts 200] [--json]
+          python benchmarks/bench_server.py --url http://sunucu:8765  (çalışan bir servise karşı)
+"""
+import argparse
+import http.client
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from main import PrayerStore, Tools  # noqa: E402
+
+FIRST_DISTRICT = 9000
+
+
+def make_data(directory, districts, days=60):
+    """Sentetik ayarlar ve ilçe başına `days` günlük depo oluştur"""
+    settings = json.loads(json.dumps(Tools._default_settings))
+    settings["LOCATION"]["district"]["id"] = str(FIRST_DISTRICT)
+    (directory / "ayarlar.json").write_text(json.dumps(settings), encoding="utf-8")
+    start = date.today() - timedelta(days=1)
+    minutes = (300, 420, 750, 930, 1080, 1170)
+    PrayerStore.write(directory / "vakitler.bin", {
+        FIRST_DISTRICT + i: {start + timedelta(days=d): minutes for d in range(days)}
+        for i in range(districts)
+    })
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("servis başlamadı")
+
+
+def client(host, port, paths, duration, revalidate):
+    """Tek kalıcı bağlantı üzerinden süre dolana kadar istek gönder"""
+    conn = http.client.HTTPConnection(host, port)
+    etags = {}
+    latencies, statuses = [], {}
+    rng = random.Random()
+    deadline = time.perf_counter() + duration
+    while (started := time.perf_counter()) < deadline:
+        path = rng.choice(paths)
+        headers = {"If-None-Match": etags[path]} if revalidate and path in etags else {}
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if etag := response.getheader("ETag"):
+            etags[path] = etag
+    conn.close()
+    return latencies, statuses
+
+
+def run(host, port, name, paths, args, revalidate=False):
+    with ProcessPoolExecutor(args.clients) as pool:
+        results = list(pool.map(client, *zip(*[(host, port, paths, args.duration, revalidate)] * args.clients)))
+    latencies = sorted(lat for lats, _ in results for lat in lats)
+    statuses = {}
+    for _, counts in results:
+        for status, count in counts.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "rps": len(latencies) / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4, help="istemci süreci sayısı")
+    parser.add_argument("--duration", type=float, default=5, help="senaryo başına saniye")
+    parser.add_argument("--districts", type=int, default=200)
+    parser.add_argument("--url", help="çalışan bir servisin adresi (verilmezse yerelde başlatılır)")
+    parser.add_argument("--json", action="store_true", help="sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory() as directory:
+        if args.url:
+            parts = urlsplit(args.url)
+            host, port = parts.hostname, parts.port or 80
+        else:
+            make_data(Path(directory), args.districts)
+            host, port = "127.0.0.1", free_port()
+            server = subprocess.Popen(
+                [sys.executable, str(ROOT / "seher.py"), "--dir", directory, "serve", "--port", str(port)],
+                stdout=subprocess.DEVNULL
+            )
+        try:
+            wait_for(host, port)
+            districts = [FIRST_DISTRICT + i for i in range(args.districts)]
+            scenarios = [
+                run(host, port, "/next (tek ilçe)", ["/next"], args),
+                run(host, port, "/next (ETag 304)", ["/next"], args, revalidate=True),
+                run(host, port, "/next (tüm ilçeler)", [f"/next?district={d}" for d in districts], args),
+                run(host, port, "/today (tüm ilçeler)", [f"/today?district={d}" for d in districts], args),
+            ]
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        return print(json.dumps({"clients": args.clients, "duration": args.duration,
+                                 "scenarios": scenarios}, indent=2, ensure_ascii=False))
+    print(f"{args.clients} istemci, senaryo başına {args.duration:g} sn\n")
+    print(f"{'senaryo':<24} {'istek/sn':>10} {'p50 ms':>8} {'p99 ms':>8}  durumlar")
+    for result in scenarios:
+        print(f"{result['scenario']:<24} {result['rps']:>10.0f} {result['p50_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f}  {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
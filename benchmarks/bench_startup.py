@@ -0,0 +1,99 @@
+"""Açılış süresi ölçümü: main modülünün içe aktarma dökümü ve ertelenen modüllerin maliyeti
+
+Kullanım: python benchmarks/bench_startup.py [--repeat 5] [--top 15] [--json]
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Saat yolunda yüklenmemesi gereken, ilk kullanımda içe aktarılan modüller
+DEFERRED = ["tkinter", "requests", "ttkbootstrap"]
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(code):
+    """-X importtime çıktısını {modül: (toplam µs, üst modül)} olarak döndür"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    children = []  # Üst modülünden önce yazdırılan (derinlik, ad) satırları
+    for line in result.stderr.splitlines():
+        if not (match := LINE.match(line)):
+            continue
+        _, total, indent, name = match.groups()
+        depth = len(indent) // 2
+        # Çocuklar üst modülden önce yazdırılır; bu satır, daha derindeki bekleyenlerin üstüdür
+        while children and children[-1][0] > depth:
+            modules[children.pop()[1]][1] = name
+        modules[name] = [int(total), None]
+        children.append((depth, name))
+    return modules
+
+
+def wall_time(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    runs = [import_times("import main") for _ in range(args.repeat)]
+    main_total = statistics.median(run["main"][0] for run in runs)
+    # main'in doğrudan içe aktardığı modüller
+    direct = {}
+    for name, (_, parent) in runs[0].items():
+        if parent == "main" and all(name in run for run in runs):
+            direct[name] = statistics.median(run[name][0] for run in runs)
+    loaded = [name for name in DEFERRED if name in runs[0]]
+
+    deferred = {}
+    for name in DEFERRED:
+        try:
+            deferred[name] = import_times(f"import main, {name}").get(name, (0, None))[0]
+        except subprocess.CalledProcessError:
+            deferred[name] = None  # kurulu değil
+
+    report = {
+        "main_import_ms": main_total / 1000,
+        "interpreter_ms": wall_time("pass", args.repeat) * 1000,
+        "import_main_wall_ms": wall_time("import main", args.repeat) * 1000,
+        "breakdown_ms": {name: us / 1000 for name, us in
+                         sorted(direct.items(), key=lambda item: -item[1])[:args.top]},
+        "deferred_ms": {name: (us / 1000 if us is not None else None) for name, us in deferred.items()},
+        "deferred_loaded_at_startup": loaded,
+    }
+    if args.json:
+        return print(json.dumps(report, indent=2))
+
+    print(f"Yorumlayıcı açılışı     : {report['interpreter_ms']:8.1f} ms")
+    print(f"import main (duvar)     : {report['import_main_wall_ms']:8.1f} ms")
+    print(f"import main (toplam)    : {report['main_import_ms']:8.1f} ms\n")
+    print("main'in içe aktardıkları:")
+    for name, ms in report["breakdown_ms"].items():
+        print(f"  {name:<28} {ms:8.2f} ms")
+    print("\nİlk kullanıma ertelenenler:")
+    for name, ms in report["deferred_ms"].items():
+        print(f"  {name:<28} {'kurulu değil' if ms is None else f'{ms:8.2f} ms'}")
+    if loaded:
+        print(f"\nUYARI: açılışta yüklenmemesi gereken modüller yüklendi: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,486 @@
+import atexit
+import copy
+import gc
+import hashlib
+import heapq
+import importlib
 import json
-import requests
+import math
+import mmap
+import os
+import queue
+import random
+import re
+import struct
+import sys
+import threading
+import time
 import logging as logger
-from bs4 import BeautifulSoup
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from datetime import datetime, timedelta
-import tkinter as tk
-import ttkbootstrap as ttk
-from ttkbootstrap.constants import *
-from ttkbootstrap.dialogs import Querybox
-from ttkbootstrap.dialogs.dialogs import FontDialog
-from ttkbootstrap.dialogs.colorchooser import ColorChooserDialog
-from ttkbootstrap.icons import Emoji
+from datetime import date, datetime, timedelta, timezone
+
+
+class LazyModule:
+    """Modülü ilk öznitelik erişiminde içe aktarır; açılışta yalnızca saat için gerekenler yüklenir"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            started = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            logger.debug("%s modülü yüklendi (%.1f ms)", self._name, (time.perf_counter() - started) * 1000)
+        return getattr(self._module, attr)
+
+
+tk = LazyModule("tkinter")
+tkfont = LazyModule("tkinter.font")
+ttk = LazyModule("ttkbootstrap")            # Yalnızca ayarlar penceresi açılınca
+requests = LazyModule("requests")           # Yalnızca ilk ağ isteğinde
+np = LazyModule("numpy")                    # Yalnızca vakitler hesaplanırken (isteğe bağlı bağımlılık)
+
+# ttkbootstrap.constants yerine; modülü açılışta yüklememek için
+BOTH, X, LEFT, RIGHT, YES = "both", "x", "left", "right", True
+
+class RollingHistogram:
+    """Son `window` ölçümün kovalı histogramı; kayıt O(1), yüzdelikler yalnızca okunurken hesaplanır"""
+
+    def __init__(self, bounds, window):
+        self.bounds = bounds                     # artan kova üst sınırları, son kova sınırsız
+        self.window = window
+        self.counts = [0] * (len(bounds) + 1)   # pencere içindeki ölçümler
+        self.values = array("d")                 # halka tampon, pencere dolana kadar büyür
+        self.total = 0                           # pencereden düşenler dahil tüm ölçümler
+        self._next = 0
+
+    def record(self, value):
+        values = self.values
+        if len(values) < self.window:
+            values.append(value)
+        else:  # En eski ölçüm pencereden düşer
+            self.counts[bisect_left(self.bounds, values[self._next])] -= 1
+            values[self._next] = value
+            self._next = (self._next + 1) % self.window
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += 1
+
+    def summary(self):
+        ordered = sorted(self.values)
+        if not ordered:
+            return {"count": self.total, "window": 0}
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+        return {
+            "count": self.total, "window": len(ordered), "mean": sum(ordered) / len(ordered),
+            "p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99), "max": ordered[-1],
+            # [üst sınır (None: sınırsız), ölçüm sayısı], boş kovalar yazılmaz
+            "buckets": [[bound, count] for bound, count in zip([*self.bounds, None], self.counts) if count],
+        }
+
+
+class Diagnostics:
+    """Zamanlayıcı, ağ ve ayrıştırma ölçümlerinin kayan histogramları; üretimde açık kalacak kadar ucuzdur"""
+    MS_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    BYTE_BOUNDS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+    COUNT_BOUNDS = (1, 2, 4, 8, 16, 32, 64)
+    WINDOW = 3600      # ölçüm; saniyelik tikte son bir saat
+    RECENT_CALLS = 50  # son HTTP isteklerinin dökümü
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()  # HTTP ölçümleri arka plan iş parçacıklarından gelir
+        self.histograms = {}  # {ad: RollingHistogram}
+        self.counters = {}
+        self.gauges = {}      # {ad: değer döndüren fonksiyon}, yalnızca okunurken çağrılır
+        self.http_calls = deque(maxlen=self.RECENT_CALLS)
+
+    def record(self, name, value, bounds=MS_BOUNDS):
+        with self._lock:
+            self._record(name, value, bounds)
+
+    def record_many(self, records):
+        """(ad, değer, sınırlar) kayıtlarını tek kilit altında yaz (zamanlayıcının her tetiklenmesi için)"""
+        with self._lock:
+            for name, value, bounds in records:
+                self._record(name, value, bounds)
+
+    def _record(self, name, value, bounds):
+        if (histogram := self.histograms.get(name)) is None:
+            histogram = self.histograms[name] = RollingHistogram(bounds, self.WINDOW)
+        histogram.record(value)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, func):
+        self.gauges[name] = func
+
+    def record_http(self, url, status, latency, size):
+        """DiyanetApi isteğinin (her deneme ayrı) süresi, boyutu ve durum kodu"""
+        self.record("http.latency_ms", latency * 1000)
+        if size:
+            self.record("http.bytes", size, self.BYTE_BOUNDS)
+        self.count(f"http.status.{status or 'bağlantı hatası'}")
+        self.http_calls.append({"time": datetime.now().isoformat(timespec="seconds"), "url": url,
+                                "status": status, "ms": round(latency * 1000, 1), "bytes": size})
+
+    def reset(self):
+        with self._lock:
+            self.histograms, self.counters = {}, {}
+            self.http_calls.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """Tüm ölçümleri JSON'a yazılabilir bir sözlük olarak döndür"""
+        gauges = {}
+        for name, func in self.gauges.items():
+            try:
+                gauges[name] = func()
+            except Exception as e:  # Kapanmakta olan pencere vb.; tanılama uygulamayı durdurmamalı
+                logger.debug("%s göstergesi okunamadı: %s", name, e)
+        with self._lock:
+            histograms = {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+            counters = dict(sorted(self.counters.items()))
+        return {
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "uptime_s": int(time.time() - self.started),
+            "histograms": histograms, "counters": counters, "gauges": gauges,
+            "http_calls": list(self.http_calls),
+        }
+
+    def export(self, path):
+        Tools.save_json(path, self.snapshot())
+        return path
+
+
+class Profiler:
+    """Süreli cProfile ve tracemalloc yakalaması; kullanıcının makinesinde yüksek işlemci/bellek kanıtı toplar
+
+    Raporlar app.log'un yanına yazılır: profil-ZAMAN.prof (pstats, snakeviz) ve profil-ZAMAN.txt
+    (en çok zaman alan fonksiyonlar, en çok bellek ayıran satırlar ve yakalama süresince büyüyenler).
+    cProfile yalnızca başlatıldığı iş parçacığını (Tk) ölçer; ağ işleri bellek raporunda görünür.
+    """
+    MINUTES = 5
+    FRAMES = 5   # tracemalloc yığın derinliği
+    TOP = 25     # raporda listelenen satır sayısı
+
+    def __init__(self):
+        self.profile = None
+        self.started = None
+        self.deadline = None
+        self.scheduler = None
+        self._baseline = None  # Isınma sonrası bellek anlık görüntüsü
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self, minutes=MINUTES, scheduler=None):
+        import cProfile
+        import tracemalloc
+        if self.active:
+            return
+        self.started = time.time()
+        self.deadline = self.started + minutes * 60
+        self._baseline = None
+        tracemalloc.start(self.FRAMES)
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        self.attach(scheduler)
+        logger.info("Profil kaydı başladı (%g dk)", minutes)
+
+    def attach(self, scheduler):
+        """Durdurma ve büyüme karşılaştırmasının temelini zamanlayıcıya kur (süre dolmadan çıkılırsa stop çağrılmalı)"""
+        if not self.active or scheduler is None:
+            return
+        self.scheduler = scheduler
+        remaining = max(0, self.deadline - time.time())
+        # Açılış ayırmaları büyüme sayılmasın; temel, sürenin yarısında (en geç 1 dk sonra) alınır
+        scheduler.schedule("profiler_baseline", min(60, remaining / 2) * 1000, self._take_baseline)
+        scheduler.schedule("profiler", remaining * 1000, self.stop)
+
+    def _take_baseline(self):
+        import tracemalloc
+        if self.active:
+            self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self):
+        """Yakalamayı bitir, raporları yaz; yazılan (.prof, .txt) yollarını döndür"""
+        import tracemalloc
+        if not self.active:
+            return None
+        self.profile.disable()
+        profile, self.profile = self.profile, None
+        if self.scheduler is not None:
+            self.scheduler.cancel("profiler")
+            self.scheduler.cancel("profiler_baseline")
+            self.scheduler = None
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        ignored = (tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                   tracemalloc.Filter(False, "<unknown>"))
+        snapshot = snapshot.filter_traces(ignored)
+        import io  # Bellek görüntüsü alındıktan sonra; rapor modülleri büyüme sayılmasın
+        import pstats
+
+        base = Tools.LOG_FILE.with_name(f"profil-{datetime.fromtimestamp(self.started):%Y%m%d-%H%M%S}")
+        prof_path, report_path = base.with_suffix(".prof"), base.with_suffix(".txt")
+        profile.dump_stats(prof_path)
+
+        cpu = io.StringIO()
+        pstats.Stats(profile, stream=cpu).sort_stats("cumulative").print_stats(self.TOP)
+        lines = [f"Süre: {time.time() - self.started:.0f} sn, RSS: {Tools.memory_usage() / 1048576:.1f} MB, "
+                 f"izlenen bellek: {current / 1048576:.1f} MB (tepe {peak / 1048576:.1f} MB)",
+                 "", f"== En çok bellek ayıran {self.TOP} satır =="]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:self.TOP]]
+        if self._baseline is not None:
+            lines += ["", f"== Yakalama süresince en çok büyüyen {self.TOP} satır =="]
+            growth = snapshot.compare_to(self._baseline.filter_traces(ignored), "lineno")
+            lines += [str(stat) for stat in growth[:self.TOP] if stat.size_diff > 0]
+        lines += ["", "== İşlemci (kümülatif süreye göre) ==", cpu.getvalue()]
+        report_path.write_text("\n".join(lines), encoding="utf-8")
+        self._baseline = None
+        logger.info("Profil kaydı yazıldı: %s, %s", prof_path.name, report_path.name)
+        return prof_path, report_path
+
+
+class HttpClient:
+    """Bağlantı havuzlu, zaman aşımlı ve sınırlı yeniden denemeli HTTP istemcisi"""
+    CONNECT_TIMEOUT = 5   # saniye
+    READ_TIMEOUT = 20     # saniye
+    RETRIES = 2           # ilk denemeye ek olarak
+    BACKOFF = 0.5         # saniye, her denemede iki katına çıkar
+    HEADERS = {"Accept-Encoding": "gzip, deflate", "User-Agent": "Seher"}
+
+    def __init__(self, pool_size=4, limiter=None):
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self.limiter = limiter  # RateLimiter; yeniden denemeler dahil her denemeden önce beklenir
+        self.stats = {"requests": 0, "failures": 0, "retries": 0, "bytes": 0,
+                      "latency_total": 0.0, "latency_last": 0.0}
+
+    def get(self, url, params=None):
+        """GET isteği yap; geçici hatalarda rastgele gecikmeli geri çekilmeyle yeniden dene"""
+        for attempt in range(self.RETRIES + 1):
+            if self.limiter is not None:
+                self.limiter.wait()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(
+                    url, params=params, timeout=(self.CONNECT_TIMEOUT, self.READ_TIMEOUT)
+                )
+                response.raise_for_status()
+                self._record(url, response.status_code, time.perf_counter() - started, len(response.content))
+                return response
+            except requests.RequestException as e:
+                status = getattr(e.response, "status_code", None)
+                self._record(url, status, time.perf_counter() - started, 0, failed=True)
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == self.RETRIES:
+                    raise
+                delay = self.BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+                logger.warning("İstek başarısız (%s), %.1f sn sonra yeniden denenecek", e, delay)
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(delay)
+
+    def _record(self, url, status, latency, size, failed=False):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["failures"] += failed
+            self.stats["bytes"] += size
+            self.stats["latency_total"] += latency
+            self.stats["latency_last"] = latency
+        Tools.get_diagnostics().record_http(url, status, latency, size)
+
+
+class RateLimiter:
+    """İstek başlangıçlarını tüm iş parçacıkları için toplamda saniyede en fazla `rate` ile sınırlar"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Sıradaki boş zaman dilimini ayır ve ona kadar bekle"""
+        with self._lock:
+            now = time.monotonic()
+            at = max(self._next, now)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+class VakitTableParser(HTMLParser):
+    """Yalnızca #tab-1 .vakit-table tbody satırlarını okuyan akışlı ayrıştırıcı"""
+    CHUNK_SIZE = 16384
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []        # [[hücre, ...], ...]
+        self.done = False
+        self._tab_tag = None  # #tab-1 elemanının etiketi
+        self._tab_depth = 0   # #tab-1 içinde aynı etiketten açık olanların sayısı
+        self._stage = None    # None -> "table" -> "tbody"
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self._tab_tag is None:
+            if dict(attrs).get("id") == "tab-1":
+                self._tab_tag, self._tab_depth = tag, 1
+            return
+        if tag == self._tab_tag:
+            self._tab_depth += 1
+        if self._stage is None:
+            if tag == "table" and "vakit-table" in (dict(attrs).get("class") or "").split():
+                self._stage = "table"
+        elif self._stage == "table":
+            if tag == "tbody":
+                self._stage = "tbody"
+        elif tag == "tr":
+            self._row = []
+        elif tag == "td" and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or self._tab_tag is None:
+            return
+        if self._stage == "tbody":
+            if tag == "td" and self._cell is not None:
+                self._row.append(" ".join("".join(self._cell).split()))
+                self._cell = None
+            elif tag == "tr" and self._row is not None:
+                self.rows.append(self._row)
+                self._row = None
+            elif tag in ("tbody", "table"):
+                self.done = True
+        if tag == self._tab_tag:
+            self._tab_depth -= 1
+            if self._tab_depth == 0:  # #tab-1 bitti, tablo yoksa da dur
+                self.done = True
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def parse(self, html_content):
+        """Sayfayı parça parça besle, tablo bitince kalanını okumadan dur"""
+        # #tab-1 öncesindeki <head>, betikler ve menüler tamamen atlanır
+        match = re.search(r"<[^<>]*\sid\s*=\s*[\"']?tab-1[\"'\s>]", html_content)
+        for start in range(match.start() if match else 0, len(html_content), self.CHUNK_SIZE):
+            self.feed(html_content[start:start + self.CHUNK_SIZE])
+            if self.done:
+                break
+        return self.rows
+
 
 class DiyanetApi:
     BASE_URL = "https://namazvakitleri.diyanet.gov.tr/tr-TR/"
+    POOL_SIZE = 4  # paylaşılan istemcinin bağlantı havuzu
+    _client = None
+    _client_lock = threading.Lock()
+
+    @classmethod
+    def client(cls):
+        """Tüm DiyanetApi örneklerinin paylaştığı HTTP istemcisi"""
+        with cls._client_lock:
+            if cls._client is None:
+                cls._client = HttpClient(cls.POOL_SIZE)
+            return cls._client
+
+    @classmethod
+    def release_client(cls):
+        """Paylaşılan oturumu kapat (yalın kipte boştayken)"""
+        with cls._client_lock:
+            if cls._client is not None:
+                cls._client.session.close()
+                cls._client = None
 
     def _make_request(self, url, params=None):
         try:
-            logger.info(f"API isteği yapılıyor: {url}")
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response
+            logger.info("API isteği yapılıyor: %s", url)
+            return self.client().get(url, params=params)
         except requests.RequestException as e:
-            logger.error(f"API isteği başarısız oldu: {e}")
-        except json.JSONDecodeError:
-            logger.error("API yanıtı geçerli bir JSON değil.")
+            logger.error("API isteği başarısız oldu: %s", e)
 
     def get_districts(self, city_id):
         url = f"{self.BASE_URL}home/GetRegList"
         params = {'ChangeType': 'state', 'CountryId': '2', 'Culture': 'tr-TR', 'StateId': city_id}
-        districts = self._make_request(url, params).json().get('StateRegionList', [])
+        if (response := self._make_request(url, params)) is None:
+            return {}
+        try:
+            districts = response.json().get('StateRegionList', [])
+        except ValueError:
+            logger.error("API yanıtı geçerli bir JSON değil.")
+            return {}
         return {d.get("IlceAdi"): d.get("IlceID") for d in districts}
 
     def fetch_prayer_times(self, district_id):
         url = f"{self.BASE_URL}{district_id}"
-        response = self._make_request(url)
+        if (response := self._make_request(url)) is None:
+            return None
         return self.parse_times(response.text)
 
-    def parse_times(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        logger.info(f"Soup: {soup.title.string}")
-        table = soup.select_one("#tab-1 .vakit-table tbody")
+    PARSER_BACKEND = "stream"  # "stream" veya "lxml" (isteğe bağlı bağımlılık)
+
+    def parse_times(self, html_content, backend=None):
+        backend = backend or self.PARSER_BACKEND
+        started = time.perf_counter()
+        rows = self._lxml_rows(html_content) if backend == "lxml" else None
+        if rows is None:
+            backend = "stream"
+            rows = VakitTableParser().parse(html_content)
+        Tools.get_diagnostics().record(f"parse.{backend}_ms", (time.perf_counter() - started) * 1000)
 
-        if not table:
+        if not rows:
             logger.error("Vakit tablosu bulunamadı")
             return None
 
         data = {}
-        for row in table.find_all("tr"):
-            cells = [td.text.strip() for td in row.find_all("td")]
+        for cells in rows:
             tarih = cells[0].split()[:3]
             tarih_iso = f"{tarih[2]}-{self.month_to_number(tarih[1])}-{tarih[0]}"
             vakitler = cells[2:]
             data[tarih_iso] = vakitler
         return data
 
+    @staticmethod
+    def _lxml_rows(html_content):
+        """lxml kuruluysa tabloyu C ayrıştırıcıyla oku, değilse None döndür"""
+        try:
+            from lxml import html as lxml_html
+        except ImportError:
+            logger.warning("lxml bulunamadı, akışlı ayrıştırıcı kullanılıyor")
+            return None
+        tree = lxml_html.fromstring(html_content)
+        body = tree.xpath(
+            "//*[@id='tab-1']//table[contains(concat(' ', normalize-space(@class), ' '), ' vakit-table ')]/tbody"
+        )
+        if not body:
+            return []
+        return [[" ".join(td.text_content().split()) for td in tr.xpath("./td")]
+                for tr in body[0].xpath("./tr")]
+
     @staticmethod
     def month_to_number(month_name):
         months = {
@@ -65,17 +491,1042 @@ class DiyanetApi:
         return months.get(month_name, None)
 
 
-class ClockWidget:
+class DistrictCache:
+    """GetRegList sonuçlarını il kimliğine göre diskte, süre sınırıyla (TTL) saklar"""
+    TTL = 30 * 24 * 3600  # saniye
+
+    def __init__(self, path, api=None):
+        self.path = path
+        self.api = api or DiyanetApi()
+        self._entries = None  # {il_id: {"fetched": epoch, "districts": {ad: id}}}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = (Tools.load_json(self.path) or {}) if self.path.exists() else {}
+        return self._entries
+
+    def get(self, city_id):
+        """(ilçeler veya None, taze mi) döndür; ağ isteği yapmaz"""
+        with self._lock:
+            entry = self._load().get(str(city_id))
+        if not entry:
+            return None, False
+        return entry["districts"], time.time() - entry["fetched"] < self.TTL
+
+    def fetch(self, city_id):
+        """İlçeleri sunucudan al ve önbelleğe yaz; arka plan iş parçacığında çalışabilir"""
+        if districts := self.api.get_districts(city_id):
+            with self._lock:
+                self._load()[str(city_id)] = {"fetched": int(time.time()), "districts": districts}
+                Tools.save_json(self.path, self._entries)
+        return districts
+
+    def city_of(self, district_id):
+        """Önbellekteki listelerden ilçenin bağlı olduğu il kimliğini bul, yoksa None"""
+        with self._lock:
+            entries = list(self._load().items())  # fetch başka iş parçacığında sözlüğü değiştirebilir
+        return next((city_id for city_id, entry in entries
+                     if str(district_id) in map(str, entry["districts"].values())), None)
+
+    def prefetch(self, city_ids=None):
+        """Eksik veya süresi dolmuş illeri (varsayılan: tüm iller) önceden indir"""
+        fetched = 0
+        for city_id in city_ids or [c['id'] for c in Tools.get_cities()]:
+            districts, fresh = self.get(city_id)
+            if not fresh and self.fetch(city_id):
+                fetched += 1
+        logger.info("İlçe önbelleği: %s il güncellendi", fetched)
+        return fetched
+
+
+class WriteBehind:
+    """JSON yazımlarını sessiz bir süre boyunca biriktirip arka planda tek seferde yazar"""
+    QUIET_PERIOD = 1.5  # saniye
+
+    def __init__(self, quiet_period=None):
+        self.quiet_period = self.QUIET_PERIOD if quiet_period is None else quiet_period
+        self._pending = {}  # {dosya yolu: (veri kopyası, yazılacağı an)}
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # Aynı anda tek yazım
+        self._thread = None
+
+    def write(self, path, data):
+        """Verinin o anki kopyasını kuyruğa al; aynı dosyaya gelen yeni istek öncekinin yerini alır"""
+        snapshot = copy.deepcopy(data)
+        with self._cond:
+            self._pending[path] = (snapshot, time.monotonic() + self.quiet_period)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="seher-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+            self._cond.notify()
+
+    def flush(self):
+        """Bekleyen tüm yazımları çağıran iş parçacığında hemen yap (çıkışta)"""
+        with self._io_lock:
+            with self._cond:
+                pending, self._pending = self._pending, {}
+            for path, (data, _) in pending.items():
+                self._save(path, data)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                wait = min(at for _, at in self._pending.values()) - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            # Kuyruktan alma ve yazma aynı kilit altında; flush eski veriyi yeniyle ezemez
+            with self._io_lock:
+                with self._cond:
+                    now = time.monotonic()
+                    due = [path for path, (_, at) in self._pending.items() if at <= now]
+                    ready = {path: self._pending.pop(path)[0] for path in due}
+                for path, data in ready.items():
+                    self._save(path, data)
+
+    @staticmethod
+    def _save(path, data):
+        try:
+            Tools.save_json(path, data)
+        except OSError as e:
+            logger.error("%s dosyası yazılamadı: %s", path, e)
+
+
+class PrayerStore:
+    """Çok ilçeli, çok yıllı ikili vakit deposu; mmap ile yalnızca gereken sayfalar okunur
+
+    Dosya düzeni (little-endian):
+        başlık   : "SEHR", sürüm (uint16), kayıt genişliği (uint16), ilçe sayısı (uint32)
+        dizin    : ilçe başına ilçe id, ilk gün (date.toordinal), gün sayısı, kayıt ofseti (4 x uint32)
+        kayıtlar : gün başına 6 x uint16 gece yarısından itibaren dakika (eksik gün: 0xFFFF)
+    """
+    MAGIC = b"SEHR"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHI")
+    ENTRY = struct.Struct("<IIII")
+    RECORD = struct.Struct("<6H")
+    MISSING = 0xFFFF
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._mmap = None
+        self._directory = {}  # {ilçe id: (ilk gün, gün sayısı, ofset)}
+        self._lock = threading.Lock()  # Hazırlık ve yerine koyma sırayla yapılır
+        self._staged = None   # Hazırlanmış ama henüz yerine konmamış dosya
+        self._staged_districts = set()  # Hazırlanan dosyada güncellenen ilçeler (zincirlenen hazırlıklar dahil)
+        self.open()
+
+    def open(self):
+        """Dosyayı (yeniden) eşle; dosya yoksa depo boş kabul edilir"""
+        self.close()
+        self._mmap, self._directory = self._map(self.path)
+        if self._mmap is not None:
+            logger.info("%s deposu açıldı: %s ilçe", self.path.name, len(self._directory))
+
+    @classmethod
+    def _map(cls, path):
+        """(eşlem, dizin) döndür; dosya yoksa veya tanınmıyorsa (None, {})"""
+        if not path.exists() or path.stat().st_size < cls.HEADER.size:
+            return None, {}
+        with open(path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, width, count = cls.HEADER.unpack_from(mapped, 0)
+        if magic != cls.MAGIC or version != cls.VERSION or width != cls.RECORD.size:
+            logger.error("%s tanınmayan depo biçimi, yok sayılıyor.", path.name)
+            mapped.close()
+            return None, {}
+        directory = {}
+        for i in range(count):
+            district_id, first, days, offset = cls.ENTRY.unpack_from(mapped, cls.HEADER.size + i * cls.ENTRY.size)
+            directory[district_id] = (first, days, offset)
+        return mapped, directory
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = None
+        self._directory = {}
+
+    def districts(self):
+        return sorted(self._directory)
+
+    def coverage(self, district_id):
+        """(ilk gün, son gün) veya ilçe yoksa None"""
+        if (entry := self._directory.get(int(district_id))) is None:
+            return None
+        first, days, _ = entry
+        return date.fromordinal(first), date.fromordinal(first + days - 1)
+
+    def get_day(self, district_id, day: date):
+        """Bir günün 6 vaktini dakika olarak döndür, yoksa None"""
+        if (entry := self._directory.get(int(district_id))) is None:
+            return None
+        first, days, offset = entry
+        if not 0 <= (i := day.toordinal() - first) < days:
+            return None
+        minutes = self.RECORD.unpack_from(self._mmap, offset + i * self.RECORD.size)
+        return None if minutes[0] == self.MISSING else minutes
+
+    def iter_days(self, district_id, start: date = None, end: date = None):
+        """(gün, dakikalar) çiftlerini sırayla üret; eksik günler atlanır"""
+        if (entry := self._directory.get(int(district_id))) is None:
+            return
+        first, days, _ = entry
+        lo = max(0, start.toordinal() - first) if start else 0
+        hi = min(days, end.toordinal() - first + 1) if end else days
+        yield from self._read_days(self._mmap, entry, lo, hi)
+
+    @classmethod
+    def _read_days(cls, mapped, entry, lo=0, hi=None):
+        first, days, offset = entry
+        for i in range(lo, days if hi is None else hi):
+            minutes = cls.RECORD.unpack_from(mapped, offset + i * cls.RECORD.size)
+            if minutes[0] != cls.MISSING:
+                yield date.fromordinal(first + i), minutes
+
+    def get_times(self, district_id, start: date = None, end: date = None):
+        """vakitler.json biçiminde {"YYYY-MM-DD": ["HH:MM", ...]} döndür"""
+        return {day.isoformat(): [Tools.to_clock(m) for m in minutes]
+                for day, minutes in self.iter_days(district_id, start, end)}
+
+    def update(self, district_times):
+        """{ilçe id: vakitler.json biçimi} verisini mevcut kayıtlarla birleştirip dosyayı yeniden yaz"""
+        with self._lock:
+            self._swap(self._stage(district_times))
+
+    def stage(self, district_times):
+        """Güncellenmiş depoyu geçici dosyaya yaz ve yolunu döndür; eşlem değişmez, arka planda çalışabilir"""
+        with self._lock:
+            return self._stage(district_times)
+
+    def swap(self, staged_path):
+        """stage ile hazırlanan dosyayı yerine koyup yeniden eşle (yalnızca yeniden adlandırma ve eşleme)
+
+        Yerine konan dosyada güncellenmiş ilçelerin kümesini döndürür; bu dosyanın kapsadığı önceki
+        hazırlıkların ilçeleri de buna dahildir. Daha yeni bir hazırlık bu dosyayı kapsıyorsa veya şu an
+        sürüyorsa bir şey yapmaz ve boş küme döner; değişiklik o hazırlığın swap sonucunda bildirilir.
+        """
+        if not self._lock.acquire(blocking=False):
+            return set()
+        try:
+            if staged_path != self._staged:
+                return set()
+            return self._swap(staged_path)
+        finally:
+            self._lock.release()
+
+    def _stage(self, district_times):
+        # Yalnızca güncellenen ilçeler çözülür; diğerlerinin kayıt blokları eski dosyadan bayt bayt kopyalanır
+        updates = {int(district_id): {date.fromisoformat(day): tuple(map(Tools.to_minutes, clock))
+                                      for day, clock in times.items()}
+                   for district_id, times in district_times.items()}
+        # Yerine konmamış bir hazırlık varsa en güncel veri odur, yeni hazırlık onun üzerine kurulur
+        source, directory = self._map(self._staged) if self._staged else (self._mmap, self._directory)
+        districts = set(updates) | (self._staged_districts if self._staged else set())
+        # İki geçici ad dönüşümlü kullanılır: okunan hazırlık, yazılanla aynı dosya olamaz
+        staged_path, other = (self.path.with_name(f"{self.path.name}.{i}.tmp") for i in (0, 1))
+        if staged_path == self._staged:
+            staged_path = other
+        try:
+            blocks = []
+            for district_id in sorted(directory.keys() | updates.keys()):
+                entry = directory.get(district_id)
+                if district_id in updates:
+                    days = dict(self._read_days(source, entry)) if entry else {}
+                    days.update(updates[district_id])
+                    if days:
+                        blocks.append((district_id, *self._pack_days(days)))
+                else:
+                    first, count, offset = entry
+                    blocks.append((district_id, first, count, offset))
+            self._write_blocks(staged_path, blocks, source)
+        finally:
+            if source is not self._mmap:
+                source.close()
+        if self._staged:
+            os.remove(self._staged)  # Yeni hazırlık öncekini kapsıyor
+        self._staged, self._staged_districts = staged_path, districts
+        return staged_path
+
+    def _swap(self, staged_path):
+        self.close()  # Windows eşlenmiş dosyanın üzerine yazmaya izin vermez
+        try:
+            os.replace(staged_path, self.path)
+            landed, self._staged, self._staged_districts = self._staged_districts, None, set()
+        finally:
+            self.open()
+        return landed
+
+    def import_json(self, district_id, json_path=None):
+        """vakitler.json biçimindeki dosyayı depoya aktar"""
+        _, times = Tools.load_prayer_times(json_path)
+        self.update({district_id: times})
+        return len(times)
+
+    def export_json(self, district_id, json_path=None):
+        """Bir ilçenin kayıtlarını vakitler.json biçiminde dışa aktar"""
+        times = self.get_times(district_id)
+        Tools.save_json(Path(json_path or Tools.PRAYER_TIMES), {"district": str(district_id), **times})
+        return len(times)
+
+    @classmethod
+    def write(cls, path, districts):
+        """{ilçe id: {date: (6 dakika)}} verisini geçici dosya üzerinden atomik olarak yaz"""
+        path = Path(path)
+        blocks = [(district_id, *cls._pack_days(days)) for district_id, days in sorted(districts.items()) if days]
+        temp_path = path.with_name(path.name + ".tmp")
+        cls._write_blocks(temp_path, blocks)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def _pack_days(cls, days):
+        """{date: (6 dakika)} verisini (ilk gün, gün sayısı, kayıt baytları) olarak döndür; aradaki günler eksik"""
+        first, last = min(days).toordinal(), max(days).toordinal()
+        missing = cls.RECORD.pack(*[cls.MISSING] * 6)
+        records = []
+        for ordinal in range(first, last + 1):
+            minutes = days.get(date.fromordinal(ordinal))
+            records.append(cls.RECORD.pack(*minutes) if minutes else missing)
+        return first, last - first + 1, b"".join(records)
+
+    @classmethod
+    def _write_blocks(cls, path, blocks, source=None):
+        """(ilçe id, ilk gün, gün sayısı, kayıt baytları veya source eşlemindeki ofset) bloklarını yaz"""
+        with open(path, 'wb') as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, cls.RECORD.size, len(blocks)))
+            offset = cls.HEADER.size + len(blocks) * cls.ENTRY.size
+            for district_id, first, count, _ in blocks:
+                file.write(cls.ENTRY.pack(district_id, first, count, offset))
+                offset += count * cls.RECORD.size
+            for _, _, count, data in blocks:
+                if isinstance(data, int):
+                    data = source[data:data + count * cls.RECORD.size]
+                file.write(data)
+
+
+class PrayerIndex:
+    """Tüm günlerin vakitlerini sıralı epoch dizisinde tutar, sorguları bisect ile yapar"""
+
+    def __init__(self, prayer_times=None):
+        entries = []
+        for day, times in (prayer_times or {}).items(): # {"2021-08-01": ["05:00", "13:00", ...]}
+            try:
+                entries.extend(self._day_entries(date.fromisoformat(day), map(Tools.to_minutes, times)))
+            except (ValueError, AttributeError, TypeError):
+                logger.error("Geçersiz vakit kaydı atlandı: %s %s", day, times)
+        self._build(entries)
+
+    @classmethod
+    def from_store(cls, store, district_id):
+        """İkili depodaki bir ilçenin günlerinden, metne çevirmeden indeks derle"""
+        return cls.from_days(store.iter_days(district_id))
+
+    @classmethod
+    def from_days(cls, days):
+        """(gün, 6 dakika) çiftlerinden indeks derle"""
+        index = cls.__new__(cls)
+        entries = []
+        for day, minutes in days:
+            entries.extend(cls._day_entries(day, minutes))
+        index._build(entries)
+        return index
+
+    @staticmethod
+    def _day_entries(day, minutes):
+        midnight = datetime(day.year, day.month, day.day)
+        for slot, minute in enumerate(minutes):
+            yield int((midnight + timedelta(minutes=minute)).timestamp()), slot
+
+    def _build(self, entries):
+        entries.sort()
+        self.timestamps = array('q', (stamp for stamp, _ in entries))
+        self.slots = array('b', (slot for _, slot in entries))
+        self.fetched_last = self.last  # İndirilen verinin sonu; hesaplanan günler sayılmaz
+
+    def extend(self, days):
+        """(gün, 6 dakika) çiftlerini ekle; yenileme kapsamı indirilen veriye göre hesaplanmaya devam eder"""
+        fetched_last = self.fetched_last
+        entries = list(zip(self.timestamps, self.slots))
+        for day, minutes in days:
+            entries.extend(self._day_entries(day, minutes))
+        self._build(entries)
+        self.fetched_last = fetched_last
+
+    def is_calculated(self, timestamp):
+        """Vakit indirilen verinin sonundan sonraysa hesaplanan günlerdendir"""
+        return self.fetched_last is None or timestamp > self.fetched_last
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def first(self):
+        return self.timestamps[0] if self.timestamps else None
+
+    @property
+    def last(self):
+        return self.timestamps[-1] if self.timestamps else None
+
+    def next_after(self, timestamp):
+        """timestamp'ten sonraki ilk vaktin epoch değerini döndür"""
+        i = bisect_right(self.timestamps, timestamp)
+        return self.timestamps[i] if i < len(self.timestamps) else None
+
+    def previous_before(self, timestamp):
+        """timestamp anında veya öncesindeki son vaktin epoch değerini döndür"""
+        i = bisect_right(self.timestamps, timestamp)
+        return self.timestamps[i - 1] if i > 0 else None
+
+    def next_entry(self, timestamp):
+        """timestamp'ten sonraki ilk vakti (epoch, vakit sırası) olarak döndür, yoksa None"""
+        i = bisect_right(self.timestamps, timestamp)
+        return (self.timestamps[i], self.slots[i]) if i < len(self.timestamps) else None
+
+    def next_prayer_time(self, now: datetime):
+        """Bir sonraki vakti datetime olarak döndür, veri bittiyse None"""
+        stamp = self.next_after(now.timestamp())
+        return datetime.fromtimestamp(stamp) if stamp is not None else None
+
+
+class PrayerCalculator:
+    """Güneşin konumundan Diyanet açıları ve temkinleriyle vakit hesabı; günler ve konumlar üzerinde vektörel
+
+    Vakitler (konum, gün, 6) boyutlu dizilerde tek seferde hesaplanır; güneşin konumu her vaktin
+    yaklaşık anı için iki kez düzeltilir. vakitler.json ile farkı için: python seher.py calc --validate
+    """
+    FAJR_ANGLE = 18.0           # derece, imsak
+    ISHA_ANGLE = 17.0           # derece, yatsı
+    HORIZON = 0.833             # derece, doğuş ve batışta kırılma ile güneş yarıçapı
+    ASR_SHADOW = 1              # ikindi gölge katsayısı
+    TEMKIN = (0, -7, 5, 4, 7, 0)  # dakika, vakit başına Diyanet temkin farkı
+    UTC_OFFSET = 3              # saat, Türkiye 2016'dan beri yaz saati uygulamıyor
+    FALLBACK_DAYS = 30          # veri bittiğinde bugünden itibaren hesaplanan gün sayısı
+
+    @staticmethod
+    def _sun(jd):
+        """Julian gününde güneşin dik açıklığı (radyan) ve zaman denklemi (saat)"""
+        d = jd - 2451545.0
+        anomaly = np.radians(357.529 + 0.98560028 * d)
+        mean_longitude = 280.459 + 0.98564736 * d
+        longitude = np.radians(mean_longitude + 1.915 * np.sin(anomaly) + 0.020 * np.sin(2 * anomaly))
+        obliquity = np.radians(23.439 - 0.00000036 * d)
+        right_ascension = np.degrees(np.arctan2(np.cos(obliquity) * np.sin(longitude), np.cos(longitude))) / 15
+        declination = np.arcsin(np.sin(obliquity) * np.sin(longitude))
+        equation = (mean_longitude / 15 - right_ascension % 24 + 12) % 24 - 12
+        return declination, equation
+
+    @classmethod
+    def compute(cls, latitudes, longitudes, ordinals):
+        """Gece yarısından itibaren dakikaları (konum, gün, 6) boyutlu uint16 dizisi olarak döndür"""
+        lat = np.radians(np.asarray(latitudes, dtype=float))[:, None]
+        lon = np.asarray(longitudes, dtype=float)[:, None]
+        jd = np.asarray(ordinals, dtype=float)[None, :] + 1721424.5 - lon / 360
+        hours = np.broadcast_to(np.array([5, 6, 12, 13, 18, 18], dtype=float)[:, None, None], (6, *jd.shape))
+
+        def arc(declination, altitude):
+            # Güneşin verilen yüksekliğe indiği saat açısı (saat)
+            cos_t = (np.sin(altitude) - np.sin(declination) * np.sin(lat)) / (np.cos(declination) * np.cos(lat))
+            return np.degrees(np.arccos(np.clip(cos_t, -1, 1))) / 15
+
+        for _ in range(2):
+            declination, equation = cls._sun(jd + hours / 24)
+            noon = 12 - equation
+            asr = np.arctan(1 / (cls.ASR_SHADOW + np.tan(np.abs(lat - declination[3]))))
+            hours = np.stack([
+                noon[0] - arc(declination[0], np.radians(-cls.FAJR_ANGLE)),
+                noon[1] - arc(declination[1], np.radians(-cls.HORIZON)),
+                noon[2],
+                noon[3] + arc(declination[3], asr),
+                noon[4] + arc(declination[4], np.radians(-cls.HORIZON)),
+                noon[5] + arc(declination[5], np.radians(-cls.ISHA_ANGLE)),
+            ])
+
+        minutes = (hours + cls.UTC_OFFSET - lon / 15) * 60 + np.array(cls.TEMKIN)[:, None, None]
+        return (np.rint(minutes) % 1440).astype(np.uint16).transpose(1, 2, 0)
+
+    @classmethod
+    def days(cls, latitude, longitude, start: date, end: date):
+        """Tek konum için [start, end] aralığında (gün, 6 dakika) çiftleri"""
+        ordinals = range(start.toordinal(), end.toordinal() + 1)
+        minutes = cls.compute([latitude], [longitude], ordinals)[0]
+        return [(date.fromordinal(o), tuple(map(int, m))) for o, m in zip(ordinals, minutes)]
+
+    @classmethod
+    def validate(cls, districts):
+        """{ilçe id: (enlem, boylam, {date: 6 dakika})} verisini hesapla karşılaştır, dakika farkı raporu döndür"""
+        report = {"days": 0, "prayers": {}, "districts": {}}
+        deviations = []
+        for district_id, (latitude, longitude, days) in districts.items():
+            if not days:
+                continue
+            ordered = sorted(days)
+            expected = np.array([days[day] for day in ordered], dtype=int)
+            computed = cls.compute([latitude], [longitude], [day.toordinal() for day in ordered])[0].astype(int)
+            # Gece yarısı çevresindeki farklar -720..720 aralığına katlanır
+            deviation = (expected - computed + 720) % 1440 - 720
+            deviations.append(deviation)
+            report["districts"][district_id] = {
+                "days": len(ordered), "mean_abs": float(np.abs(deviation).mean()),
+                "max_abs": int(np.abs(deviation).max()),
+            }
+        if not deviations:
+            return report
+        deviation = np.concatenate(deviations)
+        report["days"] = len(deviation)
+        for slot, name in enumerate(Tools.PRAYER_NAMES):
+            column = deviation[:, slot]
+            values, counts = np.unique(column, return_counts=True)
+            report["prayers"][name] = {
+                "mean": float(column.mean()), "mean_abs": float(np.abs(column).mean()),
+                "max_abs": int(np.abs(column).max()), "within_1": float((np.abs(column) <= 1).mean()),
+                "histogram": {int(v): int(c) for v, c in zip(values, counts)},
+            }
+        return report
+
+
+class Timeline:
+    """Vakit sınırlarını ve renk eşiği geçişlerini önceden hesaplanmış olaylar olarak tutar"""
+    STATES = ("standard", "warning", "critical")
+
+    def __init__(self, index: PrayerIndex, colors):
+        self.warning = colors["warning"]["trigger"] * 60
+        self.critical = colors["critical"]["trigger"] * 60
+        self.times = array('q')     # olay zamanları (epoch)
+        self.states = []            # olaydan sonraki renk durumu
+        self.targets = []           # olaydan sonra geri sayılan vakit (epoch, veri bittiyse None)
+
+        previous = 0
+        for target in index.timestamps:
+            # Her vakit aralığı kendi başlangıcında ve eşik anlarında durum değiştirir
+            changes = {previous, target - self.warning, target - self.critical}
+            for moment in sorted(t for t in changes if previous <= t < target):
+                # Olaydan hemen sonra ekranda görünen kalan süre (tam saniyeye yuvarlanmış) bir eksiğidir
+                self._add(moment, self.state_for(target - moment - 1, colors), target)
+            previous = target
+        self._add(previous, "standard", None)
+
+    def _add(self, moment, state, target):
+        # Durumu ve hedefi değişmeyen olayları birleştir
+        if self.states and self.states[-1] == state and self.targets[-1] == target:
+            return
+        self.times.append(moment)
+        self.states.append(state)
+        self.targets.append(target)
+
+    @staticmethod
+    def state_for(remaining_seconds, colors):
+        """Kalan süreye göre renk durumunu döndür; eşik, tetik dakikasının altına inince (44:59) başlar"""
+        if remaining_seconds < colors["critical"]["trigger"] * 60:
+            return "critical"
+        if remaining_seconds < colors["warning"]["trigger"] * 60:
+            return "warning"
+        return "standard"
+
+    def at(self, timestamp):
+        """(durum, hedef vakit, sonraki olay zamanı) üçlüsünü döndür"""
+        i = bisect_right(self.times, timestamp) - 1
+        # Eşik anında ekranda hâlâ 45:00 görünür; eşik rengi anından sonra, vakit geçişi anında başlar
+        if i > 0 and self.times[i] == timestamp and self.targets[i] == self.targets[i - 1]:
+            i -= 1
+        next_change = self.times[i + 1] if i + 1 < len(self.times) else None
+        if i < 0:
+            return "standard", None, next_change
+        return self.states[i], self.targets[i], next_change
+
+
+class Scheduler:
+    """Her amaç için tek bir after zamanlayıcısı tutar, bekleyeni üst üste yığmaz"""
+
     def __init__(self, root):
         self.root = root
-        self._settings = Tools.get_settings()  # Ayarları doğrudan Tools'dan al
-        self._prayer_times = Tools.get_prayer_times() # {date: [time1, time2, ...]}
-        self._next_prayer_time = Tools.find_next_prayer_time(self._prayer_times) # datetime object "%Y-%m-%d %H:%M"
+        self._jobs = {}  # {isim: after_id}
+        self.diagnostics = Tools.get_diagnostics()
+        self._metric_names = {}  # {isim: (sapma, süre) histogram adları}, her tetiklenmede yeniden kurulmaz
+
+    @property
+    def pending(self):
+        """Canlı after geri çağrılarının sayısı"""
+        return len(self._jobs)
+
+    def schedule(self, name, delay_ms, callback):
+        """Aynı isimde bekleyen iş varsa iptal edip yenisini kur"""
+        self.cancel(name)
+        delay_ms = max(0, int(delay_ms))
+        # Beklenen tetiklenme anı işle birlikte taşınır; gecikme (sapma) tetiklenince ölçülür
+        self._jobs[name] = self.root.after(delay_ms, self._run, name, callback, time.perf_counter() + delay_ms / 1000)
+
+    def schedule_idle(self, name, callback):
+        """Tk bekleyen çizimleri bitirdikten sonra çalıştır"""
+        self.cancel(name)
+        self._jobs[name] = self.root.after_idle(self._run, name, callback)
+
+    def repeat(self, name, interval_ms, callback):
+        """callback'i interval_ms aralıklarla tekrarla"""
+        def run():
+            callback()
+            self.schedule(name, interval_ms, run)
+        self.schedule(name, interval_ms, run)
+
+    def is_pending(self, name):
+        return name in self._jobs
+
+    def cancel(self, name):
+        if (job := self._jobs.pop(name, None)) is not None:
+            self.root.after_cancel(job)
+
+    def cancel_all(self):
+        for name in list(self._jobs):
+            self.cancel(name)
+
+    def _run(self, name, callback, expected=None):
+        started = time.perf_counter()
+        self._jobs.pop(name, None)
+        pending = len(self._jobs)
+        callback()
+        if (names := self._metric_names.get(name)) is None:
+            names = self._metric_names[name] = (f"{name}.drift_ms", f"{name}.handler_ms")
+        drift_ms, handler_ms = names
+        ms_bounds = Diagnostics.MS_BOUNDS
+        # Ölçümler iş bittikten sonra tek kilitle yazılır
+        records = [(handler_ms, (time.perf_counter() - started) * 1000, ms_bounds),
+                   ("timers.pending", pending, Diagnostics.COUNT_BOUNDS)]
+        if expected is not None:
+            records.append((drift_ms, (started - expected) * 1000, ms_bounds))
+        self.diagnostics.record_many(records)
+
+
+class TaskRunner:
+    """Ağ işlerini arka planda çalıştırır, sonuçları kuyruk üzerinden Tk iş parçacığına taşır"""
+    POLL_MS = 50
+
+    def __init__(self, scheduler, max_workers=2):
+        self.scheduler = scheduler
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="seher")
+        self._results = queue.Queue()
+        self._tasks = {}  # {anahtar: {"future", "on_done", "on_error", "owner"}}
+
+    def busy(self, key):
+        return key in self._tasks
+
+    @property
+    def idle(self):
+        return not self._tasks
+
+    def submit(self, key, func, *args, on_done=None, on_error=None, owner=None):
+        """İşi başlat; aynı anahtarla süren iş varsa yinelenen istek birleştirilir (False döner)"""
+        if key in self._tasks:
+            return False
+        future = self._executor.submit(func, *args)
+        task = {"future": future, "on_done": on_done, "on_error": on_error, "owner": owner}
+        self._tasks[key] = task
+        # Sonuç göreve bağlanır: iptal edilip aynı anahtarla yeniden başlatılan iş eskisinin sonucunu almaz
+        future.add_done_callback(lambda _, key=key, task=task: self._results.put((key, task)))
+        # Kuyruk yalnızca süren iş varken yoklanır
+        self.scheduler.schedule("tasks", self.POLL_MS, self._poll)
+        return True
+
+    def cancel_owner(self, owner):
+        """Sahibi kapanan işleri iptal et; başlamış olanların sonucu yok sayılır, anahtarları hemen boşalır"""
+        for key, task in list(self._tasks.items()):
+            if task["owner"] is owner:
+                task["future"].cancel()
+                task["on_done"] = task["on_error"] = None
+                del self._tasks[key]
+
+    def shutdown(self):
+        self.scheduler.cancel("tasks")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self):
+        while True:
+            try:
+                key, task = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+            future = task["future"]
+            if future.cancelled():
+                continue
+            try:
+                if (error := future.exception()) is not None:
+                    logger.error("Arka plan işi başarısız oldu (%s): %s", key, error)
+                    if task["on_error"]:
+                        task["on_error"](error)
+                elif task["on_done"]:
+                    task["on_done"](future.result())
+            except Exception:  # Bir geri çağrının hatası diğer işlerin sonuçlarını bekletmemeli
+                logger.exception("Arka plan işinin geri çağrısı başarısız oldu (%s)", key)
+        if self._tasks:
+            self.scheduler.schedule("tasks", self.POLL_MS, self._poll)
+
+
+class PrayerTimesRefresher:
+    """Vakit verisi bitmeden arka planda yeni günleri indirip mevcut kayıtlarla birleştirir"""
+    HORIZON_DAYS = 10          # kalan kapsam bunun altına inince yenile
+    START_DELAY = 60           # saniye, açılışı yavaşlatmamak için
+    MAX_CHECK_DELAY = 6 * 3600 # saniye, uyku/saat değişimlerine karşı en geç yoklama aralığı
+    RETRY_MIN = 5 * 60         # saniye, ilk başarısızlıktan sonraki bekleme
+    RETRY_MAX = 6 * 3600       # saniye
+
+    def __init__(self, scheduler, tasks, on_update=None, on_location_update=None):
+        self.scheduler = scheduler
+        self.tasks = tasks
+        self.on_update = on_update
+        # fn(ilçe id), ek konumun vakitleri depoya yazılınca; verilmezse on_update çağrılır
+        self.on_location_update = on_location_update
+        self._failures = 0
+
+    def start(self):
+        self._schedule(self.START_DELAY)
+
+    def coverage(self, now=None):
+        """Elde indirilmiş vakit verisi kalan süre (saniye); hesaplanan yedek günler sayılmaz"""
+        last = Tools.get_prayer_index().fetched_last
+        return max(0, last - (time.time() if now is None else now)) if last else 0
+
+    def until_horizon(self):
+        """Yenileme eşiğine kalan süre (saniye), en fazla MAX_CHECK_DELAY"""
+        return min(self.coverage() - self.HORIZON_DAYS * 86400, self.MAX_CHECK_DELAY)
+
+    def check(self):
+        self.refresh_locations()
+        if (delay := self.until_horizon()) > 0:
+            return self._schedule(delay)
+
+        district_id = str(Tools.get_settings()['LOCATION']['district']['id'])
+        logger.info("Vakit kapsamı %.1f gün, yenileniyor (%s)", self.coverage() / 86400, district_id)
+        self.tasks.submit("refresh", DiyanetApi().fetch_prayer_times, district_id,
+                          on_done=lambda times: self._on_fetched(district_id, times),
+                          on_error=lambda e: self._on_fetched(district_id, None))
+
+    def _on_fetched(self, district_id, times):
+        """Yalnızca None başarısızlıktır; yeni gün getirmeyen yanıt da geri çekilmeyi sıfırlar"""
+        if times is None:
+            # Başarısızlıkta üstel ve rastgele geri çekilme
+            delay = min(self.RETRY_MAX, self.RETRY_MIN * 2 ** self._failures) * random.uniform(0.8, 1.2)
+            self._failures += 1
+            logger.warning("Vakit yenileme başarısız, %.0f dk sonra tekrar denenecek", delay / 60)
+            return self._schedule(delay)
+
+        self._failures = 0
+        if Tools.merge_prayer_times(times, district_id):
+            if self.on_update:
+                self.on_update()
+        else:
+            logger.info("Vakit yenileme yeni gün getirmedi (%s)", district_id)
+        if district_id != str(Tools.get_settings()['LOCATION']['district']['id']):
+            return self._schedule(self.START_DELAY)  # İndirme sürerken konum değişti
+        # Sunucu eşikten kısa bir pencere verdiyse hemen yeniden istenmez
+        delay = self.until_horizon()
+        self._schedule(delay if delay > 0 else self.MAX_CHECK_DELAY)
+
+    def _schedule(self, delay_seconds):
+        self.scheduler.schedule("refresh", delay_seconds * 1000, self.check)
+
+    def location_coverage(self, district_id, now=None):
+        """Ek konumun vakit deposunda kalan verisi (saniye)"""
+        if not (span := Tools.get_prayer_store().coverage(district_id)):
+            return 0
+        end = datetime.combine(span[1] + timedelta(days=1), datetime.min.time()).timestamp()
+        return max(0, end - (time.time() if now is None else now))
+
+    def refresh_locations(self):
+        """Kapsamı eşiğin altına inen ek konumları indir; başarısızlar bir sonraki yoklamada denenir"""
+        for location in Tools.get_settings().get('LOCATIONS', []):
+            district_id = str(location['district']['id'])
+            if self.location_coverage(district_id) < self.HORIZON_DAYS * 86400:
+                self.refresh_location(district_id)
+
+    def refresh_location(self, district_id):
+        self.tasks.submit(
+            f"refresh-{district_id}", self._fetch_location, district_id,
+            on_done=lambda staged: self._on_location_fetched(district_id, staged),
+            on_error=lambda e: self._on_location_fetched(district_id, None)
+        )
+
+    @staticmethod
+    def _fetch_location(district_id):
+        """Arka planda: vakitleri indir ve yeni depo dosyasını hazırla"""
+        if not (times := DiyanetApi().fetch_prayer_times(district_id)):
+            return None
+        return Tools.get_prayer_store().stage({district_id: times})
+
+    def _on_location_fetched(self, district_id, staged):
+        if staged is None:
+            return logger.warning("Ek konum vakitleri alınamadı (%s)", district_id)
+        # Tk iş parçacığında yalnızca hazır dosya yerine konup yeniden eşlenir; saatler eşlemden
+        # okurken dosya kapatılmaz. Daha yeni bir hazırlık bunu kapsıyorsa güncelleme onunla gelir:
+        # o hazırlığın swap'ı bu ilçeyi de döndürür ve saati yeniden kurulur.
+        if not (landed := Tools.get_prayer_store().swap(staged)):
+            return
+        if self.on_location_update:
+            for landed_id in sorted(landed):
+                self.on_location_update(str(landed_id))
+        elif self.on_update:
+            self.on_update()
+
+
+class ClockRenderer:
+    """Son uygulanan metni, renkleri ve geometriyi hatırlar; değişmeyen Tk çağrılarını atlar"""
+    DIGITS = str.maketrans("0123456789", "0000000000")
+
+    def __init__(self, window, label):
+        self.window = window
+        self.label = label
+        self.text = None
+        self._colors = None
+        self._font_key = None
+        self._font = None
+        self._padding = (0, 0)
+        self.geometry = None
+        self._sizes = {}  # {(font, metin şekli): (genişlik, yükseklik)}
+        self.refresh_screen()
+
+    def refresh_screen(self):
+        """Ekran boyutunu yeniden oku (başlangıçta ve ayarlar değiştiğinde)"""
+        self.screen = (self.window.winfo_screenwidth(), self.window.winfo_screenheight())
+        self.geometry = None
+
+    def set_font(self, font_settings):
+        key = (font_settings["family"], font_settings["size"], font_settings["weight"])
+        if key == self._font_key:
+            return
+        self._font_key = key
+        self._font = tkfont.Font(root=self.window, family=key[0], size=key[1], weight=key[2])
+        self.label.config(font=self._font)
+        # Label'ın kenarlık ve iç boşlukları yazı tipiyle birlikte bir kez okunur
+        border = int(self.label.cget("borderwidth")) + int(self.label.cget("highlightthickness"))
+        self._padding = (2 * (border + int(self.label.cget("padx"))),
+                         2 * (border + int(self.label.cget("pady"))))
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.label.config(text=text)
+
+    def set_colors(self, background, foreground):
+        if (background, foreground) != self._colors:
+            self._colors = (background, foreground)
+            self.label.config(bg=background, fg=foreground)
+            self.window.config(bg=background)
+
+    def measure(self, text):
+        """Metnin label içindeki boyutunu ölç; rakamlar aynı şekle indirgenip önbelleğe alınır"""
+        shape = (text or "").translate(self.DIGITS)
+        key = (self._font_key, shape)
+        if (size := self._sizes.get(key)) is None:
+            lines = shape.split("\n")
+            width = max(self._font.measure(line) for line in lines) + self._padding[0]
+            height = self._font.metrics("linespace") * len(lines) + self._padding[1]
+            size = self._sizes[key] = (width, height)
+        return size
+
+    def place(self, width, height, x, y):
+        screen_width, screen_height = self.screen
+        x = max(0, min(x, screen_width - width))
+        y = max(0, min(y, screen_height - height))
+        self.apply_geometry(f"{width}x{height}+{x}+{y}")
+
+    def apply_geometry(self, geometry):
+        if geometry != self.geometry:
+            self.geometry = geometry
+            self.window.geometry(geometry)
+
+
+class DragEngine:
+    """Ölçüleri sürükleme başında önbelleğe alır, fare hareketlerini kare başına tek taşımada birleştirir"""
+    FRAME_MS = 16  # ~60 Hz
+
+    def __init__(self, window, scheduler):
+        self.window = window
+        self.scheduler = scheduler
+        self.active = False
+        self.position = None
+        self._offset = (0, 0)     # pencere köşesi - imleç (kök koordinatlar)
+        self._bands = ((), ())    # x ve y için (alt, üst, hedef) yapışma bantları
+        self._pointer = None
+        self._moved = False
+
+    def start(self, event, screen, snap_distance):
+        x, y = self.window.winfo_x(), self.window.winfo_y()
+        width, height = self.window.winfo_width(), self.window.winfo_height()
+        self._offset = (x - event.x_root, y - event.y_root)
+        self._bands = (self._snap_bands(screen[0], width, snap_distance),
+                       self._snap_bands(screen[1], height, snap_distance))
+        self.position = (x, y)
+        self._pointer = None
+        self._moved = False
+        self.active = True
+
+    @staticmethod
+    def _snap_bands(screen_size, widget_size, snap_distance):
+        # Kenara snap_distance'tan yakın konumlar kenara yapışır
+        far_edge = screen_size - widget_size
+        return ((-snap_distance, snap_distance, 0),
+                (far_edge - snap_distance, far_edge + snap_distance, far_edge))
+
+    @staticmethod
+    def _snap(value, bands):
+        for low, high, target in bands:
+            if low < value < high:
+                return target
+        return value
+
+    def move(self, event):
+        if not self.active:
+            return
+        self._pointer = (event.x_root, event.y_root)
+        if not self.scheduler.is_pending("drag"):
+            self.scheduler.schedule("drag", self.FRAME_MS, self._apply)
+
+    def _apply(self):
+        if self._pointer is None:
+            return
+        x = self._snap(self._pointer[0] + self._offset[0], self._bands[0])
+        y = self._snap(self._pointer[1] + self._offset[1], self._bands[1])
+        self._pointer = None
+        if (x, y) != self.position:
+            self.position = (x, y)
+            self._moved = True
+            self.window.geometry(f"+{x}+{y}")
+
+    def stop(self):
+        """Sürüklemeyi bitir; pencere taşındıysa son konumu, taşınmadıysa None döndür"""
+        if not self.active:
+            return None
+        self.scheduler.cancel("drag")
+        self._apply()  # Bekleyen son hareketi uygula
+        self.active = False
+        return self.position if self._moved else None
+
+
+class ClockGroup:
+    """Tüm konum saatlerini tek zamanlayıcı işiyle sürer; her tikte yalnızca zamanı gelenler çizilir"""
+    STACK_OFFSET = 40  # px, konumu kaydedilmemiş ek saatler birincil saatin üstüne dizilir
+    RETRY_S = 60       # hata veren saat bu kadar sonra yeniden denenir; diğerleri durmadan sürer
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.clocks = []   # birincil saat dahil tüm saatler
+        self.extras = {}   # {ilçe id: ClockWidget}, ayarlardaki LOCATIONS listesi
+        self._synced = {}  # {ilçe id: ek saatin kurulduğu konum ve görünüm ayarları}
+        self._due = {}     # {ClockWidget: epoch}, bir sonraki çizim zamanı
+        self._ticking = False
+        self._locked = False
+
+    def add(self, clock):
+        self.clocks.append(clock)
+        if len(self.clocks) == 1:
+            self.scheduler.repeat("keep_on_top", 5000, self.keep_on_top)
+
+    def remove(self, clock):
+        self.clocks.remove(clock)
+        self.cancel(clock)
+        if not self.clocks:
+            self.scheduler.cancel("keep_on_top")
+
+    def request(self, clock, delay_ms):
+        """Saati delay_ms sonra yeniden çizilmek üzere işaretle (None: bekleyen çizim yok)"""
+        if delay_ms is None:
+            self._due.pop(clock, None)
+        else:
+            self._due[clock] = time.time() + delay_ms / 1000
+        if not self._ticking:  # Tik sırasındaki istekler tik sonunda tek seferde kurulur
+            self._schedule()
+
+    def cancel(self, clock):
+        self.request(clock, None)
+
+    def _schedule(self):
+        if not self._due:
+            return self.scheduler.cancel("clock")
+        delay_ms = math.ceil((min(self._due.values()) - time.time()) * 1000)
+        self.scheduler.schedule("clock", max(0, delay_ms), self._tick)
+
+    def _tick(self):
+        self._ticking = True
+        try:
+            now = time.time()
+            for clock in [clock for clock, at in self._due.items() if at <= now]:
+                try:
+                    clock.update_clock()
+                except Exception:
+                    # Geçmişte kalan çizim zamanı tiki boşa döndürmesin
+                    logger.exception("Saat güncellenemedi, %s sn sonra yeniden denenecek", self.RETRY_S)
+                    self._due[clock] = now + self.RETRY_S
+        finally:
+            self._ticking = False
+            self._schedule()
+
+    def keep_on_top(self):
+        # Ekran kilidi tüm saatler için bir kez yoklanır
+        locked = Tools.is_session_locked()
+        if locked != self._locked:
+            self._locked = locked
+            logger.info("Ekran kilidi: %s", locked)
+        for clock in self.clocks:
+            clock.keep_on_top(locked)
+
+    def sync(self, root, locations):
+        """Ayarlardaki ek konumlarla açık saatleri eşle: yenileri kur, silinenleri kapat
+
+        Mevcut saatler yalnızca kendi konumları veya renk, yazı tipi ve görünüm ayarları değiştiyse yeniden kurulur.
+        """
+        settings = Tools.get_settings()
+        wanted = {str(location['district']['id']): location for location in locations}
+        for district_id in [d for d in self.extras if d not in wanted]:
+            self.extras.pop(district_id).destroy()
+            self._synced.pop(district_id, None)
+        # Sürüklemeyle değişen konumlar saatin yeniden kurulmasını gerektirmez
+        shared = [settings["COLORS"], settings["FONTS"],
+                  {key: value for key, value in settings["DISPLAY"].items() if key != "position"}]
+        for i, (district_id, location) in enumerate(wanted.items(), 1):
+            if 'position' not in location:
+                x, y = settings["DISPLAY"]["position"].values()
+                location['position'] = {"x": x, "y": y - i * self.STACK_OFFSET}
+            signature = json.dumps([{k: v for k, v in location.items() if k != 'position'}, *shared], sort_keys=True)
+            if clock := self.extras.get(district_id):
+                clock.location = location
+                if self._synced.get(district_id) != signature:
+                    clock.reload()
+            else:
+                self.extras[district_id] = ClockWidget(root, self.scheduler, location=location)
+            self._synced[district_id] = signature
+
+    def reload_location(self, district_id):
+        """Vakitleri depoda güncellenen ek konumun saatini yeniden kur"""
+        if clock := self.extras.get(str(district_id)):
+            clock.reload()
+
+
+class ClockWidget:
+    PREBUILD_DELAY = 3000  # ms, ayarlar penceresi açılıştan sonra boşta gizli kurulur
+
+    def __init__(self, root, scheduler=None, snapshot=None, location=None):
+        self.root = root
+        self.scheduler = scheduler or Scheduler(root)
+        self.location = location  # None: birincil konum (LOCATION), aksi halde LOCATIONS öğesi
+        # Tüm saatler tek tik işini ve kilit yoklamasını paylaşır
+        root.clocks = self.group = getattr(root, 'clocks', None) or ClockGroup(self.scheduler)
+        # Sıcak başlangıçta ilk kare son oturumun anlık görüntüsünden çizilir
+        self._settings = snapshot["settings"] if snapshot else Tools.get_settings()
+        self._prayer_times = {} # {date: [time1, time2, ...]}
+        self._prayer_index = None # sıralı epoch dizisi
+        self._timeline = None
+        self._color_state = "standard"
+        self._next_prayer_time = None # epoch, geri sayılan vakit
+        self._calculated = False # Geri sayılan vakit indirilen veriden değil, hesaptan geliyor
+        self._next_change = 0 # epoch, bir sonraki durum değişikliği (0: ilk tikte hesapla)
 
         self.window = tk.Toplevel(root)
         self.window.overrideredirect(True)
 
-        logger.debug(f"Ayarlardaki konum: {self._settings['DISPLAY']['position']}")
+        logger.debug("Ayarlardaki konum: %s", self._settings['DISPLAY']['position'])
 
         colors = self._settings["COLORS"]["standard"]
         font_settings = self._settings["FONTS"]["clock"]
@@ -83,75 +1534,76 @@ class ClockWidget:
         self.window.configure(bg=colors["background"])
         self.window.attributes('-topmost', self._settings["DISPLAY"]["always_on_top"])
 
-        self.label = tk.Label(
-            self.window,
-            text="00:00",
-            font=(font_settings["family"], font_settings["size"], font_settings["weight"]),
-            fg=colors["text"],
-            bg=colors["background"]
-        )
+        self.label = tk.Label(self.window)
         self.label.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
 
-        self.initial_geometry_set = False
-        self.window.update_idletasks()
+        self.renderer = ClockRenderer(self.window, self.label)
+        self.renderer.set_font(font_settings)
+        self.renderer.set_colors(colors["background"], colors["text"])
+        self.renderer.set_text("00:00")
         self.set_window_geometry()
 
-        self.is_dragging = False
+        self.drag = DragEngine(self.window, self.scheduler)
+        self._hidden = False  # Pencere gizliyken veya ekran kilitliyken tik durur
+        self._locked = False
         self.setup_bindings()
         self.create_context_menu()
+        self.group.add(self)
 
-        if not Tools.PRAYER_TIMES.exists() or not self._prayer_times:
+        if snapshot:
+            self.paint_snapshot(snapshot)
+            self.scheduler.schedule_idle("load_data", self.load_data)
+        else:
+            self.load_data()
+
+    def paint_snapshot(self, snapshot):
+        """Ayarlar doğrulanmadan ve vakitler okunmadan ilk kareyi çiz"""
+        if (target := snapshot.get("next_prayer")) and target > time.time():
+            now = time.time()
+            hours, minutes, seconds = Tools.remaining_time(target, now)
+            self.apply_color_state(Timeline.state_for(target - now, self._settings["COLORS"]))
+            self.renderer.set_text(self.format_time(hours, minutes, seconds))
+        if geometry := snapshot.get("geometry"):
+            self.renderer.apply_geometry(geometry)
+
+    @property
+    def district_id(self):
+        return str((self.location or self._settings['LOCATION'])['district']['id'])
+
+    def load_data(self):
+        """Ayarları doğrula, vakitleri yükle ve saati başlat"""
+        if self.location is not None:
+            self.reload()
+            # Depoda verisi olmayan yeni konum, ilk yoklamayı beklemeden indirilir
+            if not len(self._prayer_index) and (refresher := getattr(self.root, 'refresher', None)):
+                refresher.refresh_location(self.district_id)
+            return
+        Tools().validate_and_fix_settings()
+        self.reload()
+        if not len(self._prayer_index):
             logger.info("Vakitler dosyası bulunamadı. Ayarlar penceresi açılıyor...")
-            self.root.after(1000, lambda: self.open_settings(None))
-
-        self.update_clock()
-        self.keep_on_top()
+            self.scheduler.schedule("open_settings", 1000, lambda: self.open_settings(None))
+        elif not Tools.get_settings().get('RUNTIME', {}).get('lean'):
+            self.scheduler.schedule(
+                "prebuild_settings", self.PREBUILD_DELAY,
+                lambda: self.scheduler.schedule_idle("prebuild_settings", self.prebuild_settings)
+            )
 
     def set_window_geometry(self):
-        self.window.update_idletasks()
-        is_horizontal = self._settings["DISPLAY"]["orientation"] == "horizontal"
-
-        base_width = self.label.winfo_reqwidth()
-        base_height = self.label.winfo_reqheight()
-
-        if is_horizontal:
-            width = int(base_width * 1.1)
-            height = int(base_height * 1.02)
-        else:
-            width = int(base_height * 1.1)
-            height = int(base_width * 1.05)
-
-        x, y = self._settings["DISPLAY"]["position"].values()
-
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-
-        x = max(0, min(x, screen_width - width))
-        y = max(0, min(y, screen_height - height))
-
-        self.window.geometry(f"{width}x{height}+{x}+{y}")
-        self.window.update_idletasks()
+        base_width, base_height = self.renderer.measure(self.renderer.text)
+        width = int(base_width * 1.1)
+        height = int(base_height * 1.02)
+        position = self.position(self._settings)
+        self.renderer.place(width, height, position["x"], position["y"])
         return width, height
 
-    def set_window_geometry(self):
-        self.window.update_idletasks()
-        width = int(self.label.winfo_reqwidth() * 1.1)
-        height = int(self.label.winfo_reqheight() * 1.02)
-        x, y = self._settings["DISPLAY"]["position"].values()
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-        x = max(0, min(x, screen_width - width))
-        y = max(0, min(y, screen_height - height))
-        self.window.geometry(f"{width}x{height}+{x}+{y}")
-
-    def update_orientation(self):
-        current_width = self.window.winfo_width()
-        current_height = self.window.winfo_height()
-        x = self.window.winfo_x()
-        y = self.window.winfo_y()
-        self.window.geometry(f"{current_height}x{current_width}+{x}+{y}")
-        self.set_window_geometry()  # Ekran sınırları kontrolü için
-        self.update_clock()
+    def position(self, settings):
+        """Bu saatin konumunu tutan ayar sözlüğü"""
+        if self.location is None:
+            return settings["DISPLAY"]["position"]
+        location = next((location for location in settings.get("LOCATIONS", [])
+                         if str(location['district']['id']) == self.district_id), self.location)
+        return location.setdefault("position", {"x": 0, "y": 0})
 
     def setup_bindings(self):
         self.window.bind("<Button-1>", self.start_move)
@@ -159,6 +1611,9 @@ class ClockWidget:
         self.window.bind("<ButtonRelease-1>", self.stop_move)
         self.window.bind("<Double-Button-1>", self.open_settings)
         self.window.bind("<Button-3>", self.show_context_menu)
+        self.window.bind("<Shift-Button-3>", lambda event: self.show_context_menu(event, diagnostics=True))
+        self.window.bind("<Map>", self.on_visibility_change)
+        self.window.bind("<Unmap>", self.on_visibility_change)
 
     def create_context_menu(self):
         self.context_menu = tk.Menu(self.window, tearoff=0)
@@ -166,111 +1621,183 @@ class ClockWidget:
         self.context_menu.add_command(label="Programı Kapat", command=self.close_program)
 
     def start_move(self, event):
-        self.is_dragging = True
-        self.x = event.x
-        self.y = event.y
-
-    def do_move(self, event):
-        # Yeni konumu hesapla ve geçici olarak pencereye uygula
-        if self.is_dragging:
-            x = self.window.winfo_x() + (event.x - self.x)
-            y = self.window.winfo_y() + (event.y - self.y)
-            x, y = self.snap_to_edges(x, y)
-            self.window.geometry(f"+{x}+{y}")
+        self.drag.start(event, self.renderer.screen, self._settings["DISPLAY"]["snap_distance"])
 
     def do_move(self, event):
-        if self.is_dragging:
-            x = self.window.winfo_x() + (event.x - self.x)
-            y = self.window.winfo_y() + (event.y - self.y)
-            snap_distance = self._settings["DISPLAY"]["snap_distance"]
-            
-            # Kenarlara yapışma
-            screen_width = self.window.winfo_screenwidth()
-            screen_height = self.window.winfo_screenheight()
-            widget_width = self.window.winfo_width()
-            widget_height = self.window.winfo_height()
-            if abs(x) < snap_distance: x = 0
-            elif abs(x + widget_width - screen_width) < snap_distance:
-                x = screen_width - widget_width
-            if abs(y) < snap_distance: y = 0
-            elif abs(y + widget_height - screen_height) < snap_distance:
-                y = screen_height - widget_height
-            
-            self.window.geometry(f"+{x}+{y}")
+        self.drag.move(event)
 
     def stop_move(self, event):
-        if self.is_dragging:
-            self.is_dragging = False
+        if position := self.drag.stop():
             settings = Tools.get_settings()
-            settings["DISPLAY"]["position"].update({
-                "x": self.window.winfo_x(),
-                "y": self.window.winfo_y()
-            })
+            self.position(settings).update({"x": position[0], "y": position[1]})
             Tools.update_settings(settings)
             self._settings = settings
 
-    def snap_to_edges(self, x, y):
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-        widget_width = self.window.winfo_width()
-        widget_height = self.window.winfo_height()
-        snap_distance = self._settings["DISPLAY"]["snap_distance"]
-
-        if abs(x) < snap_distance: x = 0
-        elif abs(x + widget_width - screen_width) < snap_distance:
-            x = screen_width - widget_width
-
-        if abs(y) < snap_distance: y = 0
-        elif abs(y + widget_height - screen_height) < snap_distance:
-            y = screen_height - widget_height
-
-        return x, y
+    @property
+    def is_dragging(self):
+        return self.drag.active
 
     def open_settings(self, event=None):
-        if (not hasattr(self.root, 'settings_window')
-                or not (self.root.settings_window
-                        and self.root.settings_window.window.winfo_exists())):
+        """Kurulu ayarlar penceresini göster; yoksa (ilk açılış, yalın kip) yeniden kur"""
+        settings_window = getattr(self.root, 'settings_window', None)
+        if settings_window and settings_window.window.winfo_exists():
+            settings_window.show()
+        else:
             self.root.settings_window = SettingsWindow(self.root)
 
-    def show_context_menu(self, event):
+    def prebuild_settings(self):
+        """Ayarlar penceresini gizli olarak önceden kur; çift tıklamada beklemeden açılır"""
+        if not getattr(self.root, 'settings_window', None):
+            self.root.settings_window = SettingsWindow(self.root, visible=False)
+
+    def show_context_menu(self, event, diagnostics=False):
+        # Gizli tanılama girdisi yalnızca Shift + sağ tıkla eklenir
+        if self.context_menu.index("end") > 1:
+            self.context_menu.delete(2, "end")
+        if diagnostics:
+            profiler = Tools.get_profiler()
+            self.context_menu.add_separator()
+            if profiler.active:
+                remaining = max(0, math.ceil((profiler.deadline - time.time()) / 60))
+                self.context_menu.add_command(label=f"Profil Kaydını Bitir ({remaining} dk kaldı)",
+                                              command=profiler.stop)
+            else:
+                self.context_menu.add_command(label=f"Profil Kaydı Başlat ({Profiler.MINUTES} dk)",
+                                              command=lambda: profiler.start(Profiler.MINUTES, self.scheduler))
         self.context_menu.post(event.x_root, event.y_root)
 
     def close_program(self):
+        self.scheduler.cancel_all()
         self.root.quit()
 
-    def keep_on_top(self):
+    def keep_on_top(self, locked):
         self.window.attributes('-topmost', 1)
-        self.window.after(5000, self.keep_on_top)
+        # Ekran kilidi ClockGroup tarafından yoklanır, ek zamanlayıcı kurulmaz
+        if locked != self._locked:
+            self._locked = locked
+            if locked:
+                self.suspend()
+            else:
+                self.resume()
+
+    def on_visibility_change(self, event):
+        if event.widget is not self.window:
+            return
+        self._hidden = event.type == tk.EventType.Unmap
+        if self._hidden:
+            self.suspend()
+        else:
+            self.resume()
+
+    @property
+    def paused(self):
+        return self._hidden or self._locked
+
+    def suspend(self):
+        """Görünür bir değişiklik olmayacağından tiki tamamen durdur"""
+        self.group.cancel(self)
+
+    def resume(self):
+        if not self.paused:
+            self._next_change = 0  # Duraklama sırasında kaçan olayları yeniden hesapla
+            self.update_clock()
+
+    def reload(self):
+        """Ayarlar veya vakitler değiştiğinde zaman çizelgesini yeniden kur"""
+        self._settings = Tools.get_settings()
+        if self.location is None:
+            self._prayer_times = Tools.get_prayer_times()
+            self._prayer_index = Tools.get_prayer_index()
+        else:
+            self._prayer_index = Tools.get_location_index(self.district_id)
+        self._timeline = Timeline(self._prayer_index, self._settings["COLORS"])
+        self.renderer.set_font(self._settings["FONTS"]["clock"])
+        self.renderer.refresh_screen()
+        self._color_state = None
+        self._next_change = 0
+        self.update_clock()
+        if self.location is None:
+            self.save_snapshot()
+            self.group.sync(self.root, self._settings.get("LOCATIONS", []))
+
+    def destroy(self):
+        """Ek konum ayarlardan silindiğinde saati kapat"""
+        self.group.remove(self)
+        self.drag.stop()
+        self.window.destroy()
+
+    def save_snapshot(self):
+        """Bir sonraki açılışta ilk kareyi çizmek için gerekenleri sakla"""
+        if self.location is not None:
+            return  # Ek konumlar sıcak başlangıca yazılmaz
+        Tools.save_snapshot({
+            "next_prayer": self._next_prayer_time,
+            "geometry": self.renderer.geometry,
+            "settings": {key: self._settings[key] for key in ("COLORS", "FONTS", "DISPLAY")},
+        })
 
     def update_clock(self):
+        if self.paused:
+            return self.suspend()
+
+        now = time.time()
+        if self._next_change is not None and now >= self._next_change:
+            self.advance_timeline(now)
+
         if self._next_prayer_time:
-            self.update_remaining_time_display()
+            self.update_remaining_time_display(now)
         else:
-            self.label.config(text="00")
+            self.renderer.set_text("00")
 
         if not self.is_dragging:  # Sürükleme yapılmıyorsa pencere boyutunu güncelle
             self.set_window_geometry() 
 
-        # Güncelleme sıklığını kontrol et
-        interval = 1000 if self._settings["DISPLAY"]["show_seconds"] else 60000
-        self.root.after(interval, self.update_clock)
+        # Bir sonraki çizimi ortak tike bildir, bekleyen çizim yenisiyle değiştirilir
+        self.group.request(self, self.next_refresh_delay(now))
 
-    # Kalan süreyi güncelle ve göster
-    def update_remaining_time_display(self):
-        now = datetime.now()
-        if now >= self._next_prayer_time: # Eğer vakit geçtiyse
-            # Bir sonraki vakti bul ve güncelle
-            self._next_prayer_time = Tools.find_next_prayer_time(self._prayer_times)
+    def next_refresh_delay(self, now):
+        """Bir sonraki görünür değişikliğe kadar beklenecek süre (ms), yoksa None"""
+        display = self._settings["DISPLAY"]
+        step = 1 if display["show_seconds"] else 60
+
+        if display.get("refresh", "adaptive") == "fixed":
+            delay_ms = step * 1000 - int(now * 1000) % 1000
+        elif self._next_prayer_time:
+            # Gösterilen rakam, kalan süre bir sonraki step katına indiğinde değişir
+            remaining = self._next_prayer_time - now
+            delay_ms = math.ceil((remaining % step or step) * 1000)
+        else:
+            delay_ms = None  # Gösterilecek vakit yok, yalnızca olay beklenir
+
+        if self._next_change is not None:  # Renk ve vakit geçişleri tam zamanında uygulanır
+            change_ms = math.ceil((self._next_change - now) * 1000)
+            delay_ms = change_ms if delay_ms is None else min(delay_ms, change_ms)
+        return delay_ms
+
+    def advance_timeline(self, now):
+        """Zaman çizelgesinde bir sonraki olaya geç, renk yalnızca durum değişirse güncellenir"""
+        previous_target = self._next_prayer_time
+        # Vakitler yenilenemese de hesaplanan günler bitmeden ileri taşınır; olaylar günde birkaç kez gelir
+        if Tools.extend_fallback(self._prayer_index, self.district_id, now):
+            self._timeline = Timeline(self._prayer_index, self._settings["COLORS"])
+        state, self._next_prayer_time, self._next_change = self._timeline.at(now)
+        self._calculated = bool(self._next_prayer_time) and self._prayer_index.is_calculated(self._next_prayer_time)
+        self.apply_color_state(state)
+        if previous_target and self._next_prayer_time != previous_target:
+            self.save_snapshot()  # Vakit geçti, anlık görüntü yeni hedefi göstersin
 
-        hours, minutes, seconds = Tools.remaining_time(self._next_prayer_time)
-        self.update_color_by_time(hours * 60 + minutes) # Renk güncelle
-        self.label.config(text=self.format_time(hours, minutes, seconds))
+    # Kalan süreyi güncelle ve göster
+    def update_remaining_time_display(self, now):
+        hours, minutes, seconds = Tools.remaining_time(self._next_prayer_time, now)
+        self.renderer.set_text(self.format_time(hours, minutes, seconds))
 
     def format_time(self, hours, minutes, seconds) -> str:
         """Saat metnini ayarlardaki formatlara göre döndür"""
         display = self._settings["DISPLAY"]
         time_parts = []
         separator = "\n" if display["orientation"] == "vertical" else ":"
+        # Ek konumlar hangi şehre ait olduklarını etiketle gösterir
+        caption = self.caption and self.caption + ("\n" if display["orientation"] == "vertical" else " ")
         
         if hours > 0:
             time_parts.append(str(hours))
@@ -280,20 +1807,21 @@ class ClockWidget:
         
         if display["show_seconds"]:
             time_parts.append(f"{seconds:02}")
-            
-        return separator.join(time_parts)
 
-    def update_color_by_time(self, minutes):
-        if minutes < self._settings["COLORS"]["critical"]["trigger"]:
-            self.change_color(self._settings["COLORS"]["critical"])
-        elif minutes < self._settings["COLORS"]["warning"]["trigger"]:
-            self.change_color(self._settings["COLORS"]["warning"])
-        else:
-            self.change_color(self._settings["COLORS"]["standard"])
+        # Hesaplanan vakitler "≈" ile işaretlenir
+        return caption + ("≈" if self._calculated else "") + separator.join(time_parts)
 
-    def change_color(self, color_settings):
-        self.label.config(bg=color_settings["background"], fg=color_settings["text"])
-        self.window.config(bg=color_settings["background"])
+    @property
+    def caption(self):
+        if self.location is None:
+            return ""
+        return self.location.get('label') or self.location['district']['name']
+
+    def apply_color_state(self, state):
+        if state != self._color_state:
+            self._color_state = state
+            colors = self._settings["COLORS"][state]
+            self.renderer.set_colors(colors["background"], colors["text"])
 
 class Tools:
     # BASE_DIR = Path(__file__).parent
@@ -301,91 +1829,106 @@ class Tools:
     LOG_FILE = BASE_DIR / 'app.log'
     SETTINGS = BASE_DIR / 'ayarlar.json'
     PRAYER_TIMES = BASE_DIR / 'vakitler.json'
+    PRAYER_STORE = BASE_DIR / 'vakitler.bin'
+    DISTRICTS = BASE_DIR / 'ilceler.json'
+    SNAPSHOT = BASE_DIR / 'baslangic.json'
+
+    PRAYER_NAMES = ("İmsak", "Güneş", "Öğle", "İkindi", "Akşam", "Yatsı")
 
     _settings = None
-    _prayer_times = None
+    _prayer_times = None          # ayarlardaki ilçenin vakitleri
+    _prayer_times_district = None # _prayer_times'ın derlendiği ilçe
+    _prayer_times_file = None     # (ilçe id, vakitler), vakitler.json içeriği
+    _prayer_index = None
+    _district_cache = None
+    _prayer_store = None
+    _writer = None
+    _diagnostics = None
+    _profiler = None
+    _log_listener = None
+    # İl merkezlerinin yaklaşık koordinatları (derece), hesaplanan yedek vakitler için
     _cities = [
-        {"plaka": "01", "il": "Adana", "id": "500"},
-        {"plaka": "02", "il": "Adıyaman", "id": "501"},
-        {"plaka": "03", "il": "Afyon", "id": "502"},
-        {"plaka": "04", "il": "Ağrı", "id": "503"},
-        {"plaka": "05", "il": "Amasya", "id": "505"},
-        {"plaka": "06", "il": "Ankara", "id": "506"},
-        {"plaka": "07", "il": "Antalya", "id": "507"},
-        {"plaka": "08", "il": "Artvin", "id": "509"},
-        {"plaka": "09", "il": "Aydın", "id": "510"},
-        {"plaka": "10", "il": "Balıkesir", "id": "511"},
-        {"plaka": "11", "il": "Bilecik", "id": "515"},
-        {"plaka": "12", "il": "Bingöl", "id": "516"},
-        {"plaka": "13", "il": "Bitlis", "id": "517"},
-        {"plaka": "14", "il": "Bolu", "id": "518"},
-        {"plaka": "15", "il": "Burdur", "id": "519"},
-        {"plaka": "16", "il": "Bursa", "id": "520"},
-        {"plaka": "17", "il": "Çanakkale", "id": "521"},
-        {"plaka": "18", "il": "Çankırı", "id": "522"},
-        {"plaka": "19", "il": "Çorum", "id": "523"},
-        {"plaka": "20", "il": "Denizli", "id": "524"},
-        {"plaka": "21", "il": "Diyarbakır", "id": "525"},
-        {"plaka": "22", "il": "Edirne", "id": "527"},
-        {"plaka": "23", "il": "Elazığ", "id": "528"},
-        {"plaka": "24", "il": "Erzincan", "id": "529"},
-        {"plaka": "25", "il": "Erzurum", "id": "530"},
-        {"plaka": "26", "il": "Eskişehir", "id": "531"},
-        {"plaka": "27", "il": "Gaziantep", "id": "532"},
-        {"plaka": "28", "il": "Giresun", "id": "533"},
-        {"plaka": "29", "il": "Gümüşhane", "id": "534"},
-        {"plaka": "30", "il": "Hakkari", "id": "535"},
-        {"plaka": "31", "il": "Hatay", "id": "536"},
-        {"plaka": "32", "il": "Isparta", "id": "538"},
-        {"plaka": "33", "il": "Mersin", "id": "557"},
-        {"plaka": "34", "il": "İstanbul", "id": "539"},
-        {"plaka": "35", "il": "İzmir", "id": "540"},
-        {"plaka": "36", "il": "Kars", "id": "544"},
-        {"plaka": "37", "il": "Kastamonu", "id": "545"},
-        {"plaka": "38", "il": "Kayseri", "id": "546"},
-        {"plaka": "39", "il": "Kırklareli", "id": "549"},
-        {"plaka": "40", "il": "Kırşehir", "id": "550"},
-        {"plaka": "41", "il": "Kocaeli", "id": "551"},
-        {"plaka": "42", "il": "Konya", "id": "552"},
-        {"plaka": "43", "il": "Kütahya", "id": "553"},
-        {"plaka": "44", "il": "Malatya", "id": "554"},
-        {"plaka": "45", "il": "Manisa", "id": "555"},
-        {"plaka": "46", "il": "K.Maraş", "id": "541"},
-        {"plaka": "47", "il": "Mardin", "id": "556"},
-        {"plaka": "48", "il": "Muğla", "id": "558"},
-        {"plaka": "49", "il": "Muş", "id": "559"},
-        {"plaka": "50", "il": "Nevşehir", "id": "560"},
-        {"plaka": "51", "il": "Niğde", "id": "561"},
-        {"plaka": "52", "il": "Ordu", "id": "562"},
-        {"plaka": "53", "il": "Rize", "id": "564"},
-        {"plaka": "54", "il": "Sakarya", "id": "565"},
-        {"plaka": "55", "il": "Samsun", "id": "566"},
-        {"plaka": "56", "il": "Siirt", "id": "568"},
-        {"plaka": "57", "il": "Sinop", "id": "569"},
-        {"plaka": "58", "il": "Sivas", "id": "571"},
-        {"plaka": "59", "il": "Tekirdağ", "id": "572"},
-        {"plaka": "60", "il": "Tokat", "id": "573"},
-        {"plaka": "61", "il": "Trabzon", "id": "574"},
-        {"plaka": "62", "il": "Tunceli", "id": "575"},
-        {"plaka": "63", "il": "Şanlıurfa", "id": "567"},
-        {"plaka": "64", "il": "Uşak", "id": "576"},
-        {"plaka": "65", "il": "Van", "id": "577"},
-        {"plaka": "66", "il": "Yozgat", "id": "579"},
-        {"plaka": "67", "il": "Zonguldak", "id": "580"},
-        {"plaka": "68", "il": "Aksaray", "id": "504"},
-        {"plaka": "69", "il": "Bayburt", "id": "514"},
-        {"plaka": "70", "il": "Karaman", "id": "543"},
-        {"plaka": "71", "il": "Kırıkkale", "id": "548"},
-        {"plaka": "72", "il": "Batman", "id": "513"},
-        {"plaka": "73", "il": "Şırnak", "id": "570"},
-        {"plaka": "74", "il": "Bartın", "id": "512"},
-        {"plaka": "75", "il": "Ardahan", "id": "508"},
-        {"plaka": "76", "il": "Iğdır", "id": "537"},
-        {"plaka": "77", "il": "Yalova", "id": "578"},
-        {"plaka": "78", "il": "Karabük", "id": "542"},
-        {"plaka": "79", "il": "Kilis", "id": "547"},
-        {"plaka": "80", "il": "Osmaniye", "id": "563"},
-        {"plaka": "81", "il": "Düzce", "id": "526"}
+        {"plaka": "01", "il": "Adana", "id": "500", "lat": 37.00, "lon": 35.32},
+        {"plaka": "02", "il": "Adıyaman", "id": "501", "lat": 37.76, "lon": 38.28},
+        {"plaka": "03", "il": "Afyon", "id": "502", "lat": 38.76, "lon": 30.54},
+        {"plaka": "04", "il": "Ağrı", "id": "503", "lat": 39.72, "lon": 43.05},
+        {"plaka": "05", "il": "Amasya", "id": "505", "lat": 40.65, "lon": 35.83},
+        {"plaka": "06", "il": "Ankara", "id": "506", "lat": 39.93, "lon": 32.86},
+        {"plaka": "07", "il": "Antalya", "id": "507", "lat": 36.89, "lon": 30.71},
+        {"plaka": "08", "il": "Artvin", "id": "509", "lat": 41.18, "lon": 41.82},
+        {"plaka": "09", "il": "Aydın", "id": "510", "lat": 37.85, "lon": 27.84},
+        {"plaka": "10", "il": "Balıkesir", "id": "511", "lat": 39.65, "lon": 27.88},
+        {"plaka": "11", "il": "Bilecik", "id": "515", "lat": 40.14, "lon": 29.98},
+        {"plaka": "12", "il": "Bingöl", "id": "516", "lat": 38.88, "lon": 40.50},
+        {"plaka": "13", "il": "Bitlis", "id": "517", "lat": 38.40, "lon": 42.11},
+        {"plaka": "14", "il": "Bolu", "id": "518", "lat": 40.74, "lon": 31.61},
+        {"plaka": "15", "il": "Burdur", "id": "519", "lat": 37.72, "lon": 30.29},
+        {"plaka": "16", "il": "Bursa", "id": "520", "lat": 40.19, "lon": 29.06},
+        {"plaka": "17", "il": "Çanakkale", "id": "521", "lat": 40.15, "lon": 26.41},
+        {"plaka": "18", "il": "Çankırı", "id": "522", "lat": 40.60, "lon": 33.62},
+        {"plaka": "19", "il": "Çorum", "id": "523", "lat": 40.55, "lon": 34.95},
+        {"plaka": "20", "il": "Denizli", "id": "524", "lat": 37.78, "lon": 29.09},
+        {"plaka": "21", "il": "Diyarbakır", "id": "525", "lat": 37.91, "lon": 40.22},
+        {"plaka": "22", "il": "Edirne", "id": "527", "lat": 41.68, "lon": 26.56},
+        {"plaka": "23", "il": "Elazığ", "id": "528", "lat": 38.68, "lon": 39.22},
+        {"plaka": "24", "il": "Erzincan", "id": "529", "lat": 39.75, "lon": 39.49},
+        {"plaka": "25", "il": "Erzurum", "id": "530", "lat": 39.90, "lon": 41.27},
+        {"plaka": "26", "il": "Eskişehir", "id": "531", "lat": 39.78, "lon": 30.52},
+        {"plaka": "27", "il": "Gaziantep", "id": "532", "lat": 37.07, "lon": 37.38},
+        {"plaka": "28", "il": "Giresun", "id": "533", "lat": 40.91, "lon": 38.39},
+        {"plaka": "29", "il": "Gümüşhane", "id": "534", "lat": 40.46, "lon": 39.48},
+        {"plaka": "30", "il": "Hakkari", "id": "535", "lat": 37.58, "lon": 43.74},
+        {"plaka": "31", "il": "Hatay", "id": "536", "lat": 36.20, "lon": 36.16},
+        {"plaka": "32", "il": "Isparta", "id": "538", "lat": 37.76, "lon": 30.55},
+        {"plaka": "33", "il": "Mersin", "id": "557", "lat": 36.80, "lon": 34.64},
+        {"plaka": "34", "il": "İstanbul", "id": "539", "lat": 41.01, "lon": 28.98},
+        {"plaka": "35", "il": "İzmir", "id": "540", "lat": 38.42, "lon": 27.14},
+        {"plaka": "36", "il": "Kars", "id": "544", "lat": 40.60, "lon": 43.10},
+        {"plaka": "37", "il": "Kastamonu", "id": "545", "lat": 41.38, "lon": 33.78},
+        {"plaka": "38", "il": "Kayseri", "id": "546", "lat": 38.72, "lon": 35.49},
+        {"plaka": "39", "il": "Kırklareli", "id": "549", "lat": 41.74, "lon": 27.23},
+        {"plaka": "40", "il": "Kırşehir", "id": "550", "lat": 39.15, "lon": 34.16},
+        {"plaka": "41", "il": "Kocaeli", "id": "551", "lat": 40.77, "lon": 29.92},
+        {"plaka": "42", "il": "Konya", "id": "552", "lat": 37.87, "lon": 32.48},
+        {"plaka": "43", "il": "Kütahya", "id": "553", "lat": 39.42, "lon": 29.98},
+        {"plaka": "44", "il": "Malatya", "id": "554", "lat": 38.35, "lon": 38.31},
+        {"plaka": "45", "il": "Manisa", "id": "555", "lat": 38.61, "lon": 27.43},
+        {"plaka": "46", "il": "K.Maraş", "id": "541", "lat": 37.58, "lon": 36.94},
+        {"plaka": "47", "il": "Mardin", "id": "556", "lat": 37.31, "lon": 40.74},
+        {"plaka": "48", "il": "Muğla", "id": "558", "lat": 37.22, "lon": 28.36},
+        {"plaka": "49", "il": "Muş", "id": "559", "lat": 38.74, "lon": 41.49},
+        {"plaka": "50", "il": "Nevşehir", "id": "560", "lat": 38.62, "lon": 34.71},
+        {"plaka": "51", "il": "Niğde", "id": "561", "lat": 37.97, "lon": 34.68},
+        {"plaka": "52", "il": "Ordu", "id": "562", "lat": 40.98, "lon": 37.88},
+        {"plaka": "53", "il": "Rize", "id": "564", "lat": 41.02, "lon": 40.52},
+        {"plaka": "54", "il": "Sakarya", "id": "565", "lat": 40.78, "lon": 30.40},
+        {"plaka": "55", "il": "Samsun", "id": "566", "lat": 41.29, "lon": 36.33},
+        {"plaka": "56", "il": "Siirt", "id": "568", "lat": 37.93, "lon": 41.94},
+        {"plaka": "57", "il": "Sinop", "id": "569", "lat": 42.03, "lon": 35.15},
+        {"plaka": "58", "il": "Sivas", "id": "571", "lat": 39.75, "lon": 37.02},
+        {"plaka": "59", "il": "Tekirdağ", "id": "572", "lat": 40.98, "lon": 27.51},
+        {"plaka": "60", "il": "Tokat", "id": "573", "lat": 40.31, "lon": 36.55},
+        {"plaka": "61", "il": "Trabzon", "id": "574", "lat": 41.00, "lon": 39.72},
+        {"plaka": "62", "il": "Tunceli", "id": "575", "lat": 39.11, "lon": 39.55},
+        {"plaka": "63", "il": "Şanlıurfa", "id": "567", "lat": 37.16, "lon": 38.79},
+        {"plaka": "64", "il": "Uşak", "id": "576", "lat": 38.68, "lon": 29.41},
+        {"plaka": "65", "il": "Van", "id": "577", "lat": 38.49, "lon": 43.38},
+        {"plaka": "66", "il": "Yozgat", "id": "579", "lat": 39.82, "lon": 34.81},
+        {"plaka": "67", "il": "Zonguldak", "id": "580", "lat": 41.45, "lon": 31.79},
+        {"plaka": "68", "il": "Aksaray", "id": "504", "lat": 38.37, "lon": 34.03},
+        {"plaka": "69", "il": "Bayburt", "id": "514", "lat": 40.26, "lon": 40.23},
+        {"plaka": "70", "il": "Karaman", "id": "543", "lat": 37.18, "lon": 33.22},
+        {"plaka": "71", "il": "Kırıkkale", "id": "548", "lat": 39.85, "lon": 33.51},
+        {"plaka": "72", "il": "Batman", "id": "513", "lat": 37.88, "lon": 41.13},
+        {"plaka": "73", "il": "Şırnak", "id": "570", "lat": 37.52, "lon": 42.46},
+        {"plaka": "74", "il": "Bartın", "id": "512", "lat": 41.64, "lon": 32.34},
+        {"plaka": "75", "il": "Ardahan", "id": "508", "lat": 41.11, "lon": 42.70},
+        {"plaka": "76", "il": "Iğdır", "id": "537", "lat": 39.92, "lon": 44.05},
+        {"plaka": "77", "il": "Yalova", "id": "578", "lat": 40.66, "lon": 29.27},
+        {"plaka": "78", "il": "Karabük", "id": "542", "lat": 41.20, "lon": 32.63},
+        {"plaka": "79", "il": "Kilis", "id": "547", "lat": 36.72, "lon": 37.12},
+        {"plaka": "80", "il": "Osmaniye", "id": "563", "lat": 37.07, "lon": 36.25},
+        {"plaka": "81", "il": "Düzce", "id": "526", "lat": 40.84, "lon": 31.16}
     ]
 
     _default_settings = {
@@ -398,14 +1941,72 @@ class Tools:
                     "always_on_top": True,
                     "snap_distance": 20,
                     "orientation": "horizontal", 
-                    "show_seconds": True}
+                    "show_seconds": True,
+                    "refresh": "adaptive"},
+        "RUNTIME": {"lean": False},
+        # Günlük düzeyi (DEBUG, INFO, WARNING, ERROR) ve app.log döndürme sınırları
+        "LOGGING": {"level": "INFO", "max_kb": 1024, "backups": 3},
+        # Ek konumlar: [{"city": {...}, "district": {...}, "label": "Ankara Şube", "position": {...}}]
+        "LOCATIONS": []
     }
 
-    @staticmethod
-    def configure_logging(log_level="INFO"):
+    @classmethod
+    def set_base_dir(cls, base_dir):
+        """Veri dosyalarını başka bir dizinden oku (başsız kip: cron, servis)"""
+        cls.BASE_DIR = Path(base_dir).resolve()
+        for name, file_name in [("LOG_FILE", "app.log"), ("SETTINGS", "ayarlar.json"),
+                                ("PRAYER_TIMES", "vakitler.json"), ("PRAYER_STORE", "vakitler.bin"),
+                                ("DISTRICTS", "ilceler.json"), ("SNAPSHOT", "baslangic.json")]:
+            setattr(cls, name, cls.BASE_DIR / file_name)
+
+    @classmethod
+    def configure_logging(cls, log_level=None):
+        """Kayıtları kuyruğa al; dosyaya yazım ve boyuta göre döndürme ayrı iş parçacığında yapılır
+
+        log_level verilmezse düzey ve döndürme ayarları ayarlar.json'daki LOGGING bölümünden okunur.
+        """
+        import logging.handlers
         # log_format = "%(asctime)s [%(levelname)s] [%(filename)s:%(funcName)s] - %(message)s"
         log_format = "%(asctime)s [%(levelname)s] [%(filename)-15s:%(funcName)-30s] - %(message)s"
-        logger.basicConfig(filename=Tools.LOG_FILE, level=log_level, format=log_format, force=True)
+        cls.stop_logging()  # Yeniden yapılandırılıyorsa bekleyen kayıtlar eski dosyaya yazılır
+        atexit.unregister(cls.stop_logging)
+        atexit.register(cls.stop_logging)  # Çıkışta kuyruktakiler kaybolmasın
+        defaults = cls._default_settings["LOGGING"]
+        file_handler = logging.handlers.RotatingFileHandler(
+            cls.LOG_FILE, maxBytes=defaults["max_kb"] * 1024, backupCount=defaults["backups"],
+            encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(logger.Formatter(log_format))
+        log_queue = queue.SimpleQueue()
+        cls._log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+        cls._log_listener.start()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logger.Formatter("%(message)s"))  # Satır biçimi dosya tarafında
+        logger.basicConfig(level=log_level or defaults["level"], handlers=[queue_handler], force=True)
+        if log_level is None:
+            cls.apply_logging_settings(cls.get_settings())
+
+    @classmethod
+    def stop_logging(cls):
+        """Kuyruktaki kayıtları dosyaya yaz ve yazıcı iş parçacığını durdur"""
+        if cls._log_listener is not None:
+            cls._log_listener.stop()
+            cls._log_listener = None
+
+    @classmethod
+    def apply_logging_settings(cls, settings):
+        """Ayarlardaki günlük düzeyini ve döndürme sınırlarını çalışan kayıt hattına uygula"""
+        if cls._log_listener is None:
+            return
+        options = {**cls._default_settings["LOGGING"], **settings.get("LOGGING", {})}
+        level = logger.getLevelName(str(options["level"]).upper())
+        if not isinstance(level, int):
+            logger.warning("Geçersiz günlük düzeyi: %s, INFO kullanılıyor", options["level"])
+            level = logger.INFO
+        logger.getLogger().setLevel(level)
+        file_handler = cls._log_listener.handlers[0]
+        file_handler.maxBytes = int(options["max_kb"]) * 1024
+        file_handler.backupCount = int(options["backups"])
 
     @classmethod
     def get_settings(cls):
@@ -413,25 +2014,267 @@ class Tools:
             cls._settings = cls.load_json(cls.SETTINGS) or cls.create_default_settings()
         return cls._settings
 
+    @classmethod
+    def load_snapshot(cls):
+        """Sıcak başlangıç anlık görüntüsünü döndür; yoksa veya eksikse None"""
+        if not cls.SNAPSHOT.exists():
+            return None
+        snapshot = cls.load_json(cls.SNAPSHOT)
+        try:
+            snapshot["settings"]["COLORS"]["standard"]["background"]
+            snapshot["settings"]["FONTS"]["clock"]["family"]
+            snapshot["settings"]["DISPLAY"]["position"]
+            return snapshot
+        except (KeyError, TypeError):
+            return None
+
+    @classmethod
+    def save_snapshot(cls, snapshot):
+        cls.get_writer().write(cls.SNAPSHOT, snapshot)
+
+    @staticmethod
+    def load_theme(root, themename="darkly"):
+        """ttkbootstrap temasını ilk ihtiyaç anında (ayarlar penceresi) yükle
+
+        Tema yüklendikten sonra süreç boyunca kalır: Tk bir ttk temasını silemez, ttkbootstrap'in Style
+        nesnesi de süreç genelinde tektir. Yalın kip pencereyi ve ağ kaynaklarını bırakır, temayı bırakamaz.
+        """
+        if getattr(root, '_theme_loaded', False):
+            return
+        from ttkbootstrap.window import apply_class_bindings, apply_all_bindings
+        apply_class_bindings(root)
+        apply_all_bindings(root)
+        ttk.Style(themename)
+        root._theme_loaded = True
+
     @classmethod
     def get_cities(cls):
         return cls._cities
 
+    @classmethod
+    def get_district_cache(cls):
+        if cls._district_cache is None:
+            cls._district_cache = DistrictCache(cls.DISTRICTS)
+        return cls._district_cache
+
     @classmethod
     def get_prayer_times(cls):
-        if cls._prayer_times is None:
-            cls._prayer_times = cls.load_json(cls.PRAYER_TIMES) or {}
+        district_id = str(cls.get_settings()['LOCATION']['district']['id'])
+        if cls._prayer_times is None or cls._prayer_times_district != district_id:
+            owner, times = cls._prayer_times_data()
+            if owner != district_id:
+                # Konum değişti, dosya yenilenene kadar depo veya hesaplanan vakitler kullanılır
+                logger.info("vakitler.json %s ilçesine ait, %s için kullanılmıyor", owner, district_id)
+                times = {}
+            cls._prayer_times, cls._prayer_times_district = times, district_id
+            cls._prayer_index = cls._build_prayer_index(times)
         return cls._prayer_times
 
     @classmethod
-    def update_prayer_times(cls, new_times):
-        cls.save_json(cls.PRAYER_TIMES, new_times)
-        cls._prayer_times = new_times
+    def _prayer_times_data(cls):
+        """vakitler.json içeriği (ilçe id, vakitler); ilçe kaydı olmayan eski dosyalar ayarlardaki ilçeye ait sayılır"""
+        if cls._prayer_times_file is None:
+            owner, times = cls.load_prayer_times()
+            cls._prayer_times_file = (str(owner or cls.get_settings()['LOCATION']['district']['id']), times)
+        return cls._prayer_times_file
+
+    @staticmethod
+    def load_prayer_times(path=None):
+        """vakitler.json biçimindeki dosyayı (ilçe id veya None, {"YYYY-MM-DD": [...]}) olarak oku"""
+        times = Tools.load_json(Path(path or Tools.PRAYER_TIMES)) or {}
+        return times.pop("district", None), times
+
+    @classmethod
+    def _build_prayer_index(cls, prayer_times):
+        # vakitler.json bugünü kapsamıyorsa ve depoda daha uzun veri varsa depodan derle
+        index = PrayerIndex(prayer_times)
+        district_id = cls.get_settings()['LOCATION']['district']['id']
+        if (index.last or 0) <= time.time() and cls.PRAYER_STORE.exists():
+            stored = PrayerIndex.from_store(cls.get_prayer_store(), district_id)
+            if (stored.last or 0) > (index.last or 0):
+                logger.info("Vakitler %s deposundan okunuyor (%s)", cls.PRAYER_STORE.name, district_id)
+                index = stored
+        return cls._with_fallback(index, district_id)
+
+    @classmethod
+    def _with_fallback(cls, index, district_id):
+        cls.extend_fallback(index, district_id)
+        return index
+
+    @classmethod
+    def extend_fallback(cls, index, district_id, now=None):
+        """İndeks (indirilen veri veya önceki hesap) bir gün içinde bitiyorsa sonraki günleri hesaplanan vakitlerle tamamla
+
+        Uzun süre yenilenemeyen süreçte indeks yeniden derlenmeden yerinde uzatılır; gün eklendiyse True döner.
+        """
+        now = time.time() if now is None else now
+        if (index.last or 0) > now + 86400 or not (coordinates := cls.coordinates(district_id)):
+            return False
+        today = date.fromtimestamp(now)
+        yesterday = today - timedelta(days=1)
+        start = max(date.fromtimestamp(index.last) + timedelta(days=1), yesterday) if index.last else yesterday
+        end = today + timedelta(days=PrayerCalculator.FALLBACK_DAYS)
+        try:
+            index.extend(PrayerCalculator.days(*coordinates, start, end))
+        except ImportError:
+            logger.warning("NumPy kurulu değil, vakitler hesaplanamıyor")
+            return False
+        logger.warning("Vakit verisi yok, %s tarihinden itibaren hesaplanan vakitler kullanılıyor (%s)", start, district_id)
+        return True
+
+    @classmethod
+    def coordinates(cls, district_id):
+        """İlçenin (enlem, boylam) değeri: ayarlarda verildiyse o, yoksa bağlı olduğu il merkezi"""
+        settings = cls.get_settings()
+        city_id = None
+        for location in [settings['LOCATION'], *settings.get('LOCATIONS', [])]:
+            if str(location['district']['id']) == str(district_id):
+                if point := location.get('coordinates'):
+                    return point['lat'], point['lon']
+                city_id = location['city']['id']
+                break
+        if city_id is None and cls.DISTRICTS.exists():
+            city_id = cls.get_district_cache().city_of(district_id)
+        city = next((c for c in cls._cities if c['id'] == str(city_id)), None)
+        return (city['lat'], city['lon']) if city else None
+
+    @classmethod
+    def get_prayer_store(cls):
+        if cls._prayer_store is None:
+            cls._prayer_store = PrayerStore(cls.PRAYER_STORE)
+        return cls._prayer_store
+
+    @classmethod
+    def get_location_index(cls, district_id):
+        """Ek konumların indeksi doğrudan ortak ikili depodan derlenir"""
+        return cls._with_fallback(PrayerIndex.from_store(cls.get_prayer_store(), district_id), district_id)
+
+    @classmethod
+    def get_district_index(cls, district_id=None):
+        """Birincil konum için yüklü indeksi, diğer ilçeler için depodan derlenen indeksi döndür"""
+        if district_id is None or str(district_id) == str(cls.get_settings()['LOCATION']['district']['id']):
+            return cls.get_prayer_index()
+        return cls.get_location_index(district_id)
+
+    @classmethod
+    def get_day_times(cls, district_id=None, day=None):
+        """Bir günün vakitlerini ["HH:MM", ...] olarak döndür, veri yoksa None"""
+        return cls.get_day_times_source(district_id, day)[0]
+
+    @classmethod
+    def get_day_times_source(cls, district_id=None, day=None):
+        """Bir günün vakitleri ve kaynağı: (["HH:MM", ...], "diyanet" veya "calculated"), veri yoksa (None, None)"""
+        day = day or date.today()
+        if district_id is None or str(district_id) == str(cls.get_settings()['LOCATION']['district']['id']):
+            if times := cls.get_prayer_times().get(day.isoformat()):
+                return times, "diyanet"
+            district_id = cls.get_settings()['LOCATION']['district']['id']
+        source = "diyanet"
+        minutes = cls.get_prayer_store().get_day(district_id, day) if cls.PRAYER_STORE.exists() else None
+        if minutes is None and (coordinates := cls.coordinates(district_id)):
+            try:  # İndirilmiş veri yoksa hesaplanan vakitler
+                minutes, source = PrayerCalculator.days(*coordinates, day, day)[0][1], "calculated"
+            except ImportError:
+                pass
+        return ([cls.to_clock(m) for m in minutes], source) if minutes else (None, None)
+
+    @classmethod
+    def prayer_state(cls, district_id=None, now=None):
+        """Bir sonraki vakit, kalan süre ve bugünün vakitleri (başsız kip ve yerel servis için)"""
+        now = time.time() if now is None else now
+        district_id = str(district_id or cls.get_settings()['LOCATION']['district']['id'])
+        today = date.fromtimestamp(now)
+        state = {"district": district_id, "date": today.isoformat(), "generated": int(now),
+                 "next": None, "remaining": None, "today": None, "source": None}
+        # Kaynak: "diyanet" (indirilen veri) veya "calculated" (veri bitince hesaplanan vakitler)
+        sources = set()
+        times, source = cls.get_day_times_source(district_id, today)
+        if times:
+            state["today"] = dict(zip(cls.PRAYER_NAMES, times))
+            sources.add(source)
+        index = cls.get_district_index(district_id)
+        cls.extend_fallback(index, district_id, now)  # Süreç uzun süre yenileme yapamadıysa
+        if entry := index.next_entry(now):
+            stamp, slot = entry
+            hours, minutes, seconds = cls.remaining_time(stamp, now)
+            source = "calculated" if index.is_calculated(stamp) else "diyanet"
+            sources.add(source)
+            state["next"] = {"name": cls.PRAYER_NAMES[slot], "slot": slot, "epoch": stamp,
+                             "time": datetime.fromtimestamp(stamp).isoformat(timespec="minutes"),
+                             "source": source}
+            state["remaining"] = {"seconds": int(max(0, stamp - now)),
+                                  "text": f"{hours}:{minutes:02}:{seconds:02}"}
+        if sources:
+            state["source"] = "calculated" if "calculated" in sources else "diyanet"
+        return state
+
+    @classmethod
+    def get_prayer_index(cls):
+        """Vakitler dosyası yüklenirken bir kez derlenen indeksi döndür"""
+        cls.get_prayer_times()
+        return cls._prayer_index
+
+    @classmethod
+    def get_writer(cls):
+        if cls._writer is None:
+            cls._writer = WriteBehind()
+        return cls._writer
+
+    @classmethod
+    def get_diagnostics(cls):
+        if cls._diagnostics is None:
+            cls._diagnostics = Diagnostics()
+        return cls._diagnostics
+
+    @classmethod
+    def get_profiler(cls):
+        if cls._profiler is None:
+            cls._profiler = Profiler()
+        return cls._profiler
+
+    @classmethod
+    def register_gauges(cls, scheduler, root=None):
+        """Tanılamada yalnızca okunurken hesaplanan anlık değerler"""
+        diagnostics = cls.get_diagnostics()
+        diagnostics.gauge("timers.scheduler", lambda: scheduler.pending)
+        if root is not None:  # Seher dışındaki (ttkbootstrap vb.) after işleri dahil
+            diagnostics.gauge("timers.tk_after", lambda: len(root.tk.call("after", "info")))
+        diagnostics.gauge("memory.rss_mb", lambda: round(cls.memory_usage() / 1048576, 1))
+
+    @classmethod
+    def update_prayer_times(cls, new_times, district_id):
+        """vakitler.json'u district_id ilçesinin vakitleriyle değiştir"""
+        district_id = str(district_id)
+        cls.get_writer().write(cls.PRAYER_TIMES, {"district": district_id, **new_times})
+        cls._prayer_times_file = (district_id, new_times)
+        cls._prayer_times = None  # İndeks bir sonraki okumada ayarlardaki ilçe için derlenir
+
+    @classmethod
+    def merge_prayer_times(cls, new_times, district_id, keep_days=7):
+        """Yeni günleri aynı ilçenin kayıtlarıyla birleştir, keep_days günden eskileri at
+
+        Dosya başka bir ilçeye aitse birleştirilmez, yerine yazılır. Yeni gün gelmediyse False döner.
+        """
+        district_id = str(district_id)
+        owner, current = cls._prayer_times_data()
+        if owner != district_id:
+            logger.info("vakitler.json %s ilçesinden %s ilçesine geçiyor", owner, district_id)
+            current = {}
+        cutoff = date.fromordinal(date.today().toordinal() - keep_days).isoformat()
+        merged = {day: times for day, times in current.items() if day >= cutoff}
+        merged.update(new_times)
+        merged = dict(sorted(merged.items()))
+        if owner == district_id and merged == current:
+            return False
+        cls.update_prayer_times(merged, district_id)
+        return True
 
     @classmethod
     def update_settings(cls, new_settings):
-        cls.save_json(cls.SETTINGS, new_settings)
+        # Sürükleme, renk ve süre değişiklikleri art arda gelir; tek yazımda birleştirilir
+        cls.get_writer().write(cls.SETTINGS, new_settings)
         cls._settings = new_settings
+        cls.apply_logging_settings(new_settings)
 
     @classmethod
     def create_default_settings(cls):
@@ -443,56 +2286,117 @@ class Tools:
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 data = json.load(file)
-                logger.info(f"{file_path.name} dosyası başarıyla yüklendi.")
+                logger.info("%s dosyası başarıyla yüklendi.", file_path.name)
                 return data
         except FileNotFoundError:
-            logger.error(f"{file_path.name} dosyası bulunamadı.")
+            logger.error("%s dosyası bulunamadı.", file_path.name)
         except json.JSONDecodeError:
-            logger.error(f"{file_path.name} dosyasında JSON okuma hatası.")
+            logger.error("%s dosyasında JSON okuma hatası.", file_path.name)
         return None
 
     @staticmethod
     def save_json(file_path, data):
-        with open(file_path, 'w', encoding='utf-8') as file:
+        # Önce geçici dosyaya yaz, sonra tek adımda yer değiştir; yarım kalan yazım dosyayı bozmaz
+        temp_path = file_path.with_name(file_path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as file:
             json.dump(data, file, ensure_ascii=False, separators=(',', ':'))
-            logger.info(f"{file_path} dosyası kaydedildi.")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+        logger.info("%s dosyası kaydedildi.", file_path)
 
 
 
-    @staticmethod
-    def find_next_prayer_time2(prayer_times):
-        now = datetime.now()
-        for day, times in prayer_times.items(): # {"2021-08-01": ["05:00", "13:00", ...]}
-            for time_str in times: # "05:00"
-                prayer_dt = datetime.strptime(f"{day} {time_str}", "%Y-%m-%d %H:%M")
-                if prayer_dt > now: # Eğer bulunan vakit şu andan ileriyse
-                    return prayer_dt
-        return None  # Eğer uygun vakit bulunamazsa None döner
+    @classmethod
+    def find_next_prayer_time(cls, prayer_times):
+        # Yüklü vakitler için hazır indeksi kullan, diğerleri için yeni indeks derle
+        if prayer_times is cls._prayer_times and cls._prayer_index is not None:
+            index = cls._prayer_index
+        else:
+            index = PrayerIndex(prayer_times)
+        return index.next_prayer_time(datetime.now())
 
     @staticmethod
-    def find_next_prayer_time(prayer_times):
-        now = datetime.now()
-        today_str = now.date().isoformat() # "2021-08-01"
-        tomorrow_str = (now + timedelta(days=1)).date().isoformat() # "2021-08-02"
-
-        for time_str in prayer_times.get(today_str, []):
-            prayer_dt = datetime.strptime(f"{today_str} {time_str}", "%Y-%m-%d %H:%M")
-            if prayer_dt > now:
-                return prayer_dt
+    def to_minutes(clock):
+        """"HH:MM" metnini gece yarısından itibaren dakikaya çevir"""
+        hour, minute = clock.split(":")
+        return int(hour) * 60 + int(minute)
 
-        if prayer_times.get(tomorrow_str):
-            return datetime.strptime(f"{tomorrow_str} {prayer_times.get(tomorrow_str)[0]}", "%Y-%m-%d %H:%M")
-
-        return None
+    @staticmethod
+    def to_clock(minutes):
+        return f"{minutes // 60:02}:{minutes % 60:02}"
 
     @staticmethod
-    def remaining_time(target_time: datetime):
-        delta = target_time - datetime.now()
-        total_minutes, seconds = divmod(delta.seconds, 60)
+    def remaining_time(target_time, now=None):
+        """target_time datetime veya epoch olabilir; (saat, dakika, saniye) döndürür"""
+        if isinstance(target_time, datetime):
+            target_time = target_time.timestamp()
+        remaining = max(0, int(target_time - (time.time() if now is None else now)))
+        total_minutes, seconds = divmod(remaining, 60)
         hours, minutes = divmod(total_minutes, 60)
         # return f"{hours}:{minutes:02}:{seconds:02}".split(":")
         return hours, minutes, seconds
 
+    @staticmethod
+    def memory_usage():
+        """Sürecin yerleşik belleğini (RSS) bayt olarak döndür, okunamazsa 0"""
+        try:
+            if sys.platform == "win32":
+                import ctypes
+                from ctypes import wintypes
+
+                class Counters(ctypes.Structure):
+                    _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                        (name, ctypes.c_size_t) for name in (
+                            "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                            "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                            "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+                counters = Counters()
+                counters.cb = ctypes.sizeof(counters)
+                handle = ctypes.windll.kernel32.GetCurrentProcess()
+                if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                    return counters.WorkingSetSize
+                return 0
+            with open("/proc/self/statm") as file:
+                return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, AttributeError, ValueError):
+            try:
+                import resource  # macOS: yalnızca tepe değer okunabilir
+                return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            except ImportError:
+                return 0
+
+    @staticmethod
+    def trim_memory():
+        """Serbest bırakılan belleği işletim sistemine iade et (Windows/glibc)"""
+        try:
+            import ctypes
+            if sys.platform == "win32":
+                ctypes.windll.psapi.EmptyWorkingSet(ctypes.windll.kernel32.GetCurrentProcess())
+            elif sys.platform.startswith("linux"):
+                ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+    @staticmethod
+    def is_session_locked():
+        """Windows'ta oturum kilitliyse True döndür, diğer sistemlerde False"""
+        if sys.platform != "win32":
+            return False
+        try:
+            import ctypes
+            user32 = ctypes.windll.user32
+            desktop = user32.OpenInputDesktop(0, False, 0x0100)  # DESKTOP_SWITCHDESKTOP
+            if not desktop:
+                return True
+            try:
+                return not user32.SwitchDesktop(desktop)
+            finally:
+                user32.CloseDesktop(desktop)
+        except (AttributeError, OSError):
+            return False
+
     @staticmethod
     def _fill_missing_settings(defaults, current):
         """Yalnızca eksik ayarları varsayılanlarla doldurur, mevcut ayarları değiştirmez."""
@@ -508,7 +2412,7 @@ class Tools:
     def validate_and_fix_settings(self):
         logger.info("Ayarlar kontrol ediliyor...")
         current_settings = self.get_settings() or {}
-        modified_settings = current_settings.copy()  # Elle değiştirilmiş ayarları koruyacak kopya
+        modified_settings = copy.deepcopy(current_settings)  # Elle değiştirilmiş ayarları koruyacak kopya
 
         # Sadece eksik anahtarları doldur
         self._fill_missing_settings(self._default_settings, modified_settings)
@@ -519,19 +2423,104 @@ class Tools:
 
         return modified_settings
 
+class ColorPicker:
+    """Renk seçici diyaloğu bir kez kurar; kapatıldığında yok etmek yerine gizler
+
+    Yeniden kullanım ttkbootstrap'in iç ayrıntılarına dayanır (1.10 ile denendi). Bunlar
+    bulunamazsa her seçimde genel ColorChooserDialog.show()/result yoluna geri düşülür.
+    """
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.dialog = None
+        self.result = None
+        try:
+            self._build()
+        except (AttributeError, IndexError, tk.TclError) as e:
+            logger.warning("Renk seçici yeniden kullanılamıyor, her seferinde yeniden kurulacak: %s", e)
+            self.destroy()
+
+    def _build(self):
+        from ttkbootstrap.dialogs.colorchooser import ColorChooserDialog
+        from ttkbootstrap.localization import MessageCatalog
+        dialog = ColorChooserDialog(parent=self.parent)
+        self.dialog = dialog
+        dialog.build()
+        self.top = dialog._toplevel
+        chooser = dialog.colorchooser
+        # "Mevcut" renk kutusu önizleme kabında "Yeni" kutusundan önce gelir
+        self._current = chooser.preview.master.winfo_children()[0].winfo_children()[0]
+        for name in ('hex', 'sync_color_values', 'update_luminance_scale',
+                     'update_spectrum_indicator', 'preview_lbl'):
+            getattr(chooser, name)
+        self._locate = dialog._locate
+        # Tamam/İptal/Esc ve pencere kapatma düğmesi diyaloğu yalnızca gizler
+        dialog.on_button_press = self._on_button
+        self.top.bind("<Escape>", lambda _: self._hide())
+        self.top.protocol("WM_DELETE_WINDOW", self._hide)
+        self._ok_text = MessageCatalog.translate('OK')
+        self._done = tk.BooleanVar(self.top, False)
+
+    def ask(self, color):
+        """Diyaloğu verilen renkle göster; seçilen hex rengini ya da None döndür"""
+        if self.dialog is None:
+            return self._ask_once(color)
+        chooser = self.dialog.colorchooser
+        chooser.hex.set(color)
+        chooser.sync_color_values('hex')
+        chooser.update_luminance_scale()
+        chooser.update_spectrum_indicator()
+        self._current.configure(bg=color, fg=chooser.preview_lbl.cget('fg'))
+        self.result = None
+        self._locate()
+        self.top.deiconify()
+        self.top.grab_set()
+        self.top.focus_force()
+        self.top.wait_variable(self._done)
+        return self.result
+
+    def _ask_once(self, color):
+        """Genel API ile tek kullanımlık diyalog"""
+        from ttkbootstrap.dialogs.colorchooser import ColorChooserDialog
+        dialog = ColorChooserDialog(parent=self.parent, initialcolor=color)
+        dialog.show()
+        return dialog.result.hex if dialog.result else None
+
+    def _on_button(self, button):
+        if button.cget('text') == self._ok_text:
+            self.result = self.dialog.colorchooser.hex.get()
+        self._hide()
+
+    def _hide(self):
+        self.top.grab_release()
+        self.top.withdraw()
+        self._done.set(True)
+
+    def destroy(self):
+        top = getattr(self.dialog, '_toplevel', None)
+        self.dialog = None
+        if top is not None:
+            top.destroy()
+
+
 class SettingsWindow:
-    def __init__(self, root):
+    def __init__(self, root, visible=True):
         self.root = root
+        Tools.load_theme(root)
         self._settings = Tools.get_settings()
         self.district_mapping = {}
+        self.tasks = getattr(root, 'tasks', None) or TaskRunner(Scheduler(root))
+        self._color_picker = None
         
-        # Ana pencere ayarları
+        # Ana pencere ayarları; kurulum bitene kadar gizli
         self.window = ttk.Toplevel(self.root)
+        self.window.withdraw()
         self.window.title("Ayarlar")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
         
         # Pencere konumu ve boyutu
         screen_x, screen_y = self.window.winfo_screenwidth(), self.window.winfo_screenheight()
-        self.window.geometry(f"400x600+{screen_x//2-200}+{screen_y//2-300}")
+        self.window.geometry(f"400x720+{screen_x//2-200}+{screen_y//2-360}")
         self.window.resizable(False, False)
         
         # Ana container
@@ -540,18 +2529,26 @@ class SettingsWindow:
         
         # Mevcut konum bilgisi
         loc = self._settings['LOCATION']
-        ttk.Label(
+        self.location_label = ttk.Label(
             self.main_frame,
             text=f"Aktif Konum: {loc['district']['name']} / {loc['city']['name']}",
             # style="primary.TLabel",
             # font=("Segoe Ui", 11, "bold"),
             font=(11)
-        ).pack(pady=5)
+        )
+        self.location_label.pack(pady=5)
+
+        # Sekmeler: ayarlar ve tanılama
+        self.notebook = ttk.Notebook(self.main_frame)
+        self.notebook.pack(fill=BOTH, expand=YES)
+        self.settings_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.settings_tab, text="Ayarlar")
         
         # LabelFrame'leri oluştur
         self._create_location_frame()
         self._create_display_frame()
         self._create_colors_frame()
+        self._create_diagnostics_tab()
         
         # Status bar
         self.status = ttk.Label(
@@ -561,6 +2558,10 @@ class SettingsWindow:
         )
         self.status.pack(pady=10)
 
+        # Tanılama: süreç belleği (RSS)
+        self.memory_label = ttk.Label(self.main_frame, text="", bootstyle="secondary")
+        self.memory_label.pack()
+
         # Renklerin var olduğundan emin ol
         if 'COLORS' not in self._settings:
             self._settings['COLORS'] = {
@@ -569,9 +2570,45 @@ class SettingsWindow:
                 'critical': {'background': "#1053c2", "text": "#f0f0f0", "trigger": 15 }
             }
 
+        if visible:
+            self.show()
+
+    def show(self):
+        """Kurulu pencereyi güncel ayarlarla göster"""
+        self.refresh()
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus_force()
+        self._update_memory()
+
+    def refresh(self):
+        """Pencere içeriğini kayıtlı ayarlardan yenile (gizliyken değişmiş olabilir)"""
+        self._settings = Tools.get_settings()
+        loc = self._settings['LOCATION']
+        self.location_label.configure(text=f"Aktif Konum: {loc['district']['name']} / {loc['city']['name']}")
+
+        self.city_entry.delete(0, "end")
+        if current_city := next((c for c in Tools.get_cities() if c['id'] == loc['city']['id']), None):
+            self.city_entry.insert(0, current_city['plaka'])
+        self.district_combo.set(loc['district']['name'])
+
+        display = self._settings['DISPLAY']
+        self.direction_var.set(display['orientation'])
+        self.seconds_var.set("Göster" if display.get('show_seconds', True) else "Gizle")
+        self.refresh_var.set(display.get('refresh', "adaptive"))
+        self.lean_var.set("lean" if self._settings.get('RUNTIME', {}).get('lean') else "normal")
+
+        colors = self._settings['COLORS']
+        for (key, color_type), patch in self.color_patches.items():
+            patch.configure(bg=colors[key][color_type])
+        for key, trigger_var in self.trigger_vars.items():
+            trigger_var.set(str(colors[key].get('trigger', 45 if key == 'warning' else 15)))
+
+        self.status.configure(text="Hazır", bootstyle="default")
+
     def _create_location_frame(self):
         location_frame = ttk.LabelFrame(
-            self.main_frame, 
+            self.settings_tab,
             text="Konum Ayarları",
             padding=10
         )
@@ -602,13 +2639,14 @@ class SettingsWindow:
                             if c['id'] == self._settings['LOCATION']['city']['id']), None):
             self.city_entry.insert(0, current_city['plaka'])
         
-        ttk.Button(
+        self.fetch_button = ttk.Button(
             city_frame,
             text="İlçeleri Getir",
             command=self._fetch_districts,
             style="primary.TButton",
             width=BUTTON_WIDTH
-        ).pack(side=RIGHT, padx=5)
+        )
+        self.fetch_button.pack(side=RIGHT, padx=5)
         
         # İlçe seçimi
         district_frame = ttk.Frame(location_frame)
@@ -638,55 +2676,14 @@ class SettingsWindow:
         ).pack(side=RIGHT, padx=5)
         
         # Vakitleri güncelle butonu
-        ttk.Button(
+        self.update_button = ttk.Button(
             location_frame,
             text="Vakitleri Güncelle",
             command=self._update_times,
             style="info.TButton",
             width=BUTTON_WIDTH
-        ).pack(pady=10)
-
-    def _create_display_frame(self):
-        self.direction_var = ttk.StringVar(value=self._settings['DISPLAY']['orientation'])
-        self.seconds_var = ttk.StringVar(
-            value="Göster" if self._settings['DISPLAY'].get('show_seconds', True) else "Gizle"
         )
-        display_frame = ttk.LabelFrame(
-            self.main_frame,
-            text="Görünüm Ayarları",
-            padding=10
-        )
-        display_frame.pack(fill=X, padx=5, pady=5)
-        
-        # Yön seçimi (Yatay/Dikey)
-        orientation_frame = ttk.Frame(display_frame)
-        orientation_frame.pack(fill=X, pady=5)
-        
-        ttk.Label(orientation_frame, text="Görünüm:").pack(side=LEFT, padx=5)
-        
-        for text, val in [("Yatay", "horizontal"), ("Dikey", "vertical")]:
-            ttk.Radiobutton(
-                orientation_frame,
-                text=text,
-                variable=self.direction_var,
-                value=val,
-                command=self._save_display
-            ).pack(side=LEFT, padx=10)
-        
-        # Saniye gösterimi
-        seconds_frame = ttk.Frame(display_frame)
-        seconds_frame.pack(fill=X, pady=5)
-        
-        ttk.Label(seconds_frame, text="Saniye:").pack(side=LEFT, padx=5)
-        
-        for text in ["Göster", "Gizle"]:
-            ttk.Radiobutton(
-                seconds_frame,
-                text=text,
-                variable=self.seconds_var,
-                value=text,
-                command=self._save_display
-            ).pack(side=LEFT, padx=10)
+        self.update_button.pack(pady=10)
 
     def _create_display_frame(self):
         # Sabit genişlik değerleri
@@ -697,9 +2694,13 @@ class SettingsWindow:
         self.seconds_var = ttk.StringVar(
             value="Göster" if self._settings['DISPLAY'].get('show_seconds', True) else "Gizle"
         )
+        self.refresh_var = ttk.StringVar(value=self._settings['DISPLAY'].get('refresh', "adaptive"))
+        self.lean_var = ttk.StringVar(
+            value="lean" if self._settings.get('RUNTIME', {}).get('lean') else "normal"
+        )
         
         display_frame = ttk.LabelFrame(
-            self.main_frame,
+            self.settings_tab,
             text="Görünüm Ayarları",
             padding=10
         )
@@ -749,9 +2750,53 @@ class SettingsWindow:
                 command=self._save_display
             ).pack(side=LEFT, padx=RADIO_PADDING)
 
+        # Yenileme kipi (Uyarlamalı/Sabit)
+        refresh_frame = ttk.Frame(display_frame)
+        refresh_frame.pack(fill=X, pady=5)
+
+        ttk.Label(
+            refresh_frame,
+            text="Yenileme:",
+            width=LABEL_WIDTH
+        ).pack(side=LEFT, padx=5)
+
+        radio_frame3 = ttk.Frame(refresh_frame)
+        radio_frame3.pack(side=LEFT, fill=X)
+
+        for text, val in [("Uyarlamalı", "adaptive"), ("Sabit", "fixed")]:
+            ttk.Radiobutton(
+                radio_frame3,
+                text=text,
+                variable=self.refresh_var,
+                value=val,
+                command=self._save_display
+            ).pack(side=LEFT, padx=RADIO_PADDING)
+
+        # Bellek kipi (Normal/Yalın)
+        memory_frame = ttk.Frame(display_frame)
+        memory_frame.pack(fill=X, pady=5)
+
+        ttk.Label(
+            memory_frame,
+            text="Bellek:",
+            width=LABEL_WIDTH
+        ).pack(side=LEFT, padx=5)
+
+        radio_frame4 = ttk.Frame(memory_frame)
+        radio_frame4.pack(side=LEFT, fill=X)
+
+        for text, val in [("Normal", "normal"), ("Yalın", "lean")]:
+            ttk.Radiobutton(
+                radio_frame4,
+                text=text,
+                variable=self.lean_var,
+                value=val,
+                command=self._save_runtime
+            ).pack(side=LEFT, padx=RADIO_PADDING)
+
     def _create_colors_frame(self):
         colors_frame = ttk.LabelFrame(
-            self.main_frame,
+            self.settings_tab,
             text="Renk Ayarları",
             padding=10
         )
@@ -765,6 +2810,7 @@ class SettingsWindow:
         
         row = 1
         self.color_patches = {}  # Renk kutularını saklamak için dictionary
+        self.trigger_vars = {}
         
         # paint_icon = "🎨"  # Emoji kullanımı
         # paint_icon = "🌈"
@@ -804,7 +2850,7 @@ class SettingsWindow:
                     
                 except Exception as e:
                     print(f"Hata: {key} - {color_type}: {e}")
-                    logger.error(f"Renk kutusunu oluştururken hata: {e}")
+                    logger.error("Renk kutusunu oluştururken hata: %s", e)
             
             # Trigger input'u (sadece warning ve critical için)
             if key in ['warning', 'critical']:
@@ -815,6 +2861,7 @@ class SettingsWindow:
                 current_trigger = self._settings['COLORS'][key].get('trigger', 45 if key == 'warning' else 15)
                 
                 trigger_var = tk.StringVar(value=str(current_trigger))
+                self.trigger_vars[key] = trigger_var
                 trigger_entry = ttk.Spinbox(
                     trigger_frame,
                     from_=1,
@@ -837,22 +2884,97 @@ class SettingsWindow:
             
             row += 1
 
+    def _create_diagnostics_tab(self):
+        """Tik, zamanlayıcı, ağ ve ayrıştırma ölçümleri; yalnızca sekme açıkken yenilenir"""
+        tab = ttk.Frame(self.notebook, padding=5)
+        self.notebook.add(tab, text="Tanılama")
+
+        columns = ("count", "p50", "p95", "max")
+        self.diagnostics_tree = ttk.Treeview(tab, columns=columns, height=14)
+        self.diagnostics_tree.heading("#0", text="Ölçüm")
+        self.diagnostics_tree.column("#0", width=150)
+        for column, text in zip(columns, ("Sayı", "p50", "p95", "En çok")):
+            self.diagnostics_tree.heading(column, text=text)
+            self.diagnostics_tree.column(column, width=50, anchor="e")
+        self.diagnostics_tree.pack(fill=BOTH, expand=YES)
+
+        # Göstergeler (bekleyen zamanlayıcılar, bellek) ve sayaçlar (HTTP durum kodları)
+        self.diagnostics_label = ttk.Label(tab, text="", justify=LEFT, bootstyle="secondary")
+        self.diagnostics_label.pack(fill=X, pady=5)
+
+        button_frame = ttk.Frame(tab)
+        button_frame.pack(fill=X)
+        ttk.Button(
+            button_frame,
+            text="JSON Olarak Kaydet",
+            command=self._export_diagnostics,
+            style="info.TButton"
+        ).pack(side=LEFT, padx=5)
+        ttk.Button(
+            button_frame,
+            text="Sıfırla",
+            command=self._reset_diagnostics,
+            style="secondary.TButton"
+        ).pack(side=RIGHT, padx=5)
+
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self._update_memory())
+
+    @property
+    def _diagnostics_visible(self):
+        return self.notebook.index("current") == 1
+
+    def _update_diagnostics(self):
+        if not self._diagnostics_visible:
+            return
+        snapshot = Tools.get_diagnostics().snapshot()
+        histograms = snapshot["histograms"]
+        for name in self.diagnostics_tree.get_children():
+            if name not in histograms:  # Sıfırlandı
+                self.diagnostics_tree.delete(name)
+        for name, summary in histograms.items():
+            values = (summary["count"], *(self._format_metric(name, summary.get(key)) for key in ("p50", "p95", "max")))
+            if self.diagnostics_tree.exists(name):
+                self.diagnostics_tree.item(name, values=values)
+            else:
+                self.diagnostics_tree.insert("", "end", iid=name, text=name, values=values)
+        lines = [f"Çalışma süresi: {timedelta(seconds=snapshot['uptime_s'])}"]
+        lines += [f"{name}: {value}" for name, value in {**snapshot["gauges"], **snapshot["counters"]}.items()]
+        self.diagnostics_label.configure(text="\n".join(lines))
+
+    @staticmethod
+    def _format_metric(name, value):
+        if value is None:
+            return "-"
+        if name.endswith("_ms"):
+            return f"{value:.2f}"
+        if name.endswith("bytes"):
+            return f"{value / 1024:.0f} KB"
+        return f"{value:g}"
+
+    def _export_diagnostics(self):
+        """Ölçümleri app.log'un yanına tarih damgalı JSON dosyası olarak yaz"""
+        path = Tools.BASE_DIR / f"tanilama-{datetime.now():%Y%m%d-%H%M%S}.json"
+        try:
+            Tools.get_diagnostics().export(path)
+        except OSError as e:
+            return self._show_status(f"Tanılama kaydedilemedi: {e}", "danger")
+        self._show_status(f"{path.name} kaydedildi", "success")
+
+    def _reset_diagnostics(self):
+        Tools.get_diagnostics().reset()
+        self._update_diagnostics()
+
     def _pick_color(self, key, color_type):
         """Renk seçici dialog'unu göster ve seçilen rengi kaydet"""
         try:
             current_color = self._settings['COLORS'][key][color_type]
-            # ColorChooserDialog'u oluştur
-            cd = ColorChooserDialog(
-                parent=self.window,
-                initialcolor=current_color
-            )
-            # Dialog'u göster
-            cd.show()
+            # Renk seçici ilk kullanımda kurulur, sonraki açılışlarda yeniden kullanılır
+            if self._color_picker is None:
+                self._color_picker = ColorPicker(self.window)
+            selected_color = self._color_picker.ask(current_color)
             
             # Renk seçimi sonucunu kontrol et
-            colors = cd.result
-            if colors:  # Eğer bir renk seçildiyse
-                selected_color = colors.hex
+            if selected_color:  # Eğer bir renk seçildiyse
                 # Seçilen rengi ayarlara kaydet
                 self._settings['COLORS'][key][color_type] = selected_color
                 
@@ -877,17 +2999,38 @@ class SettingsWindow:
             return self._show_status("Plaka kodu giriniz!", "danger")
             
         if city := next((c for c in Tools.get_cities() if c['plaka'] == city_code), None):
-            if districts := DiyanetApi().get_districts(city['id']):
-                self.district_mapping = districts
-                district_names = list(districts.keys())
-                self.district_combo.configure(values=district_names)
-                self.district_combo.set(district_names[0])
-                self._show_status(f"{len(districts)} ilçe bulundu", "success")
+            cache = Tools.get_district_cache()
+            districts, fresh = cache.get(city['id'])
+            if districts:  # Önbellekten anında (çevrimdışı da) göster
+                self._on_districts(districts)
+                if not fresh:  # Eskimişse arka planda sessizce yenile
+                    self.tasks.submit(
+                        f"districts-{city['id']}", cache.fetch, city['id'], owner=self,
+                        on_done=lambda d, code=city_code: self._on_districts_revalidated(code, d)
+                    )
             else:
-                self._show_status("İlçeler alınamadı!", "danger")
+                self._run_task(
+                    "districts", self.fetch_button, "İlçeler getiriliyor...",
+                    cache.fetch, city['id'], on_done=self._on_districts
+                )
         else:
             self._show_status("Geçersiz plaka kodu!", "danger")
 
+    def _on_districts_revalidated(self, city_code, districts):
+        # Kullanıcı bu arada başka il seçmediyse ve liste değiştiyse güncelle
+        if districts and districts != self.district_mapping and self.city_entry.get().strip() == city_code:
+            self._on_districts(districts)
+
+    def _on_districts(self, districts):
+        if districts:
+            self.district_mapping = districts
+            district_names = list(districts.keys())
+            self.district_combo.configure(values=district_names)
+            self.district_combo.set(district_names[0])
+            self._show_status(f"{len(districts)} ilçe bulundu", "success")
+        else:
+            self._show_status("İlçeler alınamadı!", "danger")
+
     def _save_location(self):
         """Seçilen konum bilgilerini kaydet"""
         city_code = self.city_entry.get().strip()
@@ -905,15 +3048,19 @@ class SettingsWindow:
 
     def _update_times(self):
         """Namaz vakitlerini güncelle"""
-        if times := DiyanetApi().fetch_prayer_times(self._settings['LOCATION']['district']['id']):
-            Tools.update_prayer_times(times)
+        district_id = self._settings['LOCATION']['district']['id']
+        self._run_task(
+            "times", self.update_button, "Vakitler indiriliyor...",
+            DiyanetApi().fetch_prayer_times, district_id,
+            on_done=lambda times: self._on_times(district_id, times)
+        )
+
+    def _on_times(self, district_id, times):
+        if times:
+            Tools.update_prayer_times(times, district_id)
             self._show_status("Vakitler güncellendi", "success")
             if hasattr(self.root, 'clock_widget'):
-                self.root.clock_widget._prayer_times = Tools.get_prayer_times()
-                self.root.clock_widget._next_prayer_time = Tools.find_next_prayer_time(
-                    self.root.clock_widget._prayer_times
-                )
-                self.root.clock_widget.update_clock()
+                self.root.clock_widget.reload()
         else:
             self._show_status("Güncelleme başarısız", "danger")
 
@@ -942,11 +3089,15 @@ class SettingsWindow:
         """Görünüm ayarlarını kaydet"""
         self._settings['DISPLAY'].update({
             'orientation': self.direction_var.get(),
-            'show_seconds': (self.seconds_var.get() == "Göster")
+            'show_seconds': (self.seconds_var.get() == "Göster"),
+            'refresh': self.refresh_var.get()
         })
-        self._save_settings()
-        if hasattr(self.root, 'clock_widget'):
-            self.root.clock_widget.update_orientation()
+        self._save_settings()  # Saat yeniden kurulur; metin şekli değişir, boyut ölçü önbelleğinden gelir
+
+    def _save_runtime(self):
+        """Çalışma kipini kaydet; yalın kip pencere kapanınca devreye girer"""
+        self._settings.setdefault('RUNTIME', {})['lean'] = self.lean_var.get() == "lean"
+        self._save_settings("Bellek kipi kaydedildi")
 
     def _save_settings(self, msg=None):
         """Ayarları kaydet ve widget'ı güncelle"""
@@ -955,34 +3106,797 @@ class SettingsWindow:
             if msg:
                 self._show_status(msg, "success")
             if hasattr(self.root, 'clock_widget'):
-                self.root.clock_widget.update_clock()
+                self.root.clock_widget.reload()
         except Exception as e:
             self._show_status(f"Ayarlar kaydedilemedi: {e}", "danger")
 
+    def _run_task(self, key, button, busy_msg, func, *args, on_done):
+        """Ağ işini arka planda başlat, bitene kadar butonu devre dışı bırak"""
+        def finish(result=None, error=None):
+            button.configure(state="normal")
+            if error is not None:
+                self._show_status(f"Bağlantı hatası: {error}", "danger")
+            else:
+                on_done(result)
+
+        if self.tasks.submit(key, func, *args, owner=self,
+                             on_done=finish, on_error=lambda e: finish(error=e)):
+            button.configure(state="disabled")
+            self._show_status(busy_msg, "info")
+        else:
+            self._show_status("Önceki istek sürüyor, lütfen bekleyin", "warning")
+
+    def _update_memory(self):
+        """Bellek etiketini yenile; periyodik yoklama yalnızca tanılama sekmesi görünürken sürer"""
+        rss = Tools.memory_usage()
+        self.memory_label.configure(text=f"Bellek (RSS): {rss / 1048576:.1f} MB" if rss else "")
+        if self._diagnostics_visible:
+            self._update_diagnostics()
+            self.tasks.scheduler.schedule("settings_memory", 2000, self._update_memory)
+        else:
+            self.tasks.scheduler.cancel("settings_memory")
+
+    def close(self):
+        """Pencereyi gizle, süren ağ işlerinin sonuçlarını yok say; yalın kipte tamamen yok et"""
+        self.tasks.cancel_owner(self)
+        self.tasks.scheduler.cancel("settings_memory")
+        self.tasks.scheduler.cancel("settings_status")
+        if Tools.get_settings().get('RUNTIME', {}).get('lean'):
+            if self._color_picker:
+                self._color_picker.destroy()  # Kök pencerenin çocuğu, ayarlarla birlikte yok olmaz
+            self.window.destroy()
+            self.release()
+        else:
+            # Sonucu yok sayılan işlerin devre dışı bıraktığı butonları geri aç
+            self.fetch_button.configure(state="normal")
+            self.update_button.configure(state="normal")
+            self.window.withdraw()
+
+    def release(self):
+        """Yalın kip: pencereye ait her şeyi bırak ve belleği işletim sistemine geri ver"""
+        if getattr(self.root, 'settings_window', None) is self:
+            self.root.settings_window = None
+        if self.tasks.idle:
+            DiyanetApi.release_client()  # Bağlantı havuzu bir sonraki istekte yeniden kurulur
+            Tools._district_cache = None  # İlçe listeleri gerektiğinde diskten yeniden okunur
+        gc.collect()
+        Tools.trim_memory()
+        logger.info("Ayarlar penceresi bırakıldı, bellek: %.1f MB", Tools.memory_usage() / 1048576)
+
     def _show_status(self, msg, alert_type="primary"):
         """Durum mesajını göster"""
         self.status.configure(
             text=msg,
             bootstyle=alert_type
         )
-        # 3 saniye sonra mesajı temizle
-        self.window.after(3000, lambda: self.status.configure(text=""))
+        # 3 saniye sonra mesajı temizle (yeni mesaj bekleyen temizliği erteler)
+        self.tasks.scheduler.schedule("settings_status", 3000, lambda: self.status.configure(text=""))
+
+
+class EventLoop:
+    """Tk olmadan root.after arayüzünü sağlayan basit olay döngüsü; Scheduler başsız kipte bununla çalışır"""
+
+    def __init__(self):
+        self._queue = []  # (monotonic zaman, sıra, iş id, geri çağrı, argümanlar)
+        self._cancelled = set()
+        self._counter = 0
+        self._running = False
+
+    def after(self, delay_ms, callback, *args):
+        self._counter += 1
+        job = f"after#{self._counter}"
+        heapq.heappush(self._queue, (time.monotonic() + delay_ms / 1000, self._counter, job, callback, args))
+        return job
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, job):
+        self._cancelled.add(job)
+
+    def mainloop(self):
+        self._running = True
+        while self._running and self._queue:
+            at, _, job, callback, args = self._queue[0]
+            if job in self._cancelled:
+                heapq.heappop(self._queue)
+                self._cancelled.discard(job)
+                continue
+            if (wait := at - time.monotonic()) > 0:
+                time.sleep(wait)  # Tek iş parçacıklı; uyurken kuyruğa yeni iş eklenemez
+                continue
+            heapq.heappop(self._queue)
+            callback(*args)
+
+    def quit(self):
+        self._running = False
+
+
+class PrayerService:
+    """Yerel HTTP servisi: yanıtlar önceden derlenmiş indekslerden üretilir ve bir sonraki sınıra kadar önbellekte tutulur
+
+    GET /next?district=ID        bir sonraki vakit (sınır: vaktin kendisi)
+    GET /today?district=ID       bugünün vakitleri (sınır: gece yarısı)
+    GET /day/YYYY-AA-GG?district=ID
+    GET /districts               depodaki ilçeler ve kapsamları
+    GET /diagnostics             servisin zamanlayıcı ve ağ ölçümleri (önbelleğe alınmaz)
+    """
+    RELOAD_CHECK = 5  # saniye, veri dosyalarının değişip değişmediği en fazla bu sıklıkta yoklanır
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses = {}  # {(yol, ilçe): (geçerlilik sonu epoch, durum, ETag, gövde)}
+        self._days = {}       # {ilçe id: {date: (6 dakika)}}
+        self._indexes = {}    # {ilçe id: PrayerIndex}
+        self._mtimes = None
+        self._next_check = 0
+        self.primary = None
+        self.reload()
+
+    def _data_mtimes(self):
+        return tuple(path.stat().st_mtime_ns if path.exists() else 0
+                     for path in (Tools.PRAYER_TIMES, Tools.PRAYER_STORE, Tools.SETTINGS))
+
+    def reload(self):
+        """Veri dosyalarını belleğe oku, indeksleri derle ve yanıt önbelleğini boşalt"""
+        with self._lock:
+            self._mtimes = self._data_mtimes()
+            # Ayrı ve kısa ömürlü eşlem: ana döngüdeki yenileme depoyu aynı anda yeniden yazabilir
+            store = PrayerStore(Tools.PRAYER_STORE)
+            try:
+                days = {str(d): dict(store.iter_days(d)) for d in store.districts()}
+            finally:
+                store.close()
+            settings = Tools.load_json(Tools.SETTINGS) or Tools._default_settings
+            self.primary = str(settings['LOCATION']['district']['id'])
+            primary_days = days.setdefault(self.primary, {})
+            owner, primary_times = Tools.load_prayer_times()
+            if owner not in (None, self.primary):
+                primary_times = {}  # Konum değişti, dosya henüz yenilenmedi
+            for day, times in primary_times.items():
+                try:
+                    primary_days[date.fromisoformat(day)] = tuple(map(Tools.to_minutes, times))
+                except (ValueError, AttributeError):
+                    logger.error("Geçersiz vakit kaydı atlandı: %s %s", day, times)
+            self._days = {d: days_ for d, days_ in days.items() if days_}
+            self._indexes = {d: PrayerIndex.from_days(sorted(days_.items())) for d, days_ in self._days.items()}
+            self._responses = {}
+        logger.info("Servis verisi yüklendi: %s ilçe", len(self._indexes))
+
+    def _check_reload(self, now):
+        # Yenileme, gece görevi veya tarayıcı vakitleri değiştirdiyse yeniden yükle
+        if now < self._next_check:
+            return
+        self._next_check = now + self.RELOAD_CHECK
+        if self._data_mtimes() != self._mtimes:
+            self.reload()
+
+    def respond(self, path, etag=None, now=None):
+        """(durum, başlıklar, gövde) döndür; gövde değişmediyse 304 ve boş gövde"""
+        now = time.time() if now is None else now
+        self._check_reload(now)
+        route, _, query = path.partition("?")
+        if route == "/diagnostics":
+            body = json.dumps(Tools.get_diagnostics().snapshot(), ensure_ascii=False).encode("utf-8")
+            return 200, {"Content-Type": "application/json; charset=utf-8", "Cache-Control": "no-store"}, body
+        params = dict(part.partition("=")[::2] for part in query.split("&") if part)
+        key = (route, params.get("district") or self.primary)
+
+        entry = self._responses.get(key)
+        if entry is None or entry[0] <= now:
+            with self._lock:
+                entry = self._build(*key, now)
+                if entry[1] == 200:  # Yalnızca var olan veriler önbelleğe alınır; önbellek sınırlı kalır
+                    self._responses[key] = entry
+
+        expires, status, entry_etag, body = entry
+        headers = {"Content-Type": "application/json; charset=utf-8", "ETag": entry_etag}
+        if status == 200:
+            max_age = max(0, math.ceil(expires - now))
+            headers["Cache-Control"] = f"public, max-age={max_age}"
+            headers["Expires"] = datetime.fromtimestamp(expires, timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+            if etag == entry_etag:
+                return 304, headers, b""
+        else:
+            headers["Cache-Control"] = "no-store"
+        return status, headers, body
+
+    def _build(self, route, district_id, now):
+        today = date.fromtimestamp(now)
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        if route == "/next":
+            if (index := self._index(district_id, now)) is None or not (entry := index.next_entry(now)):
+                return self._error(404, "vakit verisi yok", now)
+            stamp, slot = entry
+            data = {"district": district_id, "name": Tools.PRAYER_NAMES[slot], "slot": slot, "epoch": stamp,
+                    "time": datetime.fromtimestamp(stamp).isoformat(timespec="minutes"),
+                    "source": "calculated" if index.is_calculated(stamp) else "diyanet"}
+            return self._entry(stamp, data)
+        if route == "/today" or route.startswith("/day/"):
+            try:
+                day = today if route == "/today" else date.fromisoformat(route[5:])
+            except ValueError:
+                return self._error(400, "geçersiz tarih", now)
+            minutes, source = self._days.get(district_id, {}).get(day), "diyanet"
+            if not minutes and (coordinates := Tools.coordinates(district_id)):
+                try:  # İndirilmiş veri yoksa hesaplanan vakitler
+                    minutes, source = PrayerCalculator.days(*coordinates, day, day)[0][1], "calculated"
+                except ImportError:
+                    pass
+            if not minutes:
+                return self._error(404, "vakit verisi yok", now)
+            times = {name: Tools.to_clock(m) for name, m in zip(Tools.PRAYER_NAMES, minutes)}
+            return self._entry(midnight, {"district": district_id, "date": day.isoformat(), "times": times,
+                                          "source": source})
+        if route == "/districts":
+            data = {d: [min(days).isoformat(), max(days).isoformat()] for d, days in sorted(self._days.items())}
+            return self._entry(midnight, data)
+        return self._error(404, "bilinmeyen yol", now)
+
+    def _index(self, district_id, now):
+        """İlçenin indeksi; indirilen veri bitmek üzereyse hesaplanan günlerle yerinde uzatılır (kilit altında)"""
+        index = self._indexes.get(district_id) or PrayerIndex.from_days([])
+        if Tools.extend_fallback(index, district_id, now):
+            self._indexes[district_id] = index  # Koordinatı bilinen, verisi olmayan ilçe de hesaptan yanıtlanır
+        return index if len(index) else None
+
+    @staticmethod
+    def _entry(expires, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        return expires, status, f'"{hashlib.blake2s(body, digest_size=8).hexdigest()}"', body
+
+    @classmethod
+    def _error(cls, status, message, now):
+        return cls._entry(now, {"error": message}, status)
+
+    def handler(self):
+        """Bu servise bağlı istek sınıfını döndür (http.server yalnızca servis kipinde yüklenir)"""
+        from http.server import BaseHTTPRequestHandler
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Ekranlar bağlantıyı açık tutar
+            disable_nagle_algorithm = True  # Başlık ve gövde ayrı yazılır; gecikmeli ACK beklenmesin
+
+            def do_GET(self):
+                status, headers, body = service.respond(self.path, self.headers.get("If-None-Match"))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("%s " + format, self.address_string(), *args)
+
+        return Handler
+
+
+class Crawler:
+    """Tüm illerin ilçe vakitlerini sınırlı eşzamanlılık ve hızla tek depoya indirir; kesilirse kaldığı yerden sürer
+
+    Kontrol noktası o gün depoya yazılmış ilçeleri tutar: aynı gün yeniden çalıştırma yalnızca kalanları
+    (ve hata alanları), ertesi gece çalıştırma tüm ilçeleri yeniden indirir.
+    """
+    COMMIT_EVERY = 50     # ilçe; sonuçlar depoya ve kontrol noktasına en geç bu kadar ilçede bir yazılır
+    COMMIT_INTERVAL = 30  # saniye
+    REPORT_INTERVAL = 5   # saniye
+
+    def __init__(self, store, checkpoint_path, workers=4, rate=4.0, on_progress=None):
+        self.store = store
+        self.checkpoint_path = Path(checkpoint_path)
+        self.workers = max(1, workers)
+        self.limiter = RateLimiter(rate)
+        self.on_progress = on_progress  # fn(istatistik sözlüğü), REPORT_INTERVAL saniyede bir
+        self.api = DiyanetApi()
+        self.run_date = date.today().isoformat()
+        self.done = {}      # {ilçe id: gün sayısı}, depoya yazılmış olanlar
+        self.failed = {}    # {ilçe id: hata}
+        self._pending = {}  # {ilçe id: vakitler}, depoya yazılmayı bekleyenler
+        self._total = 0
+        self._fetched = 0   # bu çalıştırmada indirilen
+        self._started = None
+
+    def load_checkpoint(self, fresh=False):
+        """Bugünün kontrol noktasını oku; başka güne aitse veya fresh ise baştan başla"""
+        checkpoint = None
+        if not fresh and self.checkpoint_path.exists():
+            checkpoint = Tools.load_json(self.checkpoint_path)
+        if checkpoint and checkpoint.get("date") == self.run_date:
+            self.done = checkpoint.get("done", {})
+            logger.info("Kontrol noktasından devam: %s ilçe tamamlanmış", len(self.done))
+        return len(self.done)
+
+    def save_checkpoint(self):
+        Tools.save_json(self.checkpoint_path, {"date": self.run_date, "done": self.done, "failed": self.failed})
+
+    def districts(self, city_ids=None):
+        """İlçe id listesi; eskimiş il listeleri hız sınırıyla ve eşzamanlı indirilir"""
+        cache = Tools.get_district_cache()
+        city_ids = city_ids or [c['id'] for c in Tools.get_cities()]
+        stale = [city_id for city_id in city_ids if not cache.get(city_id)[1]]
+        if stale:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="seher-crawl") as pool:
+                list(pool.map(cache.fetch, stale))
+        result = []
+        for city_id in city_ids:
+            if districts := cache.get(city_id)[0]:
+                result += [str(district_id) for district_id in districts.values()]
+            else:
+                logger.error("İlçe listesi alınamadı: il %s", city_id)
+                self.failed[f"il-{city_id}"] = "ilçe listesi alınamadı"
+        return result
+
+    def run(self, city_ids=None):
+        """Eksik ilçeleri indir; (indirilen, hatalı) sayılarını döndür"""
+        if DiyanetApi.POOL_SIZE < self.workers:
+            DiyanetApi.POOL_SIZE = self.workers
+            DiyanetApi.release_client()  # Havuz işçi sayısıyla yeniden kurulur
+        # Hız sınırı istemcide uygulanır; yeniden denemeler de sınırı aşamaz
+        client = DiyanetApi.client()
+        client.limiter = self.limiter
+        try:
+            return self._crawl(city_ids)
+        finally:
+            client.limiter = None
+
+    def _crawl(self, city_ids):
+        self._started = time.monotonic()
+        targets = [d for d in dict.fromkeys(self.districts(city_ids)) if d not in self.done]
+        self._total = len(targets)
+        logger.info("Tarama başladı: %s ilçe, %s işçi, saniyede en fazla %.1f istek",
+                    self._total, self.workers, 1 / self.limiter.interval)
+
+        pool = ThreadPoolExecutor(self.workers, thread_name_prefix="seher-crawl")
+        futures = {pool.submit(self.api.fetch_prayer_times, d): d for d in targets}
+        last_commit = last_report = time.monotonic()
+        succeeded = 0
+        try:
+            for future in as_completed(futures):
+                district_id = futures[future]
+                try:
+                    times = future.result()
+                except Exception as e:  # Ayrıştırma hatası vb.; tek ilçe taramayı durdurmamalı
+                    times, error = None, str(e)
+                else:
+                    error = "vakitler alınamadı"
+                if times:
+                    self._pending[district_id] = times
+                    self.failed.pop(district_id, None)
+                    succeeded += 1
+                else:
+                    self.failed[district_id] = error
+                self._fetched += 1
+                now = time.monotonic()
+                if len(self._pending) >= self.COMMIT_EVERY or now - last_commit >= self.COMMIT_INTERVAL:
+                    self.commit()
+                    last_commit = now
+                if self.on_progress and now - last_report >= self.REPORT_INTERVAL:
+                    self.on_progress(self.stats())
+                    last_report = now
+        finally:
+            # Kesilirse sıradaki istekler iptal edilir, inenler yazılır; sonraki çalıştırma buradan sürer
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.commit()
+        logger.info("Tarama bitti: %s", self.stats())
+        return succeeded, len(self.failed)
+
+    def commit(self):
+        """Bekleyen sonuçları depoya, ardından kontrol noktasına yaz (sıra, kesintide veri kaybını önler)"""
+        if self._pending:
+            self.store.update(self._pending)
+            self.done.update({district_id: len(times) for district_id, times in self._pending.items()})
+            self._pending = {}
+        self.save_checkpoint()
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        rate = self._fetched / elapsed
+        client = DiyanetApi.client().stats
+        return {"fetched": self._fetched, "total": self._total, "failed": len(self.failed),
+                "elapsed_s": round(elapsed, 1), "per_second": round(rate, 2),
+                "eta_s": round((self._total - self._fetched) / rate) if rate else None,
+                "megabytes": round(client["bytes"] / 1048576, 1)}
+
+
+class Cli:
+    """Tk yüklemeden vakit sorguları, yenileme ve durum yayınlayan arka plan servisi"""
+
+    @staticmethod
+    def parser():
+        import argparse
+        parser = argparse.ArgumentParser(prog="seher", description="Seher başsız kip")
+        parser.add_argument("--dir", help="ayarlar.json ve vakit dosyalarının dizini (varsayılan: çalışma dizini)")
+        parser.add_argument("--json", action="store_true", help="çıktıyı JSON olarak yaz")
+        parser.add_argument("--profile", type=float, metavar="DK",
+                            help="komutu en fazla DK dakika profille (cProfile + tracemalloc, raporlar app.log yanında)")
+        commands = parser.add_subparsers(dest="command", required=True)
+
+        command = commands.add_parser("next", help="bir sonraki vakit ve kalan süre")
+        command.add_argument("--district", help="ilçe id (varsayılan: ayarlardaki konum)")
+
+        command = commands.add_parser("today", help="günün vakitleri")
+        command.add_argument("--district")
+        command.add_argument("--date", type=date.fromisoformat, help="YYYY-AA-GG (varsayılan: bugün)")
+
+        command = commands.add_parser("refresh", help="vakitleri Diyanet'ten indir")
+        command.add_argument("--district")
+        command.add_argument("--force", action="store_true", help="kapsam yeterli olsa da indir")
+
+        command = commands.add_parser("daemon", help="durumu sürekli dosyaya veya standart çıktıya yaz")
+        command.add_argument("--district")
+        command.add_argument("--state", help="durum dosyası (varsayılan: her güncellemede bir satır yazdır)")
+        command.add_argument("--interval", type=int, default=60, help="saniye, yayın aralığı (varsayılan: 60)")
+
+        command = commands.add_parser("serve", help="yerel HTTP servisi (/next, /today, /day/TARİH)")
+        command.add_argument("--host", default="127.0.0.1", help="dinlenecek adres (yerel ağ için 0.0.0.0)")
+        command.add_argument("--port", type=int, default=8765)
+
+        command = commands.add_parser("calc", help="vakitleri koordinatlardan hesapla (NumPy gerekir)")
+        command.add_argument("--district", help="ilçe id (koordinat: ayarlar veya il merkezi)")
+        command.add_argument("--lat", type=float)
+        command.add_argument("--lon", type=float)
+        command.add_argument("--date", type=date.fromisoformat, help="ilk gün (varsayılan: bugün)")
+        command.add_argument("--days", type=int, default=1)
+        command.add_argument("--validate", action="store_true",
+                             help="indirilmiş vakitlerle karşılaştır, dakika farkı raporu yaz")
+        command.add_argument("--output", help="önbellekteki tüm ilçeler için --days gün hesaplayıp bu depoya yaz "
+                             "(ilçeler il merkezi koordinatıyla hesaplanır)")
+
+        command = commands.add_parser("crawl", help="tüm illerin ilçe vakitlerini tek depoya indir (kaldığı yerden sürer)")
+        command.add_argument("plates", nargs="*", help="yalnızca bu plaka kodlarındaki iller (varsayılan: tümü)")
+        command.add_argument("--workers", type=int, default=4, help="eşzamanlı istek sayısı (varsayılan: 4)")
+        command.add_argument("--rate", type=float, default=4.0, help="saniyede en fazla istek (varsayılan: 4)")
+        command.add_argument("--store", help="yazılacak depo (varsayılan: vakitler.bin)")
+        command.add_argument("--checkpoint", help="kontrol noktası dosyası (varsayılan: tarama.json)")
+        command.add_argument("--fresh", action="store_true", help="bugünün kontrol noktasını yok say, baştan indir")
+
+        command = commands.add_parser("districts", help="bir ilin ilçe id'leri")
+        command.add_argument("plate", nargs="?", help="il plaka kodu")
+        command.add_argument("--all", action="store_true", help="tüm illerin ilçe listelerini önbelleğe al")
+
+        command = commands.add_parser("store", help="vakitler.bin deposu ile JSON arasında aktarım")
+        command.add_argument("action", choices=["import", "export", "info"])
+        command.add_argument("district", nargs="?")
+        command.add_argument("path", nargs="?", help="JSON dosyası (varsayılan: vakitler.json)")
+        return parser
+
+    @classmethod
+    def run(cls, argv=None):
+        args = cls.parser().parse_args(argv)
+        if args.dir:
+            Tools.set_base_dir(args.dir)
+        # Servisler ayarlardaki düzeyle, tek seferlik komutlar yalnızca uyarılarla günlük yazar
+        Tools.configure_logging(None if args.command in ("daemon", "serve") else "WARNING")
+        if args.profile:
+            Tools.get_profiler().start(args.profile)  # daemon ve serve, süre dolunca kendi döngülerinde durdurur
+        try:
+            return getattr(cls, args.command)(args)
+        except KeyboardInterrupt:
+            return 130
+        except BrokenPipeError:
+            # Çıktıyı okuyan süreç kapandı (ör. durum çubuğu); yorumlayıcı çıkışta yeniden yazmaya çalışmasın
+            sys.stdout = open(os.devnull, "w")
+            return 1
+        finally:
+            if Tools._profiler is not None:
+                Tools.get_profiler().stop()
+            if Tools._writer is not None:
+                Tools.get_writer().flush()
+
+    @staticmethod
+    def gui_profile(argv):
+        """Yalnızca `--profile [DK]` verildiyse arayüz için profil süresini döndür, aksi halde None"""
+        if argv[:1] != ["--profile"] or len(argv) > 2:
+            return None
+        try:
+            return float(argv[1]) if len(argv) == 2 else Profiler.MINUTES
+        except ValueError:
+            return None
+
+    @staticmethod
+    def output(args, data, text):
+        print(json.dumps(data, ensure_ascii=False) if args.json else text, flush=True)
+
+    @staticmethod
+    def describe(state):
+        if not state["next"]:
+            return f"{state['district']}: vakit verisi yok"
+        clock = state["next"]["time"][11:]
+        mark = " [hesaplanan]" if state["next"]["source"] == "calculated" else ""
+        return f"{state['next']['name']} {clock}{mark} ({state['remaining']['text']} kaldı)"
+
+    @classmethod
+    def next(cls, args):
+        state = Tools.prayer_state(args.district)
+        cls.output(args, state, cls.describe(state))
+        return 0 if state["next"] else 1
+
+    @classmethod
+    def today(cls, args):
+        times, source = Tools.get_day_times_source(args.district, args.date)
+        day = (args.date or date.today()).isoformat()
+        if not times:
+            cls.output(args, {"date": day, "times": None, "source": None}, f"{day}: vakit verisi yok")
+            return 1
+        named = dict(zip(Tools.PRAYER_NAMES, times))
+        mark = "\n(hesaplanan vakitler, Diyanet verisi değil)" if source == "calculated" else ""
+        cls.output(args, {"date": day, "times": named, "source": source},
+                   "\n".join(f"{name:<7} {clock}" for name, clock in named.items()) + mark)
+        return 0
+
+    @classmethod
+    def refresh(cls, args):
+        primary = str(Tools.get_settings()['LOCATION']['district']['id'])
+        district_id = str(args.district or primary)
+        refresher = PrayerTimesRefresher(None, None)
+        coverage = (refresher.coverage() if district_id == primary
+                    else refresher.location_coverage(district_id))
+        if coverage >= PrayerTimesRefresher.HORIZON_DAYS * 86400 and not args.force:
+            cls.output(args, {"district": district_id, "updated": False, "coverage_days": coverage / 86400},
+                       f"Kapsam {coverage / 86400:.1f} gün, yenileme gerekmiyor")
+            return 0
+
+        if not (times := DiyanetApi().fetch_prayer_times(district_id)):
+            cls.output(args, {"district": district_id, "updated": False, "error": "fetch failed"},
+                       "Vakitler alınamadı")
+            return 1
+        if district_id == primary:
+            updated = Tools.merge_prayer_times(times, district_id)
+        else:
+            Tools.get_prayer_store().update({district_id: times})
+            updated = True
+        cls.output(args, {"district": district_id, "updated": updated, "days": len(times)},
+                   f"{len(times)} gün alındı" + ("" if updated else ", yeni gün yok"))
+        return 0
+
+    @classmethod
+    def daemon(cls, args):
+        """Durumu her aralık sınırında ve vakit geçişlerinde yayınla, vakitleri arka planda yenile"""
+        import signal
+        signal.signal(signal.SIGTERM, signal.default_int_handler)  # servis durdurulunca temiz çık
+
+        loop = EventLoop()
+        scheduler = Scheduler(loop)
+        tasks = TaskRunner(scheduler)
+        Tools.get_profiler().attach(scheduler)
+
+        def publish():
+            now = time.time()
+            state = Tools.prayer_state(args.district, now)
+            if args.state:
+                cls.write_state(Path(args.state), state)
+            else:
+                cls.output(args, state, cls.describe(state))
+            # Bir sonraki aralık sınırında ya da vakit geçer geçmez yeniden yayınla
+            delay = args.interval - now % args.interval
+            if state["next"]:
+                delay = min(delay, state["next"]["epoch"] - now + 0.001)
+            scheduler.schedule("publish", math.ceil(delay * 1000), publish)
+
+        refresher = PrayerTimesRefresher(scheduler, tasks, on_update=publish)
+        refresher.start()
+        logger.info("Başsız servis başlatıldı (aralık %s sn)", args.interval)
+        publish()
+        try:
+            loop.mainloop()
+        finally:
+            tasks.shutdown()
+            if args.state:
+                Path(args.state).unlink(missing_ok=True)  # Eski durum okunup gösterilmesin
+            logger.info("Başsız servis durduruldu")
+        return 0
+
+    @classmethod
+    def serve(cls, args):
+        """HTTP servisini arka planda çalıştır, vakitleri ana döngüde yenile"""
+        import signal
+        from http.server import ThreadingHTTPServer
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+        service = PrayerService()
+        server = ThreadingHTTPServer((args.host, args.port), service.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="http", daemon=True).start()
+        logger.info("Servis %s:%s adresinde dinliyor", args.host, server.server_port)
+        cls.output(args, {"host": args.host, "port": server.server_port},
+                   f"http://{args.host}:{server.server_port}/next")
+
+        loop = EventLoop()
+        scheduler = Scheduler(loop)
+        tasks = TaskRunner(scheduler)
+        Tools.register_gauges(scheduler)
+        Tools.get_profiler().attach(scheduler)
+        # Güncellenen veriler, servisin dosya yoklamasıyla en geç RELOAD_CHECK saniyede yayına girer
+        PrayerTimesRefresher(scheduler, tasks).start()
+        try:
+            loop.mainloop()
+        finally:
+            tasks.shutdown()
+            server.shutdown()
+            server.server_close()
+        return 0
+
+    @staticmethod
+    def write_state(path, state):
+        # Okuyucular yarım dosya görmesin; sık yazıldığından fsync yapılmaz
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, path)
+
+    @classmethod
+    def calc(cls, args):
+        if args.validate:
+            return cls.calc_validate(args)
+        start = args.date or date.today()
+        end = start + timedelta(days=max(1, args.days) - 1)
+        if args.output:
+            return cls.calc_generate(args, start, end)
+
+        if args.lat is not None and args.lon is not None:
+            coordinates = (args.lat, args.lon)
+        elif not (coordinates := Tools.coordinates(args.district or Tools.get_settings()['LOCATION']['district']['id'])):
+            cls.output(args, {"error": "no coordinates"}, "Koordinat bulunamadı; --lat ve --lon verin")
+            return 1
+        days = {day.isoformat(): dict(zip(Tools.PRAYER_NAMES, map(Tools.to_clock, minutes)))
+                for day, minutes in PrayerCalculator.days(*coordinates, start, end)}
+        cls.output(args, {"coordinates": coordinates, "days": days},
+                   "\n".join(f"{day}  " + "  ".join(times.values()) for day, times in days.items()))
+        return 0
+
+    @classmethod
+    def calc_validate(cls, args):
+        """Birincil konumun ve depodaki ilçelerin indirilmiş vakitlerini hesaplananlarla karşılaştır"""
+        districts = {}
+        primary = str(Tools.get_settings()['LOCATION']['district']['id'])
+        if Tools.PRAYER_STORE.exists():
+            store = Tools.get_prayer_store()
+            districts = {str(d): dict(store.iter_days(d)) for d in store.districts()}
+        primary_days = districts.setdefault(primary, {})
+        for day, times in Tools.get_prayer_times().items():
+            primary_days[date.fromisoformat(day)] = tuple(map(Tools.to_minutes, times))
+
+        located = {d: (*point, days) for d, days in districts.items() if (point := Tools.coordinates(d))}
+        report = PrayerCalculator.validate(located)
+        report["skipped"] = sorted(set(districts) - set(located))  # Koordinatı bilinmeyen ilçeler
+        if args.json:
+            return cls.output(args, report, "") or 0
+
+        print(f"{len(report['districts'])} ilçe, {report['days']} gün; fark = Diyanet - hesap (dakika)\n")
+        print(f"{'vakit':<8} {'ortalama':>9} {'ort. |fark|':>12} {'en çok':>7} {'±1 dk':>7}  dağılım")
+        for name, stats in report["prayers"].items():
+            histogram = " ".join(f"{v:+d}:{c}" for v, c in stats["histogram"].items())
+            print(f"{name:<8} {stats['mean']:>9.2f} {stats['mean_abs']:>12.2f} {stats['max_abs']:>7} "
+                  f"{stats['within_1']:>7.0%}  {histogram}")
+        if report["skipped"]:
+            print(f"\nKoordinatı bilinmediği için atlanan ilçeler: {', '.join(report['skipped'])}")
+        return 0
+
+    @classmethod
+    def calc_generate(cls, args, start, end):
+        """İlçe önbelleğindeki tüm ilçeler için vakitleri tek vektörel hesapla üret
+
+        İlçe koordinatları bilinmediğinden her ilçe bağlı olduğu il merkezinin koordinatıyla hesaplanır.
+        """
+        cache = Tools.get_district_cache()
+        districts = [(int(district_id), city) for city in Tools.get_cities()
+                     for district_id in ((cache.get(city['id'])[0] or {}).values())]
+        if not districts:
+            cls.output(args, {"error": "empty district cache"}, "İlçe önbelleği boş; önce: districts --all")
+            return 1
+        started = time.perf_counter()
+        ordinals = range(start.toordinal(), end.toordinal() + 1)
+        minutes = PrayerCalculator.compute([c['lat'] for _, c in districts], [c['lon'] for _, c in districts], ordinals)
+        elapsed = time.perf_counter() - started
+        PrayerStore.write(Path(args.output), {
+            district_id: {date.fromordinal(o): tuple(map(int, m)) for o, m in zip(ordinals, rows)}
+            for (district_id, _), rows in zip(districts, minutes)
+        })
+        cls.output(args, {"districts": len(districts), "days": len(ordinals), "seconds": elapsed,
+                          "coordinates": "province-centre"},
+                   f"{len(districts)} ilçe x {len(ordinals)} gün {elapsed:.2f} sn'de hesaplandı -> {args.output}\n"
+                   "Not: her ilçe bağlı olduğu il merkezinin koordinatıyla hesaplandı")
+        return 0
+
+    @classmethod
+    def crawl(cls, args):
+        """Ulusal tarama: ilerleme ve hız standart hata çıkışına, özet standart çıktıya yazılır"""
+        city_ids = []
+        for plate in args.plates:
+            if not (city := next((c for c in Tools.get_cities() if c['plaka'] == plate.zfill(2)), None)):
+                cls.output(args, {"error": "invalid plate", "plate": plate}, f"Geçersiz plaka kodu: {plate}")
+                return 1
+            city_ids.append(city['id'])
+
+        def progress(stats):
+            eta = f"{stats['eta_s'] // 60}:{stats['eta_s'] % 60:02}" if stats["eta_s"] is not None else "-"
+            print(f"{stats['fetched']}/{stats['total']} ilçe, {stats['per_second']:.2f} ilçe/sn, "
+                  f"{stats['failed']} hata, {stats['megabytes']} MB, kalan ~{eta}", file=sys.stderr, flush=True)
+
+        store = PrayerStore(args.store) if args.store else Tools.get_prayer_store()
+        crawler = Crawler(store, args.checkpoint or Tools.BASE_DIR / "tarama.json",
+                          workers=args.workers, rate=args.rate, on_progress=progress)
+        resumed = crawler.load_checkpoint(fresh=args.fresh)
+        try:
+            fetched, failed = crawler.run(city_ids)
+        finally:
+            store.close()
+        stats = {**crawler.stats(), "resumed": resumed, "stored": len(crawler.done),
+                 "failures": crawler.failed}
+        cls.output(args, stats, f"{fetched} ilçe indirildi ({stats['per_second']:.2f} ilçe/sn, "
+                               f"{stats['elapsed_s']:.0f} sn), {resumed} ilçe önceki çalıştırmadan, {failed} hata"
+                               + "".join(f"\n  {d}: {error}" for d, error in crawler.failed.items()))
+        return 1 if failed else 0
+
+    @classmethod
+    def districts(cls, args):
+        cache = Tools.get_district_cache()
+        if args.all:
+            cache.prefetch()
+            cls.output(args, {"cities": len(Tools.get_cities())}, "İlçe listeleri önbelleğe alındı")
+            return 0
+        if not (city := next((c for c in Tools.get_cities() if c['plaka'] == args.plate), None)):
+            cls.output(args, {"error": "invalid plate"}, "Geçersiz plaka kodu")
+            return 1
+        districts, fresh = cache.get(city['id'])
+        if not fresh:
+            districts = cache.fetch(city['id']) or districts
+        if not districts:
+            cls.output(args, {"city": city, "districts": None}, "İlçeler alınamadı")
+            return 1
+        cls.output(args, {"city": city, "districts": districts},
+                   "\n".join(f"{district_id:>6} {name}" for name, district_id in districts.items()))
+        return 0
+
+    @classmethod
+    def store(cls, args):
+        store = Tools.get_prayer_store()
+        if args.action == "info":
+            coverage = {str(d): [day.isoformat() for day in store.coverage(d)] for d in store.districts()}
+            cls.output(args, coverage, "\n".join(f"{d:>6} {first} - {last}"
+                                                 for d, (first, last) in coverage.items()) or "Depo boş")
+            return 0
+        district_id = args.district or Tools.get_settings()['LOCATION']['district']['id']
+        if args.action == "import":
+            days = store.import_json(district_id, args.path)
+        else:
+            days = store.export_json(district_id, args.path)
+        cls.output(args, {"district": str(district_id), "action": args.action, "days": days},
+                   f"{district_id}: {days} gün aktarıldı")
+        return 0
 
 
 if __name__ == "__main__":
+    # `main.py --profile [DK]` arayüzü profil kaydıyla açar; diğer argümanlar başsız kiptir
+    profile_minutes = Cli.gui_profile(sys.argv[1:])
+    if len(sys.argv) > 1 and profile_minutes is None:  # Başsız kip: Tk yüklenmez
+        sys.exit(Cli.run(sys.argv[1:]))
     try:
         tools = Tools()
-        tools.configure_logging("INFO")
+        tools.configure_logging()
         logger.info("-------Program başlatıldı-------")
 
-        # root = tk.Tk() yerine
-        root = ttk.Window(themename="darkly")
+        # Saat yalın tk.Tk üzerinde açılır, tema ayarlar penceresiyle yüklenir
+        root = tk.Tk()
         root.withdraw()  # Ana pencereyi gizle
-        clock_widget = ClockWidget(root)
+        root.scheduler = Scheduler(root)  # Tüm zamanlayıcıların tek sahibi
+        root.tasks = TaskRunner(root.scheduler)  # Ağ işleri için arka plan havuzu
+        Tools.register_gauges(root.scheduler, root)
+        if profile_minutes:
+            Tools.get_profiler().start(profile_minutes, root.scheduler)
+        clock_widget = ClockWidget(root, root.scheduler, Tools.load_snapshot())
         root.clock_widget = clock_widget  # ClockWidget'a referans ekle
+        # Vakitler bitmeden arka planda yenile
+        root.refresher = PrayerTimesRefresher(root.scheduler, root.tasks, on_update=clock_widget.reload,
+                                              on_location_update=root.clocks.reload_location)
+        root.refresher.start()
         root.mainloop()
+        root.tasks.shutdown()
+        Tools.get_profiler().stop()  # Süre dolmadan kapatıldıysa eldekini yaz
+        Tools.get_writer().flush()
     except KeyboardInterrupt:
         logger.info("Program kapatıldı")
     except Exception as e:
-        logger.error(f"Program başlatılırken hata oluştu: {e}")
+        logger.error("Program başlatılırken hata oluştu: %s", e)
         raise
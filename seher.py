@@ -0,0 +1,11 @@
+"""Başsız kip başlatıcısı: main modülü derlenmiş önbellekten yüklenir, Tk içe aktarılmaz
+
+Kullanım: python seher.py [--dir DİZİN] [--json] {next,today,refresh,daemon,serve,calc,crawl,districts,store} ...
+Ayrıntılar: python seher.py --help, python seher.py KOMUT --help
+"""
+import sys
+
+from main import Cli
+
+if __name__ == "__main__":
+    sys.exit(Cli.run())
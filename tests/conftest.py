@@ -0,0 +1,51 @@
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+# Depo paket değil; testler main modülünü kök dizinden içe aktarır (benchmarks/ gibi)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import Tools  # noqa: E402
+
+PATHS = ("BASE_DIR", "LOG_FILE", "SETTINGS", "PRAYER_TIMES", "PRAYER_STORE", "DISTRICTS", "SNAPSHOT")
+CACHES = ("_settings", "_prayer_times", "_prayer_times_district", "_prayer_times_file", "_prayer_index",
+          "_district_cache", "_prayer_store", "_writer")
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Tools'u varsayılan ayarlı boş bir veri dizinine yönlendir; yollar ve önbellekler testten sonra geri yüklenir"""
+    for name in PATHS + CACHES:
+        monkeypatch.setattr(Tools, name, getattr(Tools, name))
+    Tools.set_base_dir(tmp_path)
+    for name in CACHES:
+        setattr(Tools, name, None)
+    Tools.save_json(Tools.SETTINGS, copy.deepcopy(Tools._default_settings))
+    yield tmp_path
+    if Tools._prayer_store is not None:
+        Tools._prayer_store.close()
+    if Tools._writer is not None:
+        Tools._writer.flush()
+
+
+class FakeScheduler:
+    """Scheduler yerine geçer; kurulan işleri çalıştırmadan {isim: (gecikme ms, geri çağrı)} olarak tutar"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def schedule(self, name, delay_ms, callback):
+        self.jobs[name] = (delay_ms, callback)
+
+    def cancel(self, name):
+        self.jobs.pop(name, None)
+
+    def is_pending(self, name):
+        return name in self.jobs
+
+
+@pytest.fixture
+def scheduler():
+    return FakeScheduler()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import re
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import seher
+from main import Cli, Tools
+
+TIMES = ["05:00", "07:00", "12:30", "16:00", "18:30", "20:00"]
+
+
+@pytest.fixture
+def cli_dir(data_dir):
+    today = date.today()
+    Tools.merge_prayer_times({(today + timedelta(days=i)).isoformat(): TIMES for i in range(-1, 3)}, "9541")
+    Tools.get_writer().flush()
+    return data_dir
+
+
+def run(capsys, *argv):
+    args = Cli.parser().parse_args(list(argv))
+    code = getattr(Cli, args.command)(args)
+    out = capsys.readouterr().out
+    return code, json.loads(out) if args.json else out.strip()
+
+
+def test_prayer_state_reports_next_prayer(cli_dir):
+    now = datetime.combine(date.today(), datetime.min.time()).timestamp() + 13 * 3600  # 13:00
+    state = Tools.prayer_state(now=now)
+    assert state["district"] == "9541"
+    assert state["next"]["name"] == "İkindi" and state["next"]["slot"] == 3
+    assert state["remaining"] == {"seconds": 3 * 3600, "text": "3:00:00"}
+    assert state["today"]["Öğle"] == "12:30"
+
+
+def test_prayer_state_after_yatsi_points_to_tomorrows_imsak(cli_dir):
+    tomorrow = date.today() + timedelta(days=1)
+    now = datetime.combine(tomorrow, datetime.min.time()).timestamp() - 1800  # 23:30
+    state = Tools.prayer_state(now=now)
+    assert state["next"]["name"] == "İmsak"
+    assert state["next"]["time"] == f"{tomorrow.isoformat()}T05:00"
+
+
+def test_next_json(cli_dir, capsys):
+    code, state = run(capsys, "--json", "next")
+    assert code == 0
+    assert state["next"]["name"] in Tools.PRAYER_NAMES
+    assert state["remaining"]["seconds"] > 0
+
+
+def test_next_text(cli_dir, capsys):
+    code, text = run(capsys, "next")
+    assert code == 0 and text.endswith("kaldı)")
+
+
+def test_today_for_a_given_date(cli_dir, capsys):
+    day = (date.today() + timedelta(days=1)).isoformat()
+    code, data = run(capsys, "--json", "today", "--date", day)
+    assert code == 0
+    assert data == {"date": day, "times": dict(zip(Tools.PRAYER_NAMES, TIMES)), "source": "diyanet"}
+
+
+def test_today_past_the_data_is_marked_calculated(cli_dir, capsys):
+    pytest.importorskip("numpy")
+    day = (date.today() + timedelta(days=5)).isoformat()
+    code, data = run(capsys, "--json", "today", "--date", day)
+    assert code == 0 and data["source"] == "calculated"
+    code, text = run(capsys, "today", "--date", day)
+    assert text.endswith("(hesaplanan vakitler, Diyanet verisi değil)")
+
+
+def test_prayer_state_marks_calculated_next_prayer(cli_dir):
+    pytest.importorskip("numpy")
+    state = Tools.prayer_state(now=time.time())
+    assert state["source"] == state["next"]["source"] == "diyanet"
+    Tools.update_prayer_times({date.today().isoformat(): TIMES}, "9541")  # Veri bugünle bitiyor
+    after_data = datetime.combine(date.today() + timedelta(days=1), datetime.min.time()).timestamp() + 3600
+    state = Tools.prayer_state(now=after_data)
+    assert state["next"]["source"] == "calculated" and state["source"] == "calculated"
+    assert "[hesaplanan]" in Cli.describe(state)
+
+
+@pytest.mark.parametrize("days_later", [4, 40])
+def test_prayer_state_keeps_going_past_the_data_in_one_process(cli_dir, days_later):
+    pytest.importorskip("numpy")
+    index = Tools.get_prayer_index()  # Veri yarından sonraki gün bitiyor; indeks bir kez derlenir
+    later = datetime.combine(date.today() + timedelta(days=days_later), datetime.min.time()).timestamp()
+    state = Tools.prayer_state(now=later)
+    assert state["next"]["source"] == "calculated"
+    assert state["next"]["time"].startswith((date.today() + timedelta(days=days_later)).isoformat())
+    assert Tools.get_prayer_index() is index and index.fetched_last < later
+
+
+def test_store_import_info_export_round_trip(cli_dir, capsys, tmp_path):
+    code, data = run(capsys, "--json", "store", "import")
+    assert (code, data["days"]) == (0, 4)
+    code, coverage = run(capsys, "--json", "store", "info")
+    assert list(coverage) == ["9541"]
+    exported = tmp_path / "disa.json"
+    code, data = run(capsys, "--json", "store", "export", "9541", str(exported))
+    assert data["days"] == 4
+    assert Tools.load_prayer_times(exported) == Tools.load_prayer_times()
+
+
+def test_invalid_plate_is_rejected(cli_dir, capsys):
+    code, data = run(capsys, "--json", "crawl", "99")
+    assert code == 1 and data == {"error": "invalid plate", "plate": "99"}
+
+
+def test_launcher_usage_lists_every_command():
+    commands = next(a for a in Cli.parser()._actions if isinstance(a, argparse._SubParsersAction))
+    listed = re.search(r"\{([a-z,]+)\}", seher.__doc__).group(1).split(",")
+    assert listed == list(commands.choices)
@@ -0,0 +1,84 @@
+import copy
+
+import pytest
+
+from main import ClockGroup, Tools
+
+ANKARA = {"city": {"name": "Ankara", "id": "506"}, "district": {"name": "ANKARA", "id": "9206"}, "label": "Ankara"}
+
+
+class FakeClock:
+    def __init__(self, location):
+        self.location = location
+        self.reloads = 0
+
+    def reload(self):
+        self.reloads += 1
+
+    def destroy(self):
+        self.destroyed = True
+
+
+@pytest.fixture
+def group(data_dir, scheduler):
+    group = ClockGroup(scheduler)
+    location = copy.deepcopy(ANKARA)
+    group.extras["9206"] = FakeClock(location)
+    group.sync(None, [location])  # İlk eşleme: saat kurulduğu ayarlarla işaretlenir
+    group.extras["9206"].reloads = 0
+    return group
+
+
+def test_unchanged_extras_are_not_reloaded(group):
+    group.sync(None, Tools.get_settings().get("LOCATIONS", []) + [group.extras["9206"].location])
+    assert group.extras["9206"].reloads == 0
+
+
+def test_dragged_position_does_not_reload(group):
+    location = group.extras["9206"].location
+    location["position"] = {"x": 10, "y": 20}
+    Tools.get_settings()["DISPLAY"]["position"] = {"x": 30, "y": 40}
+    group.sync(None, [location])
+    assert group.extras["9206"].reloads == 0
+
+
+def test_changed_label_or_colors_reload(group):
+    location = dict(group.extras["9206"].location, label="Şube")
+    group.sync(None, [location])
+    assert group.extras["9206"].reloads == 1
+    Tools.get_settings()["COLORS"]["warning"]["trigger"] = 30
+    group.sync(None, [location])
+    assert group.extras["9206"].reloads == 2
+
+
+def test_removed_location_is_destroyed(group):
+    clock = group.extras["9206"]
+    group.sync(None, [])
+    assert clock.destroyed and not group.extras
+
+
+def test_reload_location_only_touches_that_clock(group):
+    group.reload_location(9206)
+    group.reload_location("9541")
+    assert group.extras["9206"].reloads == 1
+
+
+class TickingClock:
+    def __init__(self, group, fail=False):
+        self.group, self.fail, self.updates = group, fail, 0
+
+    def update_clock(self):
+        self.updates += 1
+        if self.fail:
+            raise RuntimeError("bozuk saat")
+        self.group.request(self, 1000)
+
+
+def test_failing_clock_does_not_stop_the_others(data_dir, scheduler):
+    group = ClockGroup(scheduler)
+    broken, healthy = TickingClock(group, fail=True), TickingClock(group)
+    group._due = {broken: 0, healthy: 0}
+    group._tick()
+    assert healthy.updates == 1 and broken.updates == 1
+    assert "clock" in scheduler.jobs  # Ortak tik yeniden kuruldu
+    assert group._due[broken] > group._due[healthy]  # Hatalı saat bir dakika sonra denenir
@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+import pytest
+
+from main import ColorPicker
+
+colorchooser = pytest.importorskip("ttkbootstrap.dialogs.colorchooser")
+ColorChoice = namedtuple("ColorChoice", "rgb hsl hex")
+
+
+class PublicOnlyDialog:
+    """Yalnızca genel API'yi sunan, iç ayrıntıları olmayan diyalog"""
+    shown = []
+
+    def __init__(self, parent=None, title="", initialcolor=None):
+        self.initialcolor = initialcolor
+        self.result = None
+
+    def build(self):
+        pass
+
+    def show(self):
+        PublicOnlyDialog.shown.append(self.initialcolor)
+        self.result = ColorChoice((0, 0, 0), (0, 0, 0), "#123456")
+
+
+def test_falls_back_to_public_api_without_internals(monkeypatch):
+    monkeypatch.setattr(colorchooser, "ColorChooserDialog", PublicOnlyDialog)
+    PublicOnlyDialog.shown.clear()
+    picker = ColorPicker(parent=None)
+    assert picker.dialog is None
+    assert picker.ask("#ffffff") == "#123456"
+    assert PublicOnlyDialog.shown == ["#ffffff"]
+    picker.destroy()
+
+
+def test_cancelled_fallback_returns_none(monkeypatch):
+    class Cancelled(PublicOnlyDialog):
+        def show(self):
+            self.result = None
+
+    monkeypatch.setattr(colorchooser, "ColorChooserDialog", Cancelled)
+    assert ColorPicker(parent=None).ask("#ffffff") is None
@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+import requests
+
+from main import Crawler, DiyanetApi, HttpClient, PrayerStore, RateLimiter, Tools
+
+TIMES = {(date.today() + timedelta(days=i)).isoformat(): ["05:00", "07:00", "12:30", "16:00", "18:30", "20:00"]
+         for i in range(30)}
+DISTRICTS = {f"ILCE{i}": str(20000 + i) for i in range(12)}
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.waits = 0
+
+    def wait(self):
+        self.waits += 1
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(50)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.wait()
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+
+
+def test_every_http_attempt_waits_for_the_limiter(monkeypatch):
+    limiter = CountingLimiter()
+    client = HttpClient(limiter=limiter)
+    client.BACKOFF = 0
+
+    def refuse(*args, **kwargs):
+        raise requests.ConnectionError("bağlantı reddedildi")
+
+    monkeypatch.setattr(client.session, "get", refuse)
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://127.0.0.1:9/")
+    assert limiter.waits == HttpClient.RETRIES + 1
+
+
+@pytest.fixture
+def crawl_dir(data_dir):
+    # İlçe listesi önbellekte taze: tarama yalnızca vakit sayfalarını ister
+    Tools.save_json(Tools.DISTRICTS, {"500": {"fetched": int(time.time()), "districts": DISTRICTS}})
+    yield data_dir
+    DiyanetApi.client().limiter = None
+
+
+def make_crawler(data_dir):
+    store = PrayerStore(Tools.PRAYER_STORE)
+    return store, Crawler(store, data_dir / "tarama.json", workers=2, rate=1000)
+
+
+def test_interrupted_crawl_resumes_from_checkpoint(crawl_dir, monkeypatch):
+    fetched = []
+
+    def interrupted(self, district_id):
+        if len(fetched) >= 5:
+            raise KeyboardInterrupt
+        fetched.append(district_id)
+        return TIMES
+
+    monkeypatch.setattr(Crawler, "COMMIT_EVERY", 1)
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times", interrupted)
+    store, crawler = make_crawler(crawl_dir)
+    crawler.load_checkpoint()
+    with pytest.raises(KeyboardInterrupt):
+        crawler.run(["500"])
+    store.close()
+    first_run = set(fetched)
+    assert first_run and len(first_run) <= 5
+
+    resumed = []
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times", lambda self, district_id: resumed.append(district_id) or TIMES)
+    store, crawler = make_crawler(crawl_dir)
+    assert crawler.load_checkpoint() == len(first_run)
+    assert crawler.run(["500"]) == (len(DISTRICTS) - len(first_run), 0)
+    assert first_run.isdisjoint(resumed)
+    assert sorted(map(str, store.districts())) == sorted(DISTRICTS.values())
+    store.close()
+
+
+def test_same_day_rerun_fetches_nothing_and_fresh_starts_over(crawl_dir, monkeypatch):
+    calls = []
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times", lambda self, district_id: calls.append(district_id) or TIMES)
+    store, crawler = make_crawler(crawl_dir)
+    crawler.run(["500"])
+    store.close()
+
+    store, crawler = make_crawler(crawl_dir)
+    assert crawler.load_checkpoint() == len(DISTRICTS)
+    assert crawler.run(["500"]) == (0, 0)
+    store.close()
+
+    store, crawler = make_crawler(crawl_dir)
+    assert crawler.load_checkpoint(fresh=True) == 0
+    assert crawler.run(["500"]) == (len(DISTRICTS), 0)
+    store.close()
+    assert len(calls) == 2 * len(DISTRICTS)
+
+
+def test_checkpoint_of_another_day_is_ignored(crawl_dir):
+    Tools.save_json(crawl_dir / "tarama.json", {"date": "2000-01-01", "done": {"20000": 30}, "failed": {}})
+    store, crawler = make_crawler(crawl_dir)
+    assert crawler.load_checkpoint() == 0
+    store.close()
+
+
+def test_failed_districts_are_recorded_and_retried(crawl_dir, monkeypatch):
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times",
+                        lambda self, district_id: None if district_id == "20003" else TIMES)
+    store, crawler = make_crawler(crawl_dir)
+    assert crawler.run(["500"]) == (len(DISTRICTS) - 1, 1)
+    store.close()
+    assert Tools.load_json(crawl_dir / "tarama.json")["failed"] == {"20003": "vakitler alınamadı"}
+
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times", lambda self, district_id: TIMES)
+    store, crawler = make_crawler(crawl_dir)
+    crawler.load_checkpoint()
+    assert crawler.run(["500"]) == (1, 0)
+    store.close()
+
+
+def test_city_of_tolerates_concurrent_fetches(crawl_dir, monkeypatch):
+    cache = Tools.get_district_cache()
+    monkeypatch.setattr(cache.api, "get_districts", lambda city_id: {f"X{city_id}": f"9{city_id}"})
+    stop = threading.Event()
+
+    def fetch_many():
+        for city_id in range(1000, 1400):
+            cache.fetch(city_id)
+        stop.set()
+
+    worker = threading.Thread(target=fetch_many)
+    worker.start()
+    while not stop.is_set():
+        assert cache.city_of("20005") == "500"
+    worker.join()
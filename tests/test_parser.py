@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_parse import parse_bs4
+from main import DiyanetApi
+
+pytest.importorskip("bs4")
+PAGES = sorted((Path(__file__).resolve().parent.parent / "benchmarks" / "pages").glob("*.html"))
+ROW = ("<tr><td>{day} Ekim 2026 Cuma</td><td>x</td><td>05:4{day}</td><td>07:0{day}</td>"
+       "<td>12:5{day}</td><td>16:0{day}</td><td>18:3{day}</td><td>19:5{day}</td></tr>")
+
+
+def table(tab, days):
+    rows = "".join(ROW.format(day=d) for d in days)
+    return f'<div id="{tab}"><table class="table vakit-table"><tbody>{rows}</tbody></table></div>'
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda p: p.stem)
+def test_stream_matches_bs4_on_sample_pages(page):
+    html_content = page.read_text(encoding="utf-8")
+    expected = parse_bs4(html_content)
+    assert len(expected) >= 28
+    assert DiyanetApi().parse_times(html_content, "stream") == expected
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda p: p.stem)
+def test_lxml_matches_bs4_on_sample_pages(page):
+    pytest.importorskip("lxml")
+    html_content = page.read_text(encoding="utf-8")
+    assert DiyanetApi().parse_times(html_content, "lxml") == parse_bs4(html_content)
+
+
+def test_data_id_attribute_is_not_the_tab():
+    html_content = ("<html><body>"
+                    '<a data-id="tab-1" href="#tab-1">Aylık</a>'
+                    + table("tab-0", [1]) + table("tab-1", [2, 3]) + table("tab-2", [4])
+                    + "</body></html>")
+    assert DiyanetApi().parse_times(html_content, "stream") == parse_bs4(html_content)
+    assert list(parse_bs4(html_content)) == ["2026-10-2", "2026-10-3"]
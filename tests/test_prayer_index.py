@@ -0,0 +1,77 @@
+from datetime import date, datetime
+
+import pytest
+
+from main import PrayerIndex
+
+DAY1 = ["05:00", "07:00", "12:30", "16:00", "18:30", "20:00"]
+DAY2 = ["04:58", "06:59", "12:30", "16:01", "18:31", "20:02"]
+
+
+def stamp(day, clock):
+    return datetime.fromisoformat(f"{day} {clock}").timestamp()
+
+
+@pytest.fixture
+def index():
+    return PrayerIndex({"2025-03-01": DAY1, "2025-03-02": DAY2})
+
+
+def test_entries_are_sorted_with_slots(index):
+    assert len(index) == 12
+    assert list(index.timestamps) == sorted(index.timestamps)
+    assert list(index.slots) == [0, 1, 2, 3, 4, 5] * 2
+    assert index.first == stamp("2025-03-01", "05:00")
+    assert index.last == stamp("2025-03-02", "20:02")
+
+
+def test_next_after_midnight_is_next_days_imsak(index):
+    midnight = datetime(2025, 3, 2).timestamp()
+    assert index.next_after(midnight) == stamp("2025-03-02", "04:58")
+    assert index.next_entry(midnight) == (stamp("2025-03-02", "04:58"), 0)
+    assert index.previous_before(midnight) == stamp("2025-03-01", "20:00")
+
+
+def test_prayer_instant_counts_as_passed(index):
+    moment = stamp("2025-03-01", "12:30")
+    assert index.next_after(moment) == stamp("2025-03-01", "16:00")
+    assert index.previous_before(moment) == moment
+
+
+def test_last_day_runs_out(index):
+    assert index.next_after(stamp("2025-03-02", "20:00")) == stamp("2025-03-02", "20:02")
+    assert index.next_after(stamp("2025-03-02", "20:02")) is None
+    assert index.next_entry(stamp("2025-03-02", "23:59")) is None
+    assert index.next_prayer_time(datetime(2025, 3, 2, 21)) is None
+    assert index.previous_before(stamp("2025-03-01", "04:00")) is None
+
+
+def test_next_prayer_time_returns_datetime(index):
+    assert index.next_prayer_time(datetime(2025, 3, 1, 23, 59)) == datetime(2025, 3, 2, 4, 58)
+
+
+def test_invalid_days_are_skipped():
+    index = PrayerIndex({"2025-03-01": DAY1, "bozuk": DAY2, "2025-03-02": None})
+    assert len(index) == 6
+
+
+def test_empty_index():
+    index = PrayerIndex()
+    assert len(index) == 0 and index.first is None and index.last is None
+    assert index.next_after(0) is None and index.previous_before(0) is None
+
+
+def test_from_days_matches_text_index(index):
+    minutes = lambda clocks: tuple(int(c[:2]) * 60 + int(c[3:]) for c in clocks)
+    built = PrayerIndex.from_days([(date(2025, 3, 1), minutes(DAY1)), (date(2025, 3, 2), minutes(DAY2))])
+    assert built.timestamps == index.timestamps and built.slots == index.slots
+
+
+def test_extend_keeps_fetched_end(index):
+    fetched_last = index.fetched_last
+    index.extend([(date(2025, 3, 3), (300, 420, 750, 960, 1110, 1200))])
+    assert len(index) == 18
+    assert index.fetched_last == fetched_last
+    assert index.last == datetime(2025, 3, 3, 20).timestamp()
+    assert index.next_after(fetched_last) == datetime(2025, 3, 3, 5).timestamp()
+
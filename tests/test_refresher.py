@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+
+import pytest
+
+from main import DiyanetApi, PrayerTimesRefresher, Tools
+
+TIMES = ["05:00", "07:00", "12:30", "16:00", "18:30", "20:00"]
+
+
+def days(start, count):
+    return {(start + timedelta(days=i)).isoformat(): TIMES for i in range(count)}
+
+
+@pytest.fixture
+def refresher(data_dir, scheduler):
+    return PrayerTimesRefresher(scheduler, None)
+
+
+def scheduled_seconds(scheduler):
+    return scheduler.jobs["refresh"][0] / 1000
+
+
+def primary():
+    return str(Tools.get_settings()['LOCATION']['district']['id'])
+
+
+def test_failures_back_off_exponentially(refresher, scheduler):
+    for failures in range(4):
+        refresher._on_fetched(primary(), None)
+        expected = PrayerTimesRefresher.RETRY_MIN * 2 ** failures
+        assert expected * 0.8 <= scheduled_seconds(scheduler) <= expected * 1.2
+    assert refresher._failures == 4
+
+
+def test_backoff_is_capped(refresher, scheduler):
+    refresher._failures = 20
+    refresher._on_fetched(primary(), None)
+    assert scheduled_seconds(scheduler) <= PrayerTimesRefresher.RETRY_MAX * 1.2
+
+
+def test_success_without_new_days_is_not_a_failure(refresher, scheduler):
+    times = days(date.today(), 30)
+    refresher._on_fetched(primary(), times)
+    refresher._failures = 3
+    refresher._on_fetched(primary(), times)  # Aynı günler: yeni gün yok
+    assert refresher._failures == 0
+    # Kapsam 30 gün: bir sonraki yoklama eşiğe kadar (en fazla MAX_CHECK_DELAY) bekler
+    assert scheduled_seconds(scheduler) == pytest.approx(refresher.until_horizon(), abs=5)
+    assert scheduled_seconds(scheduler) > PrayerTimesRefresher.RETRY_MIN
+
+
+def test_short_window_waits_max_check_delay(refresher, scheduler):
+    refresher._on_fetched(primary(), days(date.today(), 3))
+    assert scheduled_seconds(scheduler) == PrayerTimesRefresher.MAX_CHECK_DELAY
+
+
+def test_merge_keeps_days_of_same_district(data_dir):
+    today = date.today()
+    assert Tools.merge_prayer_times(days(today, 5), "9541")
+    assert Tools.merge_prayer_times(days(today + timedelta(days=5), 5), "9541")
+    assert not Tools.merge_prayer_times(days(today, 5), "9541")
+    assert len(Tools.get_prayer_times()) == 10
+
+
+def test_merge_replaces_other_districts_file(data_dir):
+    today = date.today()
+    Tools.merge_prayer_times(days(today - timedelta(days=3), 10), "9541")
+    other = {today.isoformat(): ["04:00", "06:00", "12:00", "15:00", "18:00", "19:30"]}
+    assert Tools.merge_prayer_times(other, "9206")
+    Tools.get_writer().flush()
+    assert Tools.load_prayer_times() == ("9206", other)
+
+
+def test_file_of_previous_location_is_not_shown(data_dir):
+    Tools.merge_prayer_times(days(date.today(), 5), "9541")
+    assert len(Tools.get_prayer_times()) == 5
+    Tools.get_settings()['LOCATION']['district']['id'] = "9206"
+    assert Tools.get_prayer_times() == {}
+
+
+def test_legacy_file_belongs_to_settings_district(data_dir):
+    Tools.save_json(Tools.PRAYER_TIMES, days(date.today(), 5))
+    assert Tools._prayer_times_data()[0] == "9541"
+    assert len(Tools.get_prayer_times()) == 5
+
+
+def test_location_store_is_built_off_thread_and_swapped(data_dir, scheduler, monkeypatch):
+    updated = []
+    refresher = PrayerTimesRefresher(scheduler, None, on_location_update=updated.append)
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times", lambda self, district_id: days(date.today(), 20))
+    staged = PrayerTimesRefresher._fetch_location("9206")
+    store = Tools.get_prayer_store()
+    assert staged.exists() and store.districts() == []  # Eşlem henüz değişmedi
+    refresher._on_location_fetched("9206", staged)
+    assert store.districts() == [9206]
+    assert updated == ["9206"]
+    assert refresher.location_coverage("9206") > PrayerTimesRefresher.HORIZON_DAYS * 86400
+
+
+def test_superseded_location_is_reloaded_when_the_later_swap_lands(data_dir, scheduler, monkeypatch):
+    updated = []
+    refresher = PrayerTimesRefresher(scheduler, None, on_location_update=updated.append)
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times", lambda self, district_id: days(date.today(), 20))
+    # İki ek konum aynı anda yenilendi; ikisi de sonuçları işlenmeden hazırlandı
+    first = PrayerTimesRefresher._fetch_location("9206")
+    second = PrayerTimesRefresher._fetch_location("506")
+    refresher._on_location_fetched("9206", first)
+    assert updated == []  # Sonraki hazırlık kapsıyor; güncelleme onunla gelir
+    refresher._on_location_fetched("506", second)
+    assert sorted(updated) == ["506", "9206"]
+    assert Tools.get_prayer_store().districts() == [506, 9206]
+
+
+def test_failed_location_fetch_stages_nothing(data_dir, scheduler, monkeypatch):
+    updated = []
+    refresher = PrayerTimesRefresher(scheduler, None, on_location_update=updated.append)
+    monkeypatch.setattr(DiyanetApi, "fetch_prayer_times", lambda self, district_id: None)
+    refresher._on_location_fetched("9206", PrayerTimesRefresher._fetch_location("9206"))
+    assert updated == [] and not Tools.PRAYER_STORE.exists()
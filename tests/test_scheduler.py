@@ -0,0 +1,23 @@
+from main import Diagnostics, Scheduler
+
+
+def test_run_records_drift_pending_and_handler_once(data_dir):
+    scheduler = Scheduler(None)
+    diagnostics = scheduler.diagnostics = Diagnostics()
+    calls = []
+    scheduler._run("tick", lambda: calls.append(1), expected=0.0)
+    scheduler._run("tick", lambda: calls.append(1))
+    assert calls == [1, 1]
+    assert diagnostics.histograms["tick.handler_ms"].total == 2
+    assert diagnostics.histograms["tick.drift_ms"].total == 1  # Boşta çalışan işin beklenen anı yok
+    assert diagnostics.histograms["timers.pending"].total == 2
+    assert scheduler._metric_names == {"tick": ("tick.drift_ms", "tick.handler_ms")}
+
+
+def test_record_many_matches_record():
+    one, many = Diagnostics(), Diagnostics()
+    records = [("a_ms", 0.3, Diagnostics.MS_BOUNDS), ("n", 3, Diagnostics.COUNT_BOUNDS)]
+    for record in records:
+        one.record(*record)
+    many.record_many(records)
+    assert one.snapshot()["histograms"] == many.snapshot()["histograms"]
@@ -0,0 +1,86 @@
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from main import PrayerService, PrayerStore, Tools
+
+DAY = date.today()
+TIMES = ["05:00", "07:00", "12:30", "16:00", "18:30", "20:00"]
+
+
+def at(clock, day=DAY):
+    return datetime.fromisoformat(f"{day.isoformat()} {clock}").timestamp()
+
+
+@pytest.fixture
+def service(data_dir):
+    Tools.merge_prayer_times({(DAY + timedelta(days=i)).isoformat(): TIMES for i in range(2)}, "9541")
+    Tools.get_writer().flush()
+    PrayerStore.write(Tools.PRAYER_STORE, {9206: {DAY: (290, 410, 745, 955, 1105, 1195)}})
+    return PrayerService()
+
+
+def test_next_is_cached_until_the_prayer(service):
+    status, headers, body = service.respond("/next", now=at("13:00"))
+    assert status == 200
+    assert json.loads(body)["name"] == "İkindi"
+    assert headers["Cache-Control"] == "public, max-age=10800"
+    assert service.respond("/next", now=at("13:30"))[2] == body  # Aynı önbellek girdisi
+    status, later, body_after = service.respond("/next", now=at("16:00"))
+    assert json.loads(body_after)["name"] == "Akşam"
+    assert later["ETag"] != headers["ETag"]
+
+
+def test_matching_etag_returns_304_without_body(service):
+    _, headers, _ = service.respond("/next", now=at("13:00"))
+    status, headers_304, body = service.respond("/next", etag=headers["ETag"], now=at("13:01"))
+    assert (status, body) == (304, b"")
+    assert headers_304["ETag"] == headers["ETag"]
+    assert headers_304["Cache-Control"] == "public, max-age=10740"
+    assert service.respond("/next", etag='"eski"', now=at("13:01"))[0] == 200
+
+
+def test_today_expires_at_midnight(service):
+    status, headers, body = service.respond("/today", now=at("23:00"))
+    assert status == 200 and headers["Cache-Control"] == "public, max-age=3600"
+    assert json.loads(body)["times"]["Öğle"] == "12:30"
+
+
+def test_other_district_from_store(service):
+    status, _, body = service.respond("/today?district=9206", now=at("10:00"))
+    assert status == 200 and json.loads(body)["times"]["İmsak"] == "04:50"
+    status, _, body = service.respond("/districts", now=at("10:00"))
+    assert set(json.loads(body)) == {"9206", "9541"}
+
+
+@pytest.mark.parametrize("path, status", [
+    ("/day/2000-01-01?district=1", 404), ("/day/bozuk", 400), ("/yok", 404), ("/next?district=1", 404),
+])
+def test_errors_are_not_cached(service, path, status):
+    code, headers, body = service.respond(path, now=at("10:00"))
+    assert code == status and headers["Cache-Control"] == "no-store"
+    assert "error" in json.loads(body)
+    assert (path.partition("?")[0], "1" if "district" in path else "9541") not in service._responses
+
+
+def test_changed_data_files_are_reloaded(service):
+    service.respond("/today?district=9206", now=at("10:00"))
+    PrayerStore.write(Tools.PRAYER_STORE, {9206: {DAY: (300, 420, 750, 960, 1110, 1200)}})
+    os.utime(Tools.PRAYER_STORE, ns=(0, 1))  # Aynı saniyede yazılsa da değişiklik görünsün
+    _, _, body = service.respond("/today?district=9206", now=at("10:00") + PrayerService.RELOAD_CHECK + 1)
+    assert json.loads(body)["times"]["İmsak"] == "05:00"
+
+
+def test_service_serves_calculated_times_past_the_data(service):
+    pytest.importorskip("numpy")
+    status, _, body = service.respond("/next", now=at("13:00"))
+    assert json.loads(body)["source"] == "diyanet"
+    later = DAY + timedelta(days=5)  # vakitler.json iki gün sürüyor; servis aynı süreçte çalışmaya devam ediyor
+    status, _, body = service.respond("/next", now=at("13:00", later))
+    data = json.loads(body)
+    assert status == 200 and data["source"] == "calculated" and data["time"].startswith(later.isoformat())
+    status, _, body = service.respond(f"/day/{later.isoformat()}", now=at("13:00", later))
+    assert status == 200 and json.loads(body)["source"] == "calculated"
+    assert json.loads(service.respond("/today", now=at("10:00"))[2])["source"] == "diyanet"
@@ -0,0 +1,93 @@
+from datetime import date, timedelta
+
+import pytest
+
+from main import PrayerIndex, PrayerStore, Tools
+
+START = date(2025, 1, 1)
+
+
+def times(start, count, base=300):
+    return {(start + timedelta(days=i)).isoformat(): [Tools.to_clock(base + i + slot * 120) for slot in range(6)]
+            for i in range(count)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PrayerStore(tmp_path / "vakitler.bin")
+    yield store
+    store.close()
+
+
+def test_empty_store(store):
+    assert store.districts() == []
+    assert store.coverage(9541) is None
+    assert store.get_day(9541, START) is None
+    assert list(store.iter_days(9541)) == []
+
+
+def test_write_update_read_round_trip(store):
+    store.update({"9541": times(START, 10)})
+    store.update({"9206": times(START, 5, base=320)})
+    assert store.districts() == [9206, 9541]
+    assert store.get_times("9541") == times(START, 10)
+    assert store.get_times("9206") == times(START, 5, base=320)
+    assert store.coverage("9541") == (START, START + timedelta(days=9))
+    assert store.get_times("9541", START + timedelta(days=2), START + timedelta(days=3)) == \
+        {day: clock for day, clock in times(START, 10).items() if day in ("2025-01-03", "2025-01-04")}
+
+    reopened = PrayerStore(store.path)
+    assert reopened.get_times("9541") == times(START, 10)
+    reopened.close()
+
+
+def test_update_merges_days_and_leaves_gaps_missing(store):
+    store.update({"9541": times(START, 3)})
+    later = START + timedelta(days=10)
+    store.update({"9541": times(later, 2)})
+    assert store.coverage("9541") == (START, later + timedelta(days=1))
+    assert len(store.get_times("9541")) == 5
+    for gap in range(3, 10):
+        assert store.get_day("9541", START + timedelta(days=gap)) is None
+    index = PrayerIndex.from_store(store, "9541")
+    assert len(index) == 5 * 6
+
+
+def test_update_overwrites_existing_days(store):
+    store.update({"9541": times(START, 3)})
+    store.update({"9541": times(START + timedelta(days=1), 1, base=400)})
+    assert store.get_times("9541", START + timedelta(days=1), START + timedelta(days=1)) == \
+        times(START + timedelta(days=1), 1, base=400)
+    assert store.get_day("9541", START) == tuple(Tools.to_minutes(c) for c in times(START, 1)["2025-01-01"])
+
+
+def test_untouched_blocks_are_copied_byte_for_byte(store, tmp_path):
+    store.update({"9541": times(START, 30), "9206": times(START, 20, base=320)})
+    later = dict(list(times(START, 25, base=320).items())[20:])
+    store.update({"9206": later})
+    expected = tmp_path / "beklenen.bin"
+    PrayerStore.write(expected, {
+        9206: {date.fromisoformat(d): tuple(map(Tools.to_minutes, c))
+               for d, c in times(START, 25, base=320).items()},
+        9541: {date.fromisoformat(d): tuple(map(Tools.to_minutes, c)) for d, c in times(START, 30).items()},
+    })
+    assert store.path.read_bytes() == expected.read_bytes()
+
+
+def test_stage_keeps_mapping_until_swap(store):
+    store.update({"9541": times(START, 3)})
+    staged = store.stage({"9206": times(START, 3)})
+    assert store.districts() == [9541]
+    assert store.swap(staged) == {9206}
+    assert store.districts() == [9206, 9541]
+    assert not staged.exists()
+
+
+def test_later_stage_supersedes_earlier(store):
+    first = store.stage({"9541": times(START, 3)})
+    second = store.stage({"9206": times(START, 3)})
+    assert store.swap(first) == set()  # İkinci hazırlık ilkini kapsıyor
+    assert store.districts() == []
+    assert store.swap(second) == {9206, 9541}  # İlkinin ilçesi de bildirilir
+    assert store.districts() == [9206, 9541]
+    assert not first.exists() and not second.exists()
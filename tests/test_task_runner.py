@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from main import TaskRunner
+
+
+@pytest.fixture
+def runner(scheduler):
+    runner = TaskRunner(scheduler)
+    yield runner
+    runner.shutdown()
+
+
+def deliver(runner, *futures):
+    wait(futures, timeout=5)
+    runner._poll()
+
+
+def test_same_key_is_coalesced(runner):
+    release = threading.Event()
+    assert runner.submit("times", release.wait, 5)
+    assert not runner.submit("times", release.wait, 5)
+    assert runner.busy("times")
+    release.set()
+    deliver(runner, runner._tasks["times"]["future"])
+    assert runner.idle
+
+
+def test_results_are_delivered_on_poll(runner, scheduler):
+    results = []
+    runner.submit("a", lambda: 1, on_done=results.append)
+    assert "tasks" in scheduler.jobs  # Kuyruk yalnızca süren iş varken yoklanır
+    deliver(runner, runner._tasks["a"]["future"])
+    assert results == [1]
+
+
+def test_errors_go_to_on_error(runner):
+    errors = []
+    runner.submit("a", lambda: 1 / 0, on_done=pytest.fail, on_error=errors.append)
+    deliver(runner, runner._tasks["a"]["future"])
+    assert isinstance(errors[0], ZeroDivisionError)
+
+
+def test_cancelled_owner_frees_key_and_its_result_is_ignored(runner):
+    owner, results = object(), []
+    release = threading.Event()
+    runner.submit("times", lambda: release.wait(5) and "eski", on_done=results.append, owner=owner)
+    running = runner._tasks["times"]["future"]
+    runner.cancel_owner(owner)
+    assert not runner.busy("times")
+
+    # Pencere yeniden açıldı: aynı anahtar hemen yeniden kullanılabilir
+    assert runner.submit("times", lambda: "yeni", on_done=results.append, owner=object())
+    fresh = runner._tasks["times"]["future"]
+    release.set()
+    deliver(runner, running, fresh)
+    assert results == ["yeni"]
+    assert runner.idle
+
+
+def test_cancel_owner_keeps_other_owners_tasks(runner):
+    release = threading.Event()
+    runner.submit("a", release.wait, 5, owner="pencere")
+    runner.submit("b", release.wait, 5, owner="saat")
+    runner.cancel_owner("pencere")
+    assert not runner.busy("a") and runner.busy("b")
+    release.set()
+
+
+def test_failing_callback_does_not_block_other_results(runner, scheduler):
+    results = []
+
+    def broken(result):
+        raise RuntimeError("geri çağrı hatası")
+
+    release = threading.Event()
+    runner.submit("a", lambda: 1, on_done=broken)
+    runner.submit("b", lambda: 2, on_done=results.append)
+    runner.submit("c", release.wait, 5)
+    scheduler.jobs.clear()
+    deliver(runner, runner._tasks["a"]["future"], runner._tasks["b"]["future"])
+    assert results == [2]
+    assert "tasks" in scheduler.jobs  # Süren iş için yoklama sürüyor
+    release.set()
@@ -0,0 +1,73 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from main import ClockWidget, PrayerIndex, Timeline, Tools
+
+COLORS = {"standard": {"trigger": 0}, "warning": {"trigger": 45}, "critical": {"trigger": 15}}
+DAY = date(2025, 3, 1)
+MINUTES = [300, 420, 750, 960, 1110, 1200]  # 05:00 07:00 12:30 16:00 18:30 20:00
+
+
+@pytest.fixture
+def timeline():
+    return Timeline(PrayerIndex.from_days([(DAY, MINUTES)]), COLORS)
+
+
+def at_minute(minute):
+    return datetime(DAY.year, DAY.month, DAY.day).timestamp() + minute * 60
+
+
+@pytest.mark.parametrize("remaining, state", [
+    (2701, "standard"), (2700, "standard"), (2699.5, "warning"), (2699, "warning"),
+    (901, "warning"), (900, "warning"), (899, "critical"), (0, "critical"),
+])
+def test_state_for_starts_below_trigger_minute(remaining, state):
+    # 45:00 hâlâ standart, 44:59 uyarı; 15:00 uyarı, 14:59 kritik
+    assert Timeline.state_for(remaining, COLORS) == state
+
+
+@pytest.mark.parametrize("offset, state", [
+    (2701, "standard"), (2700, "standard"), (2699.999, "warning"), (2699, "warning"),
+    (900.5, "warning"), (900, "warning"), (899.999, "critical"), (1, "critical"),
+])
+def test_at_matches_state_for_at_boundaries(timeline, offset, state):
+    target = at_minute(960)
+    got, got_target, _ = timeline.at(target - offset)
+    assert (got, got_target) == (state, target)
+    assert got == Timeline.state_for(target - (target - offset), COLORS)
+
+
+def test_at_reports_next_change(timeline):
+    target = at_minute(960)
+    _, _, next_change = timeline.at(target - 3000)
+    assert next_change == target - 2700
+    # Eşik anının kendisinde hâlâ standart; sonraki olay o an olarak bildirilir, tik hemen tekrar eder
+    assert timeline.at(target - 2700) == ("standard", target, target - 2700)
+
+
+def test_prayer_boundary_switches_target_at_the_instant(timeline):
+    state, target, _ = timeline.at(at_minute(750))
+    assert target == at_minute(960)
+    assert state == "standard"
+
+
+def test_after_last_prayer_has_no_target(timeline):
+    assert timeline.at(at_minute(1200)) == ("standard", None, None)
+    assert timeline.at(at_minute(1300))[1] is None
+
+
+def test_clock_extends_its_index_when_the_data_runs_out(data_dir):
+    pytest.importorskip("numpy")
+    today = date.today()
+    clock = ClockWidget.__new__(ClockWidget)  # Tk olmadan yalnızca zaman çizelgesi yolu
+    clock.location, clock._settings = None, Tools.get_settings()
+    clock._prayer_index = PrayerIndex.from_days([(today, MINUTES)])
+    clock._timeline = Timeline(clock._prayer_index, clock._settings["COLORS"])
+    clock._next_prayer_time, clock._color_state = None, None
+    clock.apply_color_state = clock.save_snapshot = lambda *args: None
+    # Aynı süreçte günler geçti ve yenileme yapılamadı: saat durmaz, hesaplanan vakitleri sayar
+    later = datetime.combine(today + timedelta(days=3), datetime.min.time()).timestamp()
+    clock.advance_timeline(later)
+    assert clock._next_prayer_time and clock._next_prayer_time > later
+    assert clock._calculated and clock._next_change is not None
@@ -0,0 +1,66 @@
+import time
+
+from main import Tools, WriteBehind
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "zaman aşımı"
+        time.sleep(0.01)
+
+
+def test_burst_is_coalesced_into_last_value(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(WriteBehind, "_save", staticmethod(lambda path, data: saved.append((path, data))))
+    writer = WriteBehind(quiet_period=0.2)
+    path = tmp_path / "ayarlar.json"
+    for x in range(10):
+        writer.write(path, {"x": x})
+    time.sleep(0.05)
+    assert saved == []  # Sessiz süre dolmadan yazılmaz
+    wait_for(lambda: saved)
+    time.sleep(0.3)
+    assert saved == [(path, {"x": 9})]
+
+
+def test_each_write_restarts_the_quiet_period(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(WriteBehind, "_save", staticmethod(lambda path, data: saved.append(data)))
+    writer = WriteBehind(quiet_period=0.2)
+    path = tmp_path / "ayarlar.json"
+    for x in range(5):
+        writer.write(path, {"x": x})
+        time.sleep(0.1)
+    assert saved == []
+    wait_for(lambda: saved)
+    assert saved == [{"x": 4}]
+
+
+def test_write_takes_a_copy(tmp_path):
+    writer = WriteBehind(quiet_period=60)
+    path = tmp_path / "ayarlar.json"
+    data = {"DISPLAY": {"position": {"x": 1, "y": 2}}}
+    writer.write(path, data)
+    data["DISPLAY"]["position"]["x"] = 99  # Kuyruktaki kopya değişmez
+    writer.flush()
+    assert Tools.load_json(path) == {"DISPLAY": {"position": {"x": 1, "y": 2}}}
+
+
+def test_flush_writes_pending_immediately_and_once(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(WriteBehind, "_save", staticmethod(lambda path, data: saved.append(path.name)))
+    writer = WriteBehind(quiet_period=60)
+    writer.write(tmp_path / "a.json", {})
+    writer.write(tmp_path / "b.json", {})
+    writer.flush()
+    writer.flush()
+    assert sorted(saved) == ["a.json", "b.json"]
+
+
+def test_save_json_is_atomic(tmp_path):
+    path = tmp_path / "ayarlar.json"
+    Tools.save_json(path, {"a": 1})
+    Tools.save_json(path, {"a": 2})
+    assert Tools.load_json(path) == {"a": 2}
+    assert [p.name for p in tmp_path.iterdir()] == ["ayarlar.json"]  # Geçici dosya kalmaz